@@ -0,0 +1,42 @@
+"""pgvector_embeddings
+
+Optional branch for VECTOR_BACKEND=pgvector, so Milvus and local deployments never
+need the pgvector extension. Apply it at any time with `alembic upgrade pgvector@head`
+(or `alembic upgrade heads`); the main schema is unaffected.
+
+Requires pgvector >= 0.5 (HNSW); 0.8+ is recommended so filtered searches can scan
+iteratively (see PgVectorIndexer).
+
+Revision ID: 7b3f0c2d9e41
+Revises: 1e9c2f6d0a7a
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '7b3f0c2d9e41'
+down_revision = '1e9c2f6d0a7a'
+branch_labels = ('pgvector',)
+depends_on = None
+
+# Must match the embedding model (384 for all-MiniLM-L6-v2) or EMBEDDING_PROJECTION_PATH output
+EMBEDDING_DIM = int(os.getenv("PGVECTOR_DIM", "384"))
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.execute(f"ALTER TABLE products ADD COLUMN embedding vector({EMBEDDING_DIM})")
+    # Cosine HNSW index; rows without an embedding are simply not indexed
+    op.execute(
+        "CREATE INDEX ix_products_embedding_hnsw ON products "
+        "USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_products_embedding_hnsw")
+    op.drop_column('products', 'embedding')
@@ -0,0 +1,25 @@
+"""products_category_index
+
+Revision ID: a2c5e7f1b3d9
+Revises: 1e9c2f6d0a7a
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a2c5e7f1b3d9'
+down_revision = '1e9c2f6d0a7a'
+# Main schema branch: `alembic upgrade main@head` (the optional pgvector branch is separate)
+branch_labels = ('main',)
+depends_on = None
+
+
+def upgrade() -> None:
+    # Category filters on search (all vector backends) and the product listing
+    op.create_index('ix_products_category', 'products', ['category'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_category', table_name='products')
@@ -0,0 +1,37 @@
+"""product_attributes
+
+Revision ID: c4d8e2a1f5b7
+Revises: a2c5e7f1b3d9
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c4d8e2a1f5b7'
+down_revision = 'a2c5e7f1b3d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Typed attributes normalized from products.specifications (tools/data_ingestion/spec_normalizer.py)
+    op.create_table('product_attributes',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('sku_id', sa.String(length=100), sa.ForeignKey('products.sku_id', ondelete='CASCADE'), nullable=False),
+        sa.Column('attribute', sa.String(length=64), nullable=False),
+        sa.Column('num_value', sa.Float(), nullable=True),
+        sa.Column('text_value', sa.String(length=64), nullable=True),
+    )
+    # Range and equality lookups per attribute
+    op.create_index('ix_product_attributes_num', 'product_attributes', ['attribute', 'num_value'])
+    op.create_index('ix_product_attributes_text', 'product_attributes', ['attribute', 'text_value'])
+    op.create_index('ix_product_attributes_sku', 'product_attributes', ['sku_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_product_attributes_sku', table_name='product_attributes')
+    op.drop_index('ix_product_attributes_text', table_name='product_attributes')
+    op.drop_index('ix_product_attributes_num', table_name='product_attributes')
+    op.drop_table('product_attributes')
@@ -1,7 +1,12 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
+import json
 import logging
+import threading
+import time
 
 from engine.rag.recommendation_chain import RecommendationChain
 from engine.rag.confidence_scorer import ConfidenceScorer
@@ -29,19 +34,53 @@ class RecommendationResponse(BaseModel):
 # Singleton instances (lazy loading handled in classes usually, but good to init once)
 _chain = None
 _scorer = None
+_chain_lock = threading.Lock()
 
 def get_chain():
     global _chain
     if _chain is None:
-        _chain = RecommendationChain()
+        # Startup warm-up and the first request may race to build the chain
+        with _chain_lock:
+            if _chain is None:
+                _chain = RecommendationChain()
     return _chain
 
+def warm_up():
+    """
+    Build the chain and run one query embedding so the first request
+    does not pay for model loading. Called in the background at startup.
+    """
+    started = time.perf_counter()
+    try:
+        chain = get_chain()
+        chain.search_engine.embedder.warmup()
+        if chain.search_engine.reranker:
+            chain.search_engine.reranker.warmup()
+        if chain.sku_index:
+            chain.sku_index.maybe_refresh()
+        if chain.search_engine.lexical_index:
+            chain.search_engine.lexical_index.maybe_sync()
+        logger.info(f"Recommendation chain warmed up in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        logger.error(f"Warm-up failed (will retry on first request): {e}")
+
 def get_scorer():
     global _scorer
     if _scorer is None:
         _scorer = ConfidenceScorer()
     return _scorer
 
+def _source(doc: Dict[str, Any]) -> ProductSource:
+    return ProductSource(
+        name=doc.get("name", "Unknown"),
+        sku=doc.get("sku", "Unknown"),
+        category=doc.get("category"),
+        score=doc.get("score")
+    )
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
 @router.post("/recommend", response_model=RecommendationResponse)
 async def get_recommendation(request: RecommendationRequest):
     """
@@ -53,24 +92,20 @@ async def get_recommendation(request: RecommendationRequest):
     logger.info(f"API Recommendation Request: {request.query}")
     
     try:
-        chain = get_chain()
+        # Building the chain loads models (or waits for the warm-up); keep it off the event loop
+        chain = await run_in_threadpool(get_chain)
         scorer = get_scorer()
         
-        # Run RAG
-        result = chain.get_recommendation(request.query, top_k=request.top_k)
+        # Run RAG in the threadpool so concurrent requests can share embedding batches
+        result = await run_in_threadpool(chain.get_recommendation, request.query, top_k=request.top_k)
         
-        # Calculate Confidence
-        confidence = scorer.calculate_score(request.query, result["source_documents"])
+        # Calculate Confidence (exact part-number answers come with their own)
+        confidence = result.get("confidence")
+        if confidence is None:
+            confidence = scorer.calculate_score(request.query, result["source_documents"])
         
         # Format Sources
-        sources = []
-        for doc in result["source_documents"]:
-            sources.append(ProductSource(
-                name=doc.get("name", "Unknown"),
-                sku=doc.get("sku", "Unknown"),
-                category=doc.get("category"),
-                score=doc.get("score")
-            ))
+        sources = [_source(doc) for doc in result["source_documents"]]
             
         return RecommendationResponse(
             answer=result["answer"],
@@ -81,3 +116,43 @@ async def get_recommendation(request: RecommendationRequest):
     except Exception as e:
         logger.error(f"API Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/recommend/stream")
+async def stream_recommendation(request: RecommendationRequest):
+    """
+    Server-Sent Events version of /recommend.
+
+    Events: `sources` (products and confidence, sent as soon as retrieval finishes),
+    `token` (answer text as it is generated), then `done` (full answer) or `error`.
+    """
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+
+    logger.info(f"API Streaming Recommendation Request: {request.query}")
+    chain = await run_in_threadpool(get_chain)
+    scorer = get_scorer()
+
+    def events() -> Iterator[str]:
+        # Runs in the threadpool (sync iterator), like /recommend
+        try:
+            for event, data in chain.stream_recommendation(request.query, top_k=request.top_k):
+                if event == "sources":
+                    confidence = data.get("confidence")
+                    if confidence is None:
+                        confidence = scorer.calculate_score(request.query, data["source_documents"])
+                    data = {
+                        "sources": [_source(doc).model_dump() for doc in data["source_documents"]],
+                        "confidence": confidence,
+                        "detected_language": data.get("detected_language"),
+                    }
+                yield _sse(event, data)
+        except Exception as e:
+            logger.error(f"API Streaming Error: {e}")
+            yield _sse("error", {"message": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Proxies (nginx) must not buffer the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
 import logging
 import os
+import threading
 from prometheus_fastapi_instrumentator import Instrumentator
 
 from api.routes import recommendations, documents, contacts, quotations
@@ -35,6 +36,12 @@ app.include_router(documents.router, prefix="/api/v1", tags=["Documents"])
 app.include_router(contacts.router, prefix="/api/v1", tags=["Contacts"])
 app.include_router(quotations.router, prefix="/api/v1", tags=["Quotations"])
 
+@app.on_event("startup")
+def warm_up_models():
+    """Load and warm the embedding model in the background so the API starts serving immediately."""
+    if os.getenv("EMBEDDING_WARMUP", "true").lower() in ("1", "true", "yes"):
+        threading.Thread(target=recommendations.warm_up, name="model-warmup", daemon=True).start()
+
 @app.get("/api/v1/health")
 def health_check():
     return {
@@ -0,0 +1,57 @@
+import os
+import logging
+import threading
+import time
+from sqlalchemy import create_engine, text
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_engine = None
+
+
+def get_database_url() -> str:
+    """DATABASE_URL if set, otherwise built from the POSTGRES_* variables (defaults match docker-compose.yml)."""
+    url = os.getenv("DATABASE_URL")
+    if url:
+        return url
+    user = os.getenv("POSTGRES_USER", "postgres")
+    password = os.getenv("POSTGRES_PASSWORD", "secure_password")
+    host = os.getenv("POSTGRES_HOST", "postgres")
+    port = os.getenv("POSTGRES_PORT", "5432")
+    name = os.getenv("POSTGRES_DB", "automation_engine")
+    return f"postgresql://{user}:{password}@{host}:{port}/{name}"
+
+
+def get_engine():
+    """Process-wide SQLAlchemy engine (connection pool) for the product database."""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(get_database_url(), pool_pre_ping=True)
+    return _engine
+
+
+_catalog_version = None
+_catalog_checked_at = 0.0
+_catalog_lock = threading.Lock()
+
+
+def get_catalog_version(max_age: float = None) -> str:
+    """
+    Cheap fingerprint of the products table (row count + latest updated_at).
+
+    Caches keyed on catalog content compare it to decide when to drop entries.
+    The database is polled at most every `max_age` seconds (CATALOG_VERSION_CHECK_SECONDS).
+    """
+    global _catalog_version, _catalog_checked_at
+    if max_age is None:
+        max_age = float(os.getenv("CATALOG_VERSION_CHECK_SECONDS", "30"))
+    with _catalog_lock:
+        if _catalog_version is not None and time.monotonic() - _catalog_checked_at < max_age:
+            return _catalog_version
+        with get_engine().connect() as conn:
+            count, updated = conn.execute(text("SELECT count(*), max(updated_at) FROM products")).one()
+        _catalog_version = f"{count}:{updated.isoformat() if updated else ''}"
+        _catalog_checked_at = time.monotonic()
+        return _catalog_version
@@ -0,0 +1,32 @@
+import logging
+import os
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VECTOR_BACKENDS = ("milvus", "local", "pgvector")
+
+
+def create_vector_indexer(backend: str = None, collection_name: str = "products"):
+    """
+    Returns the vector store selected by VECTOR_BACKEND.
+
+    - milvus: VectorIndexer (Milvus + etcd + MinIO services).
+    - local: LocalVectorIndexer (in-process, memory-mapped snapshots; no services).
+    - pgvector: PgVectorIndexer (embeddings in the PostgreSQL products table).
+
+    Backends are imported lazily so the local one works without pymilvus installed.
+    """
+    backend = (backend or os.getenv("VECTOR_BACKEND", "milvus")).lower()
+    logger.info(f"Using '{backend}' vector backend.")
+    if backend == "milvus":
+        from engine.embeddings.vector_indexer import VectorIndexer
+        return VectorIndexer(collection_name=collection_name)
+    if backend == "local":
+        from engine.embeddings.local_indexer import LocalVectorIndexer
+        return LocalVectorIndexer(collection_name=collection_name)
+    if backend == "pgvector":
+        from engine.embeddings.pgvector_indexer import PgVectorIndexer
+        return PgVectorIndexer(collection_name=collection_name)
+    raise ValueError(f"Unknown VECTOR_BACKEND '{backend}', expected one of {VECTOR_BACKENDS}.")
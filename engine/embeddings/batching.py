@@ -0,0 +1,166 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from prometheus_client import Histogram
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Metrics (exposed through the /metrics endpoint of the API)
+BATCH_SIZE = Histogram(
+    "embedding_batch_size",
+    "Number of queries encoded together in one model.encode call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+QUEUE_WAIT = Histogram(
+    "embedding_queue_wait_seconds",
+    "Time a query spent waiting for its batch to be encoded",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+_STOP = object()
+
+
+class BatchingEmbedder:
+    """
+    Dynamic micro-batching front for EmbeddingModel.
+
+    Queries submitted from concurrent request threads are collected for a short
+    window (or until the batch is full) and encoded in a single forward pass.
+    Each caller blocks only for its own vector. If the batching thread stops,
+    queries still queued fail instead of waiting forever.
+    """
+
+    def __init__(self, embedder, max_batch_size: int = None, window_ms: float = None):
+        """
+        Args:
+            embedder (EmbeddingModel): The model used to encode the batches.
+            max_batch_size (int): Maximum number of queries per forward pass.
+            window_ms (float): How long to wait for more queries after the first one arrives.
+        """
+        self.embedder = embedder
+        self.max_batch_size = max_batch_size or int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+        self.window = (window_ms if window_ms is not None else float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))) / 1000.0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        """Starts the background batching thread on first use (caller holds _lock)."""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+            self._worker.start()
+            logger.info(f"Embedding batcher started (max_batch_size={self.max_batch_size}, window={self.window * 1000:.1f}ms).")
+
+    def embed(self, text: str) -> np.ndarray:
+        """
+        Embed a single query, sharing the forward pass with concurrent callers.
+
+        Args:
+            text (str): The query text.
+
+        Returns:
+            np.ndarray: The float32 embedding vector for this query.
+        """
+        if not text:
+            return np.zeros((0,), dtype=np.float32)
+
+        future = Future()
+        # Under the lock, so the query is either seen by a running worker or failed when it exits
+        with self._lock:
+            self._ensure_worker()
+            self._queue.put((text, future, time.monotonic()))
+        return future.result()
+
+    def close(self):
+        """Stops the background thread after the queries collected so far are served."""
+        with self._lock:
+            worker = self._worker
+            if worker is not None:
+                self._queue.put(_STOP)
+        if worker is not None:
+            worker.join()
+
+    def _collect_batch(self, first) -> list:
+        """Gathers queries arriving within the batching window of the first one."""
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Serve what we have, then let the run loop exit
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        error = None
+        try:
+            while True:
+                first = self._queue.get()
+                if first is _STOP:
+                    return
+                batch = [first]
+                try:
+                    batch = self._collect_batch(first)
+                    self._encode_batch(batch)
+                except Exception as e:
+                    logger.error(f"Embedding batcher failed on {len(batch)} queries: {e}")
+                    self._fail(batch, e)
+                except BaseException as e:
+                    error = e
+                    self._fail(batch, self._stopped(e))
+                    raise
+        finally:
+            with self._lock:
+                self._worker = None
+                # Queries behind _STOP (or queued when the thread died) would otherwise block forever
+                pending = []
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        pending.append(item)
+                self._fail(pending, self._stopped(error))
+
+    @staticmethod
+    def _stopped(cause: BaseException = None) -> RuntimeError:
+        error = RuntimeError("Embedding batcher stopped")
+        error.__cause__ = cause
+        return error
+
+    @staticmethod
+    def _fail(batch: list, error: BaseException):
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def _encode_batch(self, batch: list):
+        started = time.monotonic()
+        for _, _, enqueued_at in batch:
+            QUEUE_WAIT.observe(started - enqueued_at)
+        BATCH_SIZE.observe(len(batch))
+
+        texts = [text for text, _, _ in batch]
+        try:
+            vectors = self.embedder.embed_array(texts)
+        except Exception as e:
+            logger.error(f"Batched embedding failed for {len(batch)} queries: {e}")
+            self._fail(batch, e)
+            return
+
+        for (_, future, _), vector in zip(batch, vectors):
+            future.set_result(vector)
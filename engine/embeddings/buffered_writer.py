@@ -0,0 +1,168 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Union
+
+import numpy as np
+from prometheus_client import Counter, Gauge, Histogram
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUEUED_ROWS = Gauge("vector_writer_queued_rows", "Rows buffered and waiting to be inserted")
+WRITTEN_ROWS = Counter("vector_writer_written_rows_total", "Rows inserted by the buffered writer")
+BACKPRESSURE_WAIT = Histogram(
+    "vector_writer_backpressure_seconds",
+    "Time producers were blocked because the write buffer was full",
+    buckets=(0.001, 0.01, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+
+class BufferedVectorWriter:
+    """
+    Write buffer in front of VectorIndexer.
+
+    Rows are accumulated and inserted in large chunks from a background thread
+    without sealing a segment each time; the collection is flushed only on
+    flush()/close(). Producers block when too many rows are queued. Exposes
+    upsert_products, so it can stand in for the indexer on the write path.
+    """
+
+    def __init__(self, indexer, chunk_rows: int = None, max_queued_rows: int = None, flush_interval: float = None):
+        """
+        Args:
+            indexer (VectorIndexer | LocalVectorIndexer): Target indexer.
+            chunk_rows (int): Rows per insert call.
+            max_queued_rows (int): Buffer size at which producers block.
+            flush_interval (float): Seconds after which a partial chunk is written anyway.
+        """
+        self.indexer = indexer
+        self.chunk_rows = chunk_rows or int(os.getenv("VECTOR_WRITE_CHUNK_ROWS", "5000"))
+        self.max_queued_rows = max_queued_rows or int(os.getenv("VECTOR_WRITE_MAX_QUEUED_ROWS", "50000"))
+        self.flush_interval = flush_interval or float(os.getenv("VECTOR_WRITE_FLUSH_INTERVAL", "5"))
+
+        self._pending = []  # (products, embeddings)
+        self._queued_rows = 0
+        self._in_flight = 0
+        self._oldest = None
+        self._drain = False
+        self._closed = False
+        self._error = None
+        self.rows_written = 0
+        self.backpressure_seconds = 0.0
+
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name="vector-writer", daemon=True)
+        self._worker.start()
+
+    def upsert_products(self, products: List[Dict[str, Any]], embeddings: Union[np.ndarray, List[List[float]]]):
+        """Queue rows for upsert; blocks while the buffer is full."""
+        if len(products) != len(embeddings):
+            raise ValueError("Number of products must match number of embeddings.")
+        if not products:
+            return
+
+        with self._cond:
+            self._raise_pending_error()
+            if self._closed:
+                raise RuntimeError("Writer is closed.")
+
+            started = time.monotonic()
+            # An oversized batch is still accepted once the buffer is empty
+            while self._queued_rows and self._queued_rows + len(products) > self.max_queued_rows:
+                self._cond.wait()
+                self._raise_pending_error()
+            waited = time.monotonic() - started
+            if waited > 0.001:
+                self.backpressure_seconds += waited
+                BACKPRESSURE_WAIT.observe(waited)
+
+            self._pending.append((products, np.asarray(embeddings, dtype=np.float32)))
+            self._queued_rows += len(products)
+            self._oldest = self._oldest or time.monotonic()
+            QUEUED_ROWS.set(self._queued_rows)
+            self._cond.notify_all()
+
+    def flush(self):
+        """Writes everything queued and seals it in the collection."""
+        with self._cond:
+            self._drain = True
+            self._cond.notify_all()
+            while (self._queued_rows or self._in_flight) and self._error is None:
+                self._cond.wait()
+            self._drain = False
+            self._raise_pending_error()
+        self.indexer.flush()
+        logger.info(f"Vector writer flushed ({self.rows_written} rows written so far).")
+
+    def close(self):
+        """Flushes remaining rows and stops the background thread."""
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            self._worker.join()
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            return {
+                "queued_rows": self._queued_rows,
+                "rows_written": self.rows_written,
+                "backpressure_seconds": round(self.backpressure_seconds, 3),
+            }
+
+    def _raise_pending_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError(f"Background insert failed: {error}") from error
+
+    def _next_chunk(self):
+        """Waits until a chunk is due (size, age, drain or close) and takes it from the buffer."""
+        with self._cond:
+            while True:
+                if self._queued_rows >= self.chunk_rows or (self._queued_rows and (self._drain or self._closed)):
+                    break
+                if self._queued_rows and time.monotonic() - self._oldest >= self.flush_interval:
+                    break
+                if self._closed:
+                    return None
+                timeout = self.flush_interval - (time.monotonic() - self._oldest) if self._queued_rows else None
+                self._cond.wait(timeout=timeout)
+
+            taken, rows = [], 0
+            while self._pending and rows < self.chunk_rows:
+                entry = self._pending.pop(0)
+                taken.append(entry)
+                rows += len(entry[0])
+            self._queued_rows -= rows
+            self._in_flight += rows
+            self._oldest = time.monotonic() if self._queued_rows else None
+            QUEUED_ROWS.set(self._queued_rows)
+            self._cond.notify_all()
+            return taken, rows
+
+    def _run(self):
+        while True:
+            chunk = self._next_chunk()
+            if chunk is None:
+                return
+            taken, rows = chunk
+            products = [p for batch, _ in taken for p in batch]
+            embeddings = np.concatenate([vectors for _, vectors in taken])
+            try:
+                self.indexer.upsert_products(products, embeddings, flush=False)
+                self.rows_written += rows
+                WRITTEN_ROWS.inc(rows)
+            except Exception as e:
+                logger.error(f"Buffered upsert of {rows} rows failed: {e}")
+                with self._cond:
+                    self._error = e
+            with self._cond:
+                self._in_flight -= rows
+                self._cond.notify_all()
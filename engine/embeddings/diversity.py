@@ -0,0 +1,102 @@
+import logging
+import os
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_SEPARATOR = re.compile(r"[-_/. ]")
+_LETTER = re.compile(r"[A-Za-z]")
+
+
+def sku_family(sku: Optional[str]) -> str:
+    """
+    Product family of a part number: the type code before the first separator.
+
+    Variants of one type ("IME12-04BPSZC0K", "IME12-08BPSZC0K") share a family;
+    plain article numbers ("1041434") are their own family.
+    """
+    if not sku:
+        return ""
+    prefix = _SEPARATOR.split(sku.strip(), 1)[0]
+    if len(prefix) >= 3 and _LETTER.search(prefix) and prefix != sku.strip():
+        return prefix.upper()
+    return sku.strip().upper()
+
+
+def mmr_select(relevance: np.ndarray, vectors: np.ndarray, k: int, lambda_: float = 0.7,
+               families: Optional[List[str]] = None) -> List[int]:
+    """
+    Maximal marginal relevance over a candidate matrix.
+
+    Each step picks argmax(lambda * relevance - (1 - lambda) * max similarity to
+    the picks so far), from one (n x n) similarity product and O(n) updates per
+    pick. With `families`, a family is picked again only once every family has
+    been picked.
+
+    Args:
+        relevance (np.ndarray): (n,) retrieval scores.
+        vectors (np.ndarray): (n, dim) unit vectors (zero rows: no similarity penalty).
+        k (int): Number of picks.
+        lambda_ (float): 1.0 is pure relevance order, lower values favour diversity.
+        families (List[str]): Family key per candidate.
+
+    Returns:
+        List[int]: Candidate positions in pick order.
+    """
+    n = len(relevance)
+    k = min(k, n)
+    relevance = np.asarray(relevance, dtype=np.float32)
+    similarity = vectors @ vectors.T
+    max_similarity = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    if families is not None:
+        codes = np.unique(np.asarray(families, dtype=object), return_inverse=True)[1]
+        family_free = np.ones(n, dtype=bool)
+
+    picks = []
+    for _ in range(k):
+        mask = available
+        if families is not None and (available & family_free).any():
+            mask = available & family_free
+        objective = np.where(mask, lambda_ * relevance - (1.0 - lambda_) * max_similarity, -np.inf)
+        best = int(np.argmax(objective))
+        picks.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+        if families is not None:
+            family_free &= codes != codes[best]
+    return picks
+
+
+def diversify(hits: List[Dict], k: int, lambda_: float = None, dedup_families: bool = None) -> List[Dict]:
+    """
+    k distinct hits from a ranked candidate list (MMR on 'vector', SKU-family dedup).
+
+    Hits must be ranked best first. Hits without a 'vector' only take part in
+    the family dedup. The 'vector' keys are removed from the returned hits.
+    """
+    if lambda_ is None:
+        lambda_ = float(os.getenv("MMR_LAMBDA", "0.7"))
+    if dedup_families is None:
+        dedup_families = os.getenv("SKU_FAMILY_DEDUP", "true").lower() in ("1", "true", "yes")
+    if not hits:
+        return []
+
+    dims = {len(hit["vector"]) for hit in hits if hit.get("vector") is not None}
+    vectors = np.zeros((len(hits), dims.pop() if len(dims) == 1 else 0), dtype=np.float32)
+    if vectors.shape[1]:
+        for i, hit in enumerate(hits):
+            if hit.get("vector") is not None:
+                vectors[i] = hit["vector"]
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    # Relevance follows the incoming order (fusion, re-ranking) on the scale of the retrieval scores
+    relevance = np.sort(np.array([hit.get("score", 0.0) for hit in hits], dtype=np.float32))[::-1]
+    families = [sku_family(hit.get("sku")) or str(i) for i, hit in enumerate(hits)] if dedup_families else None
+    picks = mmr_select(relevance, vectors, k, lambda_, families)
+    return [{key: value for key, value in hits[i].items() if key != "vector"} for i in picks]
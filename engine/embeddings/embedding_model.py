@@ -1,36 +1,77 @@
 import logging
 import os
+import threading
+import time
 from typing import List, Union
-from sentence_transformers import SentenceTransformer
 import numpy as np
+from prometheus_client import Gauge
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MODEL_LOAD_SECONDS = Gauge("embedding_model_load_seconds", "Time taken to load the embedding model")
+
 class EmbeddingModel:
     """
     Wrapper for SentenceTransformer to generate embeddings for product text.
     Uses 'all-MiniLM-L6-v2' by default which provides a good balance of speed and accuracy.
     """
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", lazy: bool = None):
         """
         Initialize the embedding model.
         
         Args:
             model_name (str): Name of the model to load from HuggingFace.
+            lazy (bool): Defer loading (torch, weights) until first use or warmup().
+                         Defaults to EMBEDDING_LAZY_LOAD.
         """
         self.model_name = model_name
+        # "torch" (SentenceTransformer) or "onnx" (ONNX Runtime, optionally int8-quantized)
+        self.backend = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+        self.quantize = os.getenv("EMBEDDING_ONNX_QUANTIZE", "false").lower() in ("1", "true", "yes")
+        self.local_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "model_data", model_name))
         self.model = None
-        self._load_model()
+        self.load_seconds = None
+        self._load_lock = threading.Lock()
+        if lazy is None:
+            lazy = os.getenv("EMBEDDING_LAZY_LOAD", "true").lower() in ("1", "true", "yes")
+        if not lazy:
+            self._ensure_loaded()
+
+    def _ensure_loaded(self):
+        """Loads the model exactly once, even with concurrent first callers."""
+        if self.model is not None:
+            return
+        with self._load_lock:
+            if self.model is None:
+                started = time.perf_counter()
+                self._load_model()
+                self.load_seconds = time.perf_counter() - started
+                MODEL_LOAD_SECONDS.set(self.load_seconds)
+                logger.info(f"Embedding model ready in {self.load_seconds:.2f}s.")
+
+    def warmup(self) -> float:
+        """
+        Load the model (if needed) and run one encode so the first real query
+        does not pay for lazy initialization.
+        
+        Returns:
+            float: Total warm-up time in seconds.
+        """
+        started = time.perf_counter()
+        self._ensure_loaded()
+        self.embed_array(["warm-up query for SICK distance sensor"])
+        elapsed = time.perf_counter() - started
+        logger.info(f"Embedding model warm-up finished in {elapsed:.2f}s (load {self.load_seconds:.2f}s).")
+        return elapsed
 
     def _load_model(self):
         """Loads the SentenceTransformer model, checking for local files first."""
         try:
             # 1. Try Local Path (Docker/Deploy friendly)
-            raw_path = os.path.join(os.path.dirname(__file__), "..", "model_data", self.model_name)
-            local_path = os.path.abspath(raw_path)
+            local_path = self.local_path
             
             if os.path.exists(local_path) and os.path.isdir(local_path):
                 logger.info(f"Loading embedding model from local cache: {local_path}...")
@@ -41,51 +82,25 @@ class EmbeddingModel:
                     logger.info(f"Files in model dir: {files}")
                 except Exception as e:
                     logger.warning(f"Could not list files: {e}")
-                
-                # Manual loading using transformers directly to avoid HF validation
-                from transformers import AutoTokenizer, AutoModel
-                import torch
-                
-                # Load tokenizer and model without any network calls
-                tokenizer = AutoTokenizer.from_pretrained(local_path, local_files_only=True)
-                model = AutoModel.from_pretrained(local_path, local_files_only=True)
-                
-                # Wrap in SentenceTransformer-compatible way
-                # We create a minimal SentenceTransformer by directly setting its internal model
-                self.model = SentenceTransformer.__new__(SentenceTransformer)
-                
-                # Critical: Initialize the base nn.Sequential to get _parameters, _modules, etc.
-                import torch.nn as nn
-                nn.Sequential.__init__(self.model)
 
-                from sentence_transformers.models import Transformer, Pooling
-                
-                # Create transformer wrapper
-                transformer = Transformer(
-                    model_name_or_path=local_path,
-                    tokenizer_name_or_path=local_path,
-                    max_seq_length=256
-                )
-                
-                # Create pooling layer (MEAN pooling is default for all-MiniLM-L6-v2)
-                pooling = Pooling(
-                    transformer.get_word_embedding_dimension(),
-                    pooling_mode_mean_tokens=True
-                )
-                
-                # Add modules properly to the Sequential container
-                self.model.add_module('0', transformer)
-                self.model.add_module('1', pooling)
-                
-                # Critical: Set device for SentenceTransformer
-                device = "cuda" if torch.cuda.is_available() else "cpu"
-                self.model._target_device = torch.device(device)
-                self.model.to(device)
+                if self.backend == "onnx":
+                    from engine.embeddings.onnx_backend import OnnxEmbeddingBackend
+
+                    self.model = OnnxEmbeddingBackend(local_path, quantize=self.quantize, max_seq_length=256)
+                    logger.info(f"Embedding model loaded with ONNX Runtime (int8={self.quantize}).")
+                    return
                 
-                logger.info(f"Embedding model loaded successfully from local cache on {device}.")
+                # Manual loading without any network calls; weights are memory-mapped
+                # from model.safetensors so worker processes share one copy
+                from engine.embeddings.model_loader import load_sentence_transformer
+
+                self.model = load_sentence_transformer(local_path, max_seq_length=256)
+                logger.info(f"Embedding model loaded successfully from local cache on {self.model.device}.")
                 
             else:
                  # 2. Fallback to Download (Will fail in offline Codespace if not cached)
+                from sentence_transformers import SentenceTransformer
+
                 logger.info(f"Local model not found at {local_path}. Attempting to download: {self.model_name}...")
                 self.model = SentenceTransformer(self.model_name)
             
@@ -103,29 +118,109 @@ class EmbeddingModel:
         Returns:
             List[float] | List[List[float]]: The embedding vector(s).
         """
-        if not self.model:
-            raise RuntimeError("Model not initialized. Call _load_model first.")
-
         if not text:
             logger.warning("Empty text provided for embedding.")
             return [] if isinstance(text, list) else []
 
-        try:
-            embeddings = self.model.encode(text)
-            
-            # Convert numpy array to list for easier handling/serialization
-            if isinstance(embeddings, np.ndarray):
-                return embeddings.tolist()
+        # Convert numpy array to list for easier handling/serialization
+        return self.embed_array(text).tolist()
+
+    def embed_array(self, text: Union[str, List[str]], normalize: bool = False) -> np.ndarray:
+        """
+        Generate embeddings as a contiguous float32 array (no per-float boxing).
+        
+        Args:
+            text (str | List[str]): The text(s) to embed.
+            normalize (bool): L2-normalize each vector (cosine == inner product).
             
-            return embeddings
+        Returns:
+            np.ndarray: Shape (dim,) for a string, (n, dim) for a list.
+        """
+        self._ensure_loaded()
+
+        if not text:
+            shape = (0, self.get_dimension()) if isinstance(text, list) else (0,)
+            return np.zeros(shape, dtype=np.float32)
+
+        try:
+            embeddings = np.ascontiguousarray(self.model.encode(text), dtype=np.float32)
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
             raise e
 
+        if normalize:
+            norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+            embeddings /= np.maximum(norms, 1e-12)
+        return embeddings
+
+    def embed_bulk(self, texts: List[str], normalize: bool = False, token_budget: int = None, max_batch_size: int = None) -> np.ndarray:
+        """
+        Embed many documents with length-bucketed batching.
+        
+        Texts are sorted by token length and encoded in groups of similar length,
+        so little compute is spent on padding. Each bucket gets the largest batch
+        size that keeps (batch size x longest sequence) within the token budget.
+        The result is returned in the original order.
+        
+        Args:
+            texts (List[str]): The documents to embed.
+            normalize (bool): L2-normalize each vector.
+            token_budget (int): Padded tokens per forward pass.
+            max_batch_size (int): Upper bound on texts per forward pass.
+            
+        Returns:
+            np.ndarray: (n, dim) float32 matrix aligned with `texts`.
+        """
+        token_budget = token_budget or int(os.getenv("EMBEDDING_TOKEN_BUDGET", "8192"))
+        max_batch_size = max_batch_size or int(os.getenv("EMBEDDING_MAX_BULK_BATCH", "256"))
+        if not texts:
+            return np.zeros((0, self.get_dimension()), dtype=np.float32)
+
+        lengths = self._token_lengths(texts)
+        order = np.argsort(lengths, kind="stable")
+        output = np.empty((len(texts), self.get_dimension()), dtype=np.float32)
+
+        start = 0
+        while start < len(order):
+            # Sorted ascending: the last text added is the longest in the bucket
+            end = start + 1
+            while end < len(order) and end - start < max_batch_size and (end - start + 1) * lengths[order[end]] <= token_budget:
+                end += 1
+            bucket = order[start:end]
+            output[bucket] = self.model.encode([texts[i] for i in bucket], batch_size=len(bucket))
+            start = end
+
+        if normalize:
+            output /= np.maximum(np.linalg.norm(output, axis=1, keepdims=True), 1e-12)
+        return output
+
+    def _token_lengths(self, texts: List[str]) -> np.ndarray:
+        """Token counts after truncation (falls back to a character estimate)."""
+        self._ensure_loaded()
+        tokenizer = getattr(self.model, "tokenizer", None)
+        max_length = getattr(self.model, "max_seq_length", None) or 256
+        if tokenizer is None:
+            return np.minimum(np.array([len(t) // 4 + 2 for t in texts]), max_length)
+        encoded = tokenizer(texts, add_special_tokens=True, truncation=True, max_length=max_length)
+        return np.array([len(ids) for ids in encoded["input_ids"]])
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the vectors this model produces (used to invalidate caches)."""
+        if self.backend == "onnx":
+            return f"{self.model_name}:onnx{'-int8' if self.quantize else ''}"
+        return self.model_name
+
     def get_dimension(self) -> int:
         """Returns the dimension of the embeddings generated by this model."""
         if not self.model:
-            return 0
+            # Read it from the config so callers don't force a full load
+            from engine.embeddings.model_loader import read_dimension
+
+            dim = read_dimension(self.local_path) if os.path.isdir(self.local_path) else None
+            if dim:
+                return dim
+            self._ensure_loaded()
         return self.model.get_sentence_embedding_dimension()
 
 if __name__ == "__main__":
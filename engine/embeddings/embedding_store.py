@@ -0,0 +1,157 @@
+import hashlib
+import json
+import logging
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingStore:
+    """
+    Content-addressed on-disk cache of document embeddings.
+
+    Vectors live in a memory-mapped float32 matrix (vectors.f32); index.json maps
+    the hash of (model id, exact text) to a row. Each indexing run marks the
+    keys it touches, so entries not seen in the latest run can be compacted away.
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, path: str, model_id: str, dim: int, autosave_rows: int = 5000):
+        """
+        Args:
+            path (str): Directory holding vectors.f32 and index.json.
+            model_id (str): Identity of the model producing the vectors (part of every key).
+            dim (int): Embedding dimension.
+            autosave_rows (int): Persist the key index after this many new rows.
+        """
+        self.path = path
+        self.model_id = model_id
+        self.dim = dim
+        self.autosave_rows = autosave_rows
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._index_path = os.path.join(path, "index.json")
+
+        self.keys = {}  # digest -> [row, run_id]
+        self.count = 0
+        self.run_id = 0
+        self._unsaved = 0
+        self._vectors = None
+        os.makedirs(path, exist_ok=True)
+        self._open()
+
+    def _open(self):
+        if os.path.exists(self._index_path):
+            with open(self._index_path, "r") as f:
+                meta = json.load(f)
+            if meta.get("dim") == self.dim:
+                self.keys = meta["keys"]
+                self.count = meta["count"]
+                self.run_id = meta["run_id"]
+            else:
+                logger.warning(f"Embedding store dim {meta.get('dim')} != {self.dim}, starting empty.")
+
+        capacity = self.INITIAL_CAPACITY
+        if os.path.exists(self._vectors_path):
+            capacity = max(capacity, os.path.getsize(self._vectors_path) // (4 * self.dim))
+        self._map(max(capacity, self.count))
+        logger.info(f"Embedding store opened at {self.path} ({self.count} vectors).")
+
+    def _map(self, capacity: int):
+        """(Re)maps the vector file, growing it to hold `capacity` rows."""
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        size = capacity * self.dim * 4
+        with open(self._vectors_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _key(self, text: str) -> str:
+        return hashlib.blake2b(f"{self.model_id}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def begin_run(self):
+        """Starts a new indexing run; keys not touched by it become stale."""
+        self.run_id += 1
+
+    def lookup(self, texts: List[str]) -> Tuple[np.ndarray, List[int]]:
+        """
+        Fetch stored vectors for a batch of texts.
+
+        Returns:
+            (np.ndarray, List[int]): A (n, dim) matrix with stored rows filled in,
+            and the positions of texts that still need embedding.
+        """
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        found, rows, missing = [], [], []
+        for i, text in enumerate(texts):
+            entry = self.keys.get(self._key(text))
+            if entry is None:
+                missing.append(i)
+                continue
+            entry[1] = self.run_id
+            found.append(i)
+            rows.append(entry[0])
+        if found:
+            vectors[found] = self._vectors[rows]
+        return vectors, missing
+
+    def add(self, texts: List[str], vectors: np.ndarray):
+        """Store freshly computed vectors for the given texts."""
+        if len(texts) == 0:
+            return
+        needed = self.count + len(texts)
+        if needed > self._vectors.shape[0]:
+            self._map(max(needed, self._vectors.shape[0] * 2))
+
+        start = self.count
+        self._vectors[start:needed] = vectors
+        for offset, text in enumerate(texts):
+            self.keys[self._key(text)] = [start + offset, self.run_id]
+        self.count = needed
+
+        self._unsaved += len(texts)
+        if self._unsaved >= self.autosave_rows:
+            self.save()
+
+    def save(self):
+        """Flushes vectors and atomically rewrites the key index."""
+        self._vectors.flush()
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"dim": self.dim, "count": self.count, "run_id": self.run_id, "keys": self.keys}, f)
+        os.replace(tmp_path, self._index_path)
+        self._unsaved = 0
+
+    def compact(self) -> int:
+        """
+        Drop entries not touched by the latest run and rewrite the vector file densely.
+
+        Returns:
+            int: Number of stale entries removed.
+        """
+        live = sorted((entry[0], key) for key, entry in self.keys.items() if entry[1] == self.run_id)
+        dropped = len(self.keys) - len(live)
+
+        compacted = np.empty((max(len(live), 1), self.dim), dtype=np.float32)
+        if live:
+            compacted[:len(live)] = self._vectors[[row for row, _ in live]]
+
+        self._vectors.flush()
+        self._vectors = None
+        tmp_path = self._vectors_path + ".tmp"
+        compacted.tofile(tmp_path)
+        os.replace(tmp_path, self._vectors_path)
+
+        self.keys = {key: [row, self.run_id] for row, (_, key) in enumerate(live)}
+        self.count = len(live)
+        self._map(max(self.count, self.INITIAL_CAPACITY))
+        self.save()
+        logger.info(f"Embedding store compacted: kept {self.count}, dropped {dropped}.")
+        return dropped
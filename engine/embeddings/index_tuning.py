@@ -0,0 +1,198 @@
+import json
+import logging
+import math
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "model_data", "index_config.json")
+
+# Used when no tuned configuration has been saved yet (the original hard-coded values)
+DEFAULT_INDEX = {"index_type": "IVF_FLAT", "params": {"nlist": 128}}
+DEFAULT_SEARCH_PARAMS = {"nprobe": 10}
+
+
+def config_path() -> str:
+    return os.path.abspath(os.getenv("VECTOR_INDEX_CONFIG", DEFAULT_CONFIG_PATH))
+
+
+def load_index_config(path: str = None) -> Optional[Dict]:
+    """Returns the saved tuning result, or None if the collection was never tuned."""
+    path = path or config_path()
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_index_config(config: Dict, path: str = None):
+    path = path or config_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(config, f, indent=2)
+    logger.info(f"Saved index configuration to {path}")
+
+
+def choose_index(num_vectors: int, dim: int, target_recall: float = 0.95) -> Dict:
+    """
+    Picks the index type and build parameters from the collection size.
+
+    - Small catalogs: FLAT (exact, and faster than any ANN at this size).
+    - Medium: IVF_FLAT with nlist ~ 4 * sqrt(n).
+    - Large: HNSW when high recall is required, otherwise IVF_PQ to bound memory.
+    """
+    if num_vectors < 10_000:
+        return {"index_type": "FLAT", "params": {}}
+
+    nlist = int(min(65536, max(64, 4 * math.sqrt(num_vectors))))
+    if num_vectors < 500_000:
+        return {"index_type": "IVF_FLAT", "params": {"nlist": nlist}}
+    if target_recall >= 0.95 or num_vectors < 2_000_000:
+        return {"index_type": "HNSW", "params": {"M": 16, "efConstruction": 200}}
+
+    # PQ sub-vectors must divide the dimension; 8 dims per code byte
+    m = next(m for m in (dim // 8, dim // 4, dim // 2, dim) if m > 0 and dim % m == 0)
+    return {"index_type": "IVF_PQ", "params": {"nlist": nlist, "m": m, "nbits": 8}}
+
+
+def quantized_index(index: Dict, quantization: str) -> Dict:
+    """
+    The index actually built for a VECTOR_QUANTIZATION setting: int8 replaces any
+    index type with IVF_SQ8 (keeping nlist), whose candidates search_many re-ranks.
+    """
+    if quantization != "int8" or index["index_type"] == "IVF_SQ8":
+        return index
+    return {"index_type": "IVF_SQ8", "params": {"nlist": index["params"].get("nlist", DEFAULT_INDEX["params"]["nlist"])}}
+
+
+def search_param_candidates(index: Dict, top_k: int) -> List[Dict]:
+    """Search parameters to sweep for an index, from cheapest to most accurate."""
+    index_type = index["index_type"]
+    if index_type == "FLAT":
+        return [{}]
+    if index_type == "HNSW":
+        return [{"ef": ef} for ef in (16, 32, 64, 128, 256, 512, 1024) if ef >= top_k]
+    nlist = index["params"]["nlist"]
+    return [{"nprobe": p} for p in (1, 2, 4, 8, 16, 32, 64, 128, 256, 512) if p <= nlist]
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def sample_stored_vectors(indexer, num_samples: int, seed: int = 0,
+                          batch_size: int = 1000) -> Tuple[np.ndarray, List[str], int]:
+    """
+    Uniform sample of stored vectors (reservoir sampling over iter_rows), so only
+    `num_samples` vectors are held in memory.
+
+    Returns:
+        Tuple[np.ndarray, List[str], int]: (sample, dim) matrix, the product_id of each
+        sampled row and the number of stored vectors.
+    """
+    rng = np.random.default_rng(seed)
+    sample, ids, seen = [], [], 0
+    for batch in indexer.iter_rows(["product_id", "embedding"], batch_size=batch_size):
+        for row in batch:
+            if len(sample) < num_samples:
+                sample.append(row["embedding"])
+                ids.append(row["product_id"])
+            else:
+                j = int(rng.integers(0, seen + 1))
+                if j < num_samples:
+                    sample[j] = row["embedding"]
+                    ids[j] = row["product_id"]
+            seen += 1
+    return np.asarray(sample, dtype=np.float32), ids, seen
+
+
+def exact_top_k(indexer, queries: np.ndarray, k: int, batch_size: int = 1000,
+                exclude: List[str] = None) -> List[Set[str]]:
+    """
+    Brute-force cosine top-k product_ids per query (the ground truth).
+
+    Stored vectors are streamed in batches and merged into a running top-k, so
+    memory stays at one batch plus (queries x k) whatever the collection size.
+    exclude[i] (the product_id a sampled query was taken from) is never counted
+    as a neighbour of query i.
+    """
+    q = _unit(np.asarray(queries, dtype=np.float32))
+    best_scores = np.full((len(q), 0), -np.inf, dtype=np.float32)
+    best_ids = np.empty((len(q), 0), dtype=object)
+    for batch in indexer.iter_rows(["product_id", "embedding"], batch_size=batch_size):
+        if not batch:
+            continue
+        scores = q @ _unit(np.asarray([row["embedding"] for row in batch], dtype=np.float32)).T
+        ids = np.asarray([row["product_id"] for row in batch], dtype=object)
+        if exclude is not None:
+            scores[np.asarray(exclude, dtype=object)[:, None] == ids[None, :]] = -np.inf
+        scores = np.concatenate([best_scores, scores], axis=1)
+        ids = np.concatenate([best_ids, np.broadcast_to(ids, (len(q), len(ids)))], axis=1)
+        keep = np.argpartition(-scores, min(k, scores.shape[1]) - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, keep, axis=1)
+        best_ids = np.take_along_axis(ids, keep, axis=1)
+    # Excluded rows keep -inf and only fill the top-k when the collection is tiny
+    return [{i for i, score in zip(row_ids, row_scores) if score > -np.inf}
+            for row_ids, row_scores in zip(best_ids.tolist(), best_scores.tolist())]
+
+
+def tune_collection(indexer, target_recall: float = 0.95, num_queries: int = 200, top_k: int = 10, seed: int = 0) -> Dict:
+    """
+    Choose an index for the indexer's collection, rebuild it if needed and sweep
+    search parameters against exact ground truth on sampled stored vectors.
+    Each query's own row is left out of both the ground truth and the ANN hits;
+    it is always its own nearest neighbour and would inflate recall.
+
+    Stored vectors are read twice in batches (sampling queries, then exact
+    search), never all at once.
+
+    Returns:
+        Dict: The saved configuration (index, search_params, measured recall and latency).
+    """
+    queries, query_ids, num_vectors = sample_stored_vectors(indexer, num_queries, seed)
+    if num_vectors < 2:
+        raise RuntimeError("Collection has fewer than 2 vectors; index products before tuning.")
+
+    dim = queries.shape[1]
+    k = min(top_k, num_vectors - 1)
+    truth = exact_top_k(indexer, queries, k, exclude=query_ids)
+
+    index = quantized_index(choose_index(num_vectors, dim, target_recall), getattr(indexer, "quantization", "none"))
+    logger.info(f"{num_vectors} vectors (dim={dim}): using {index['index_type']} {index['params']}")
+    indexer.rebuild_index(index)
+
+    chosen = None
+    for params in search_param_candidates(index, k + 1):
+        started = time.perf_counter()
+        # One extra hit makes room for the query's own row
+        found = indexer.search_many(queries, top_k=k + 1, search_params=params, project=False)
+        latency_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        found = [[h["product_id"] for h in hits if h["product_id"] != own][:k] for own, hits in zip(query_ids, found)]
+        recall = float(np.mean([len(t & set(ids)) / k for t, ids in zip(truth, found)]))
+        logger.info(f"  {params or 'exact'}: recall@{k}={recall:.3f}, {latency_ms:.2f} ms/query")
+        chosen = {"search_params": params, "recall": round(recall, 4), "latency_ms": round(latency_ms, 3)}
+        if recall >= target_recall:
+            break
+    else:
+        logger.warning(f"Target recall {target_recall} not reached; using the most accurate setting.")
+
+    config = {
+        "index": index,
+        "search_params": chosen["search_params"],
+        "measured_recall": chosen["recall"],
+        "latency_ms_per_query": chosen["latency_ms"],
+        "target_recall": target_recall,
+        "top_k": k,
+        "num_vectors": num_vectors,
+        "dim": dim,
+        "tuned_at": datetime.now().isoformat(),
+    }
+    save_index_config(config)
+    return config
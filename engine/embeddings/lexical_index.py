@@ -0,0 +1,261 @@
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from engine.embeddings.query_hints import normalize_manufacturer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Part numbers keep their inner separators: "WL12G-3B2531", "1.5mm", "M12/8"
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+_PART_SEPARATORS = re.compile(r"[-/]")
+_NUMBER_UNIT = re.compile(r"^(\d+(?:[.,]\d+)?)([a-z]+)$")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cased tokens for lexical matching.
+
+    Compound part numbers are indexed whole and by their pieces, and number-unit
+    pairs match with or without the space ("4mm" ~ "4 mm").
+    """
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        tokens.append(token)
+        parts = [p for p in _PART_SEPARATORS.split(token) if p]
+        if len(parts) > 1:
+            tokens.extend(parts)
+        unit = _NUMBER_UNIT.match(token)
+        if unit:
+            tokens.extend(unit.groups())
+    return tokens
+
+
+def flatten_specifications(specs: Union[Dict, List, str, None]) -> str:
+    """Specification JSON (object, list of pairs or JSON text) as plain 'key value' text."""
+    if not specs:
+        return ""
+    if isinstance(specs, str):
+        try:
+            specs = json.loads(specs)
+        except ValueError:
+            return specs
+    if isinstance(specs, dict):
+        return " ".join(f"{k} {flatten_specifications(v) if isinstance(v, (dict, list)) else v}" for k, v in specs.items())
+    if isinstance(specs, list):
+        return " ".join(flatten_specifications(s) if isinstance(s, (dict, list)) else str(s) for s in specs)
+    return str(specs)
+
+
+class LexicalIndex:
+    """
+    In-memory BM25 inverted index over product name, SKU, description and specifications.
+
+    Documents are keyed by SKU and can be added, replaced and removed one at a
+    time; sync_from_database applies only the rows changed since the last sync.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = defaultdict(dict)  # token -> {sku: term frequency}
+        self._doc_terms = {}  # sku -> Counter, needed to remove a document
+        self._lengths = {}  # sku -> number of tokens
+        self._docs = {}  # sku -> product fields returned with hits
+        self._total_length = 0
+        self._synced_until = None
+        self._synced_version = None
+        self._last_sync_check = float("-inf")
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def upsert(self, product: Dict[str, Any]):
+        """
+        Adds or replaces one product.
+
+        Args:
+            product (Dict): sku (required), name, category, manufacturer, description, specifications.
+        """
+        sku = product["sku"]
+        text = " ".join([
+            # SKU twice: an exact part number outweighs a description mention
+            sku, sku,
+            product.get("name") or "",
+            product.get("category") or "",
+            product.get("manufacturer") or "",
+            product.get("description") or "",
+            flatten_specifications(product.get("specifications")),
+        ])
+        terms = Counter(tokenize(text))
+        with self._lock:
+            self.remove(sku)
+            for token, tf in terms.items():
+                self._postings[token][sku] = tf
+            self._doc_terms[sku] = terms
+            self._lengths[sku] = sum(terms.values())
+            self._total_length += self._lengths[sku]
+            self._docs[sku] = {
+                "product_id": product.get("product_id", sku),
+                "sku": sku,
+                "name": product.get("name"),
+                "category": product.get("category"),
+                "manufacturer": normalize_manufacturer(product.get("manufacturer")),
+            }
+
+    def remove(self, sku: str):
+        with self._lock:
+            terms = self._doc_terms.pop(sku, None)
+            if terms is None:
+                return
+            for token in terms:
+                postings = self._postings[token]
+                postings.pop(sku, None)
+                if not postings:
+                    del self._postings[token]
+            self._total_length -= self._lengths.pop(sku)
+            del self._docs[sku]
+
+    def search(self, query: str, top_k: int = 10, manufacturer: Union[str, List[str]] = None,
+               category: Union[str, List[str]] = None, sku: Iterable[str] = None) -> List[Dict]:
+        """
+        BM25 top-k for a query.
+
+        Args:
+            query (str): Search text (part numbers, spec fragments, names).
+            top_k (int): Number of results.
+            manufacturer (str | List[str]): Restrict to these brands.
+            category (str | List[str]): Restrict to these categories.
+            sku (Iterable[str]): Restrict to these SKUs (e.g. spec constraint matches).
+
+        Returns:
+            List[Dict]: Hits with sku, name, category, manufacturer and lexical_score, best first.
+        """
+        tokens = set(tokenize(query))
+        brands = {normalize_manufacturer(m) for m in ([manufacturer] if isinstance(manufacturer, str) else manufacturer or [])}
+        categories = set([category] if isinstance(category, str) else category or [])
+        allowed = set(sku) if sku is not None else None
+
+        with self._lock:
+            n = len(self._docs)
+            if not n or not tokens:
+                return []
+            avg_length = self._total_length / n
+            postings = sorted((self._postings[t] for t in tokens if t in self._postings), key=len)
+            # Terms in most of the catalog ("sensor") barely change the ranking; skip them unless nothing else matched
+            selective = [p for p in postings if len(p) <= n / 2] or postings
+
+            scores = defaultdict(float)
+            for docs in selective:
+                idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+                for sku, tf in docs.items():
+                    norm = 1 - self.b + self.b * self._lengths[sku] / avg_length
+                    scores[sku] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+
+            if brands or categories or allowed is not None:
+                scores = {
+                    key: s for key, s in scores.items()
+                    if (not brands or self._docs[key]["manufacturer"] in brands)
+                    and (not categories or self._docs[key]["category"] in categories)
+                    and (allowed is None or key in allowed)
+                }
+            best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+            return [{**self._docs[key], "lexical_score": score} for key, score in best]
+
+    def sync_from_database(self, force: bool = False) -> int:
+        """
+        Applies product rows changed since the last sync and drops deleted products.
+        Cheap when nothing changed: the catalog version is checked first.
+
+        Returns:
+            int: Number of products (re-)indexed.
+        """
+        from sqlalchemy import text
+        from engine.database import get_engine, get_catalog_version
+
+        version = get_catalog_version()
+        if version == self._synced_version and not force:
+            return 0
+
+        started = time.perf_counter()
+        with get_engine().connect() as conn:
+            # >= so rows committed with the watermark timestamp are not missed (re-indexing is idempotent)
+            rows = conn.execute(text("""
+                SELECT sku_id, product_name, category, manufacturer, description, specifications, updated_at
+                FROM products
+                WHERE (CAST(:since AS timestamp) IS NULL OR updated_at >= :since)
+                ORDER BY updated_at
+            """), {"since": self._synced_until}).fetchall()
+            for row in rows:
+                self.upsert({
+                    "sku": row[0], "name": row[1], "category": row[2], "manufacturer": row[3],
+                    "description": row[4], "specifications": row[5],
+                })
+            if rows:
+                self._synced_until = rows[-1][6]
+
+            total = conn.execute(text("SELECT count(*) FROM products")).scalar()
+            if total != len(self):
+                existing = set(conn.execute(text("SELECT sku_id FROM products")).scalars())
+                for sku in set(self._docs) - existing:
+                    self.remove(sku)
+
+        self._synced_version = version
+        logger.info(f"Lexical index synced: {len(rows)} products updated, {len(self)} indexed ({time.perf_counter() - started:.2f}s).")
+        return len(rows)
+
+    def maybe_sync(self, interval: float = None):
+        """
+        Runs sync_from_database at most every `interval` seconds (LEXICAL_SYNC_SECONDS).
+
+        One caller syncs while concurrent callers search the current index. After
+        a failure (even before the first load) the next attempt waits for the
+        interval instead of every request retrying the full load.
+        """
+        if interval is None:
+            interval = float(os.getenv("LEXICAL_SYNC_SECONDS", "60"))
+        if time.monotonic() - self._last_sync_check < interval:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            # Another caller may have synced between the check and the lock
+            if time.monotonic() - self._last_sync_check < interval:
+                return
+            self._last_sync_check = time.monotonic()
+            self.sync_from_database()
+        finally:
+            self._sync_lock.release()
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict]], key: str = "sku", k: int = 60, limit: Optional[int] = None) -> List[Dict]:
+    """
+    Merges ranked hit lists with reciprocal rank fusion: score = sum(1 / (k + rank)).
+
+    Hits are matched on `key`; the first list's hit dict is kept for duplicates,
+    extended with fields only the other lists have. The fused score is stored as rrf_score.
+    """
+    fused, merged = defaultdict(float), {}
+    for hits in result_lists:
+        for rank, hit in enumerate(hits, start=1):
+            hit_key = hit.get(key)
+            if hit_key is None:
+                continue
+            fused[hit_key] += 1.0 / (k + rank)
+            if hit_key in merged:
+                merged[hit_key] = {**hit, **merged[hit_key]}
+            else:
+                merged[hit_key] = dict(hit)
+    order = sorted(fused, key=fused.get, reverse=True)[:limit]
+    return [{**merged[hit_key], "rrf_score": fused[hit_key]} for hit_key in order]
@@ -0,0 +1,540 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+import numpy as np
+
+from engine.embeddings.projection import load_configured_projection
+from engine.embeddings.query_hints import normalize_manufacturer
+from engine.embeddings.quantization import (
+    configured_quantization, rerank_candidates, make_quantizer, load_quantizer, approximate_top_k, rerank,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join("data", "vector_index")
+METADATA_FIELDS = ["product_id", "sku", "name", "category", "manufacturer"]
+CURRENT_FILE = "CURRENT"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+class LocalVectorIndexer:
+    """
+    In-process drop-in for VectorIndexer, for catalogs that fit in memory.
+
+    Vectors are stored L2-normalized in a float32 matrix, so cosine search is a
+    matrix product followed by argpartition. Collections with at least
+    hnsw_min_rows vectors also get an hnswlib graph (if installed) for
+    unfiltered queries. flush() writes a snapshot directory (raw vectors,
+    metadata, graph); other processes memory-map the latest snapshot at startup
+    and switch to a newer one when the indexing job publishes it.
+
+    Searches read the published state (the last snapshot written or loaded)
+    and writes go to a working copy that flush() publishes. The working arrays
+    are copied once after each publish, then changed in place, so a bulk
+    re-index costs one copy per flush rather than one per batch.
+
+    With quantization (int8 or binary) snapshots carry compact codes instead of
+    a graph: readers keep only the codes in memory, take the best candidates
+    from them and re-rank those against the memory-mapped float32 vectors.
+    """
+
+    def __init__(self, path: str = None, collection_name: str = "products", hnsw_min_rows: int = None,
+                 quantization: str = None):
+        """
+        Args:
+            path (str): Base directory for snapshots (LOCAL_VECTOR_PATH).
+            collection_name (str): Sub-directory per collection.
+            hnsw_min_rows (int): Build an HNSW graph from this many vectors (LOCAL_VECTOR_HNSW_MIN_ROWS).
+            quantization (str): none | int8 | binary codes written with snapshots (VECTOR_QUANTIZATION).
+        """
+        self.collection_name = collection_name
+        self.path = os.path.join(path or os.getenv("LOCAL_VECTOR_PATH", DEFAULT_PATH), collection_name)
+        if hnsw_min_rows is None:
+            hnsw_min_rows = int(os.getenv("LOCAL_VECTOR_HNSW_MIN_ROWS", "50000"))
+        self.hnsw_min_rows = hnsw_min_rows
+        self.refresh_interval = float(os.getenv("LOCAL_VECTOR_REFRESH_SECONDS", "5"))
+        self.quantization = quantization or configured_quantization()
+        self.rerank_candidates = rerank_candidates()
+        # Optional dimension reduction applied to every vector stored or searched
+        self.projection = load_configured_projection()
+
+        self.dim = None
+        # Working state, changed by writes
+        self._vectors = None  # (capacity, dim); rows [:_count] are live
+        self._count = 0
+        self._meta = {field: [] for field in METADATA_FIELDS}
+        self._positions = {}  # product_id -> row
+        self._owned = False  # Working arrays are no longer shared with the published state
+        # Published state, read by searches: (count, vectors, meta) plus graph/codes built for it
+        self._published = (0, None, self._meta)
+        self._filter_columns = None
+        self._categories = None
+        self._hnsw = None
+        self._quantizer = None
+        self._codes = None
+        self._dirty = False
+        self._snapshot = None
+        self._last_refresh_check = 0.0
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Collection lifecycle
+    # ------------------------------------------------------------------
+    def create_collection(self, dim: int = 384):
+        """
+        Restore the latest snapshot, or start an empty collection.
+
+        Args:
+            dim (int): Dimension of the embedding vectors (default 384 for all-MiniLM-L6-v2).
+        """
+        if self.projection is not None:
+            if dim != self.projection.in_dim:
+                raise ValueError(f"Projection expects {self.projection.in_dim}-d embeddings, model produces {dim}.")
+            dim = self.projection.out_dim
+
+        with self._lock:
+            current = self._current_snapshot()
+            if current:
+                self._load_snapshot(current)
+                if self.dim != dim:
+                    raise ValueError(f"Snapshot '{current}' holds {self.dim}-d vectors, expected {dim}. "
+                                     f"Delete {self.path} and re-index.")
+                return
+
+            logger.info(f"Creating local collection '{self.collection_name}' with dim={dim} at {self.path}")
+            self.dim = dim
+            self._vectors = np.zeros((0, dim), dtype=np.float32)
+            self._publish()
+
+    @property
+    def keyed_by_product_id(self) -> bool:
+        return True
+
+    def has_field(self, name: str) -> bool:
+        return name in METADATA_FIELDS or name == "embedding"
+
+    @property
+    def num_entities(self) -> int:
+        return self._count
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def insert_products(self, products: List[Dict[str, Any]], embeddings: Union[np.ndarray, List[List[float]]], flush: bool = True):
+        """Same as upsert_products: rows are always keyed on product_id."""
+        self.upsert_products(products, embeddings, flush=flush)
+
+    def upsert_products(self, products: List[Dict[str, Any]], embeddings: Union[np.ndarray, List[List[float]]], flush: bool = True):
+        """
+        Insert or replace products keyed on product_id.
+
+        Args:
+            products (List[Dict]): List of product dictionaries (must contain product_id, sku, name, category).
+            embeddings (np.ndarray | List[List[float]]): Corresponding (n, dim) float32 matrix or list of vectors.
+            flush (bool): Write a snapshot right away.
+        """
+        if len(products) != len(embeddings):
+            raise ValueError("Number of products must match number of embeddings.")
+        if not products:
+            return
+
+        # Within one call the last row for a product_id wins
+        latest = {p["product_id"]: i for i, p in enumerate(products)}
+        keep = sorted(latest.values())
+        products = [products[i] for i in keep]
+        vectors = self._prepare_vectors(np.asarray(embeddings, dtype=np.float32)[keep])
+
+        with self._lock:
+            if self._vectors is None:
+                self.create_collection(dim=len(embeddings[0]))
+
+            self._own()
+            self._reserve(self._count + len(products))
+            rows = []
+            for product in products:
+                row = self._positions.get(product["product_id"])
+                if row is None:
+                    row = self._count
+                    self._count += 1
+                    self._positions[product["product_id"]] = row
+                    for field in METADATA_FIELDS:
+                        self._meta[field].append(None)
+                rows.append(row)
+                self._meta["product_id"][row] = product["product_id"]
+                self._meta["sku"][row] = product["sku"]
+                self._meta["name"][row] = product["name"]
+                self._meta["category"][row] = str(product.get("category", "Uncategorized"))
+                self._meta["manufacturer"][row] = normalize_manufacturer(product.get("manufacturer"))
+
+            self._vectors[rows] = vectors
+            if self._categories is not None:
+                self._categories = sorted(set(self._categories) | {p.get("category") for p in products if p.get("category")})
+            self._mark_dirty()
+
+        logger.info(f"Upserted {len(products)} vectors (local).")
+        if flush:
+            self.flush()
+
+    def delete_products(self, product_ids: List[str], flush: bool = True) -> int:
+        """
+        Delete the rows of the given product_ids (the last row is moved into each hole).
+
+        Returns:
+            int: Number of rows deleted.
+        """
+        deleted = 0
+        with self._lock:
+            if any(product_id in self._positions for product_id in product_ids):
+                self._own()
+            for product_id in product_ids:
+                row = self._positions.pop(product_id, None)
+                if row is None:
+                    continue
+                last = self._count - 1
+                if row != last:
+                    self._vectors[row] = self._vectors[last]
+                    for field in METADATA_FIELDS:
+                        self._meta[field][row] = self._meta[field][last]
+                    self._positions[self._meta["product_id"][row]] = row
+                for field in METADATA_FIELDS:
+                    self._meta[field].pop()
+                self._count = last
+                deleted += 1
+            if deleted:
+                self._mark_dirty()
+        if flush:
+            self.flush()
+        return deleted
+
+    def flush(self):
+        """Writes a snapshot if anything changed since the last one."""
+        with self._lock:
+            if self._dirty:
+                self._write_snapshot()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def iter_rows(self, output_fields: List[str], batch_size: int = 1000):
+        """Yields every published row of the collection in batches (used by maintenance jobs)."""
+        with self._lock:
+            count, vectors, meta = self._published
+        for start in range(0, count, batch_size):
+            batch = []
+            for row in range(start, min(start + batch_size, count)):
+                batch.append({
+                    field: vectors[row].tolist() if field == "embedding" else meta[field][row]
+                    for field in output_fields
+                })
+            yield batch
+
+    def list_product_ids(self) -> Set[str]:
+        """Returns the distinct product_ids stored in the collection."""
+        with self._lock:
+            return set(self._positions)
+
+    def list_categories(self, refresh: bool = False) -> List[str]:
+        """Distinct categories in the collection."""
+        with self._lock:
+            if self._categories is None or refresh:
+                self._categories = sorted({c for c in self._meta["category"] if c})
+            return self._categories
+
+    def build_filter(self, manufacturer: Union[str, List[str]] = None, category: Union[str, List[str]] = None,
+                     sku: Iterable[str] = None) -> Optional[Dict[str, List[str]]]:
+        """
+        Filter restricting a search to manufacturers, categories and/or SKUs.
+
+        Returns:
+            Dict: {"manufacturer": [...], "category": [...], "sku": [...]}, or None when there is nothing to filter on.
+        """
+        expr = {}
+        if manufacturer:
+            values = [manufacturer] if isinstance(manufacturer, str) else list(manufacturer)
+            expr["manufacturer"] = [normalize_manufacturer(m) for m in values]
+        if category:
+            expr["category"] = [category] if isinstance(category, str) else list(category)
+        if sku is not None:
+            expr["sku"] = list(sku)
+        return expr or None
+
+    def search(self, query_embedding: Union[np.ndarray, List[float]], top_k: int = 5, expr: Dict[str, List[str]] = None,
+               with_vectors: bool = False) -> List[Dict]:
+        """
+        Search for similar products using a query embedding.
+
+        Args:
+            expr (Dict): Optional filter from build_filter.
+            with_vectors (bool): Add each hit's stored vector as 'vector'.
+        """
+        return self.search_many([query_embedding], top_k=top_k, expr=expr, with_vectors=with_vectors)[0]
+
+    def search_many(self, query_embeddings: Union[np.ndarray, List[List[float]]], top_k: int = 5, max_nq: int = 1024,
+                    search_params: Dict[str, Any] = None, project: bool = True, expr: Dict[str, List[str]] = None,
+                    with_vectors: bool = False) -> List[List[Dict]]:
+        """
+        Exact (or HNSW, for large unfiltered searches) cosine top-k for many queries.
+
+        Args:
+            query_embeddings (np.ndarray | List[List[float]]): (n, dim) query vectors.
+            top_k (int): Results per query.
+            max_nq (int): Queries scored per matrix product (bounds the score matrix).
+            search_params (Dict): {"ef": ...} for the HNSW graph.
+            project (bool): Apply the configured projection.
+            expr (Dict): Optional filter from build_filter.
+            with_vectors (bool): Add each hit's stored unit vector as 'vector'.
+
+        Returns:
+            List[List[Dict]]: Hits per query, in input order.
+        """
+        if self._vectors is None:
+            raise RuntimeError("Collection not initialized.")
+        if len(query_embeddings) == 0:
+            return []
+        self._maybe_refresh()
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if self.projection is not None and project:
+            queries = self.projection.apply(queries)
+        else:
+            queries = _normalize(queries)
+
+        with self._lock:
+            (count, vectors, meta), hnsw = self._published, self._hnsw
+            quantizer, codes = self._quantizer, self._codes
+            candidates = self._filter_rows(expr)
+        hit_vectors = vectors if with_vectors else None
+
+        if count == 0 or (candidates is not None and len(candidates) == 0):
+            return [[] for _ in queries]
+
+        searched = count if candidates is None else len(candidates)
+        if quantizer is not None and searched > self.rerank_candidates:
+            subset = codes if candidates is None else codes[candidates]
+            all_hits = []
+            for start in range(0, len(queries), max_nq):
+                chunk = queries[start:start + max_nq]
+                rows = approximate_top_k(quantizer, subset, chunk, max(top_k, self.rerank_candidates))
+                if candidates is not None:
+                    rows = candidates[rows]
+                top, top_scores = rerank(vectors, chunk, rows, top_k)
+                all_hits.extend(self._hits(meta, row_ids, row_scores, hit_vectors) for row_ids, row_scores in zip(top, top_scores))
+            return all_hits
+
+        if candidates is None and hnsw is not None:
+            k = min(top_k, count)
+            hnsw.set_ef(max(k, (search_params or {}).get("ef", int(os.getenv("LOCAL_VECTOR_HNSW_EF", "64")))))
+            labels, distances = hnsw.knn_query(queries, k=k)
+            return [self._hits(meta, row_ids, 1.0 - dists, hit_vectors) for row_ids, dists in zip(labels, distances)]
+
+        base = vectors[:count] if candidates is None else vectors[candidates]
+        k = min(top_k, len(base))
+        all_hits = []
+        for start in range(0, len(queries), max_nq):
+            scores = queries[start:start + max_nq] @ base.T
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            if candidates is not None:
+                top = candidates[top]
+            all_hits.extend(self._hits(meta, row_ids, row_scores, hit_vectors) for row_ids, row_scores in zip(top, top_scores))
+        return all_hits
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _hits(meta: Dict[str, list], rows: np.ndarray, scores: np.ndarray, vectors: np.ndarray = None) -> List[Dict]:
+        hits = [
+            {
+                "milvus_id": meta["product_id"][row],  # Same keys as VectorIndexer hits
+                "score": float(score),
+                "product_id": meta["product_id"][row],
+                "sku": meta["sku"][row],
+                "name": meta["name"][row],
+                "category": meta["category"][row],
+                "manufacturer": meta["manufacturer"][row],
+            }
+            for row, score in zip(rows.tolist(), scores.tolist())
+        ]
+        if vectors is not None:
+            for hit, row in zip(hits, rows.tolist()):
+                hit["vector"] = np.array(vectors[row], dtype=np.float32)
+        return hits
+
+    def _prepare_vectors(self, embeddings: np.ndarray) -> np.ndarray:
+        if self.projection is not None:
+            return self.projection.apply(embeddings)
+        return _normalize(embeddings).astype(np.float32)
+
+    def _own(self):
+        """Copies the working arrays once after a publish, so searches never see rows change."""
+        if self._owned:
+            return
+        self._vectors = self._vectors[:self._count].copy()
+        self._meta = {field: list(values) for field, values in self._meta.items()}
+        self._owned = True
+
+    def _publish(self, hnsw=None, quantizer=None, codes=None):
+        """Makes the working state (and the graph/codes built from it) what searches read."""
+        self._published = (self._count, self._vectors, self._meta)
+        self._hnsw = hnsw
+        self._quantizer, self._codes = quantizer, codes
+        self._filter_columns = None
+        self._owned = False
+
+    def _reserve(self, rows: int):
+        """Grows the vector matrix (geometrically) to hold at least `rows` rows."""
+        capacity = len(self._vectors)
+        if rows <= capacity:
+            return
+        grown = np.zeros((max(rows, 2 * capacity, 1024), self.dim), dtype=np.float32)
+        grown[:self._count] = self._vectors[:self._count]
+        self._vectors = grown
+
+    def _mark_dirty(self):
+        # Graph and codes of the published state stay valid until the next snapshot
+        self._dirty = True
+
+    def _filter_rows(self, expr: Optional[Dict[str, List[str]]]) -> Optional[np.ndarray]:
+        """Published row numbers matching the filter, or None for no filter."""
+        if not expr:
+            return None
+        count, _, meta = self._published
+        if self._filter_columns is None:
+            self._filter_columns = {
+                field: np.asarray(meta[field][:count], dtype=object) for field in ("manufacturer", "category", "sku")
+            }
+        mask = np.ones(count, dtype=bool)
+        for field, values in expr.items():
+            mask &= np.isin(self._filter_columns[field], values)
+        return np.flatnonzero(mask)
+
+    def _build_hnsw(self, vectors: np.ndarray):
+        """Builds an HNSW graph over the live rows, or returns None if not applicable."""
+        if len(vectors) < self.hnsw_min_rows:
+            return None
+        try:
+            import hnswlib
+        except ImportError:
+            logger.warning("hnswlib is not installed; using exact search.")
+            return None
+        started = time.perf_counter()
+        index = hnswlib.Index(space="cosine", dim=self.dim)
+        index.init_index(max_elements=len(vectors), M=16, ef_construction=200)
+        index.add_items(vectors, np.arange(len(vectors)))
+        logger.info(f"Built HNSW graph over {len(vectors)} vectors in {time.perf_counter() - started:.1f}s")
+        return index
+
+    def _current_snapshot(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.path, CURRENT_FILE), "r") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _write_snapshot(self):
+        """Writes vectors, metadata and graph to a new directory and publishes it atomically."""
+        name = f"snapshot-{time.time_ns()}"
+        target = os.path.join(self.path, name)
+        tmp = target + ".tmp"
+        os.makedirs(tmp, exist_ok=True)
+
+        vectors = np.ascontiguousarray(self._vectors[:self._count])
+        vectors.tofile(os.path.join(tmp, "vectors.f32"))
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({"dim": self.dim, "count": self._count, "fields": self._meta, "quantization": self.quantization}, f)
+
+        hnsw, quantizer, codes = None, None, None
+        if self.quantization != "none" and self._count:
+            # Codes replace the graph, which would keep a float32 copy of every vector in memory
+            quantizer = make_quantizer(self.quantization, vectors)
+            codes = quantizer.encode(vectors)
+            np.save(os.path.join(tmp, "codes.npy"), codes)
+            np.savez(os.path.join(tmp, "quantizer.npz"), **quantizer.to_arrays())
+        else:
+            hnsw = self._build_hnsw(vectors)
+            if hnsw is not None:
+                hnsw.save_index(os.path.join(tmp, "hnsw.bin"))
+
+        os.replace(tmp, target)
+        current_tmp = os.path.join(self.path, CURRENT_FILE + ".tmp")
+        with open(current_tmp, "w") as f:
+            f.write(name)
+        os.replace(current_tmp, os.path.join(self.path, CURRENT_FILE))
+
+        previous, self._snapshot = self._snapshot, name
+        self._publish(hnsw, quantizer, codes)
+        self._dirty = False
+        logger.info(f"Wrote snapshot {name} ({self._count} vectors).")
+
+        # Keep the previous snapshot for processes that have not switched yet
+        for entry in os.listdir(self.path):
+            if entry.startswith("snapshot-") and entry not in (name, previous):
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+
+    def _load_snapshot(self, name: str):
+        directory = os.path.join(self.path, name)
+        started = time.perf_counter()
+        with open(os.path.join(directory, "meta.json"), "r") as f:
+            meta = json.load(f)
+
+        dim, count = meta["dim"], meta["count"]
+        if count:
+            # Copy-on-write mapping: pages come from the OS cache and are shared between processes
+            vectors = np.memmap(os.path.join(directory, "vectors.f32"), dtype=np.float32, mode="c", shape=(count, dim))
+        else:
+            vectors = np.zeros((0, dim), dtype=np.float32)
+
+        hnsw = None
+        graph_path = os.path.join(directory, "hnsw.bin")
+        if os.path.exists(graph_path):
+            try:
+                import hnswlib
+                hnsw = hnswlib.Index(space="cosine", dim=dim)
+                hnsw.load_index(graph_path, max_elements=count)
+            except ImportError:
+                logger.warning("Snapshot has an HNSW graph but hnswlib is not installed; using exact search.")
+
+        quantizer, codes = None, None
+        kind = meta.get("quantization", "none")
+        if kind != "none" and count:
+            # Only the compact codes are read into memory; float32 rows are paged in for re-ranking
+            codes = np.load(os.path.join(directory, "codes.npy"))
+            with np.load(os.path.join(directory, "quantizer.npz")) as arrays:
+                quantizer = load_quantizer(kind, dict(arrays))
+
+        self.dim, self._count, self._vectors = dim, count, vectors
+        self._meta = meta["fields"]
+        self._positions = {product_id: row for row, product_id in enumerate(self._meta["product_id"])}
+        self._publish(hnsw, quantizer, codes)
+        self._categories = None
+        self._snapshot = name
+        self._dirty = False
+        logger.info(f"Loaded snapshot {name} ({count} vectors, hnsw={hnsw is not None}, quantization={kind}) "
+                    f"in {time.perf_counter() - started:.2f}s")
+
+    def _maybe_refresh(self):
+        """Switches to a newer snapshot published by another process (checked every few seconds)."""
+        now = time.monotonic()
+        if now - self._last_refresh_check < self.refresh_interval:
+            return
+        self._last_refresh_check = now
+        with self._lock:
+            if self._dirty:
+                return
+            current = self._current_snapshot()
+            if current and current != self._snapshot:
+                self._load_snapshot(current)
@@ -0,0 +1,150 @@
+import json
+import logging
+import mmap
+import os
+import struct
+from typing import Dict, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SAFETENSORS_FILE = "model.safetensors"
+PYTORCH_FILE = "pytorch_model.bin"
+
+
+def read_dimension(model_dir: str) -> Optional[int]:
+    """Reads the embedding dimension from the model config without loading weights."""
+    for name, key in ((os.path.join("1_Pooling", "config.json"), "word_embedding_dimension"), ("config.json", "hidden_size")):
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                value = json.load(f).get(key)
+            if value:
+                return int(value)
+    return None
+
+
+def ensure_safetensors(model_dir: str) -> Optional[str]:
+    """
+    Returns the path of model.safetensors, converting pytorch_model.bin once if needed.
+    Returns None if neither file is present or the directory is read-only.
+    """
+    target = os.path.join(model_dir, SAFETENSORS_FILE)
+    if os.path.exists(target):
+        return target
+
+    source = os.path.join(model_dir, PYTORCH_FILE)
+    if not os.path.exists(source):
+        return None
+
+    try:
+        import torch
+        from safetensors.torch import save_file
+
+        logger.info(f"Converting {source} to safetensors for memory-mapped loading...")
+        state_dict = torch.load(source, map_location="cpu")
+        tmp_path = target + ".tmp"
+        save_file({k: v.contiguous() for k, v in state_dict.items()}, tmp_path, metadata={"format": "pt"})
+        os.replace(tmp_path, target)
+        return target
+    except Exception as e:
+        logger.warning(f"Could not convert weights to safetensors: {e}")
+        return None
+
+
+def load_mmap_state_dict(path: str) -> Dict[str, "torch.Tensor"]:
+    """
+    Maps a safetensors file and returns tensors that are views on the mapping.
+
+    The mapping is copy-on-write and inference never writes weights, so every
+    process loading the same file shares its pages through the OS page cache.
+    """
+    import torch
+
+    dtypes = {
+        "F32": torch.float32, "F16": torch.float16, "BF16": torch.bfloat16,
+        "I64": torch.int64, "I32": torch.int32, "I8": torch.int8, "U8": torch.uint8, "BOOL": torch.bool,
+    }
+
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = 8 + header_size
+    state_dict = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = dtypes[info["dtype"]]
+        start, end = info["data_offsets"]
+        if end == start:
+            state_dict[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        count = (end - start) // torch.tensor([], dtype=dtype).element_size()
+        state_dict[name] = torch.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + start).view(info["shape"])
+    return state_dict
+
+
+def assign_mapped_weights(model, weights: str):
+    """
+    Replaces the parameters of a HuggingFace model with tensors mapped from a safetensors file.
+
+    assign=True keeps the mapped tensors instead of copying them into the existing
+    parameters, which are freed.
+    """
+    state_dict = load_mmap_state_dict(weights)
+    prefix = model.base_model_prefix + "."
+    state_dict = {k[len(prefix):] if k.startswith(prefix) else k: v for k, v in state_dict.items()}
+
+    missing, unexpected = model.load_state_dict(state_dict, strict=False, assign=True)
+    missing = [k for k in missing if not k.endswith(("position_ids", "token_type_ids"))]
+    if missing:
+        raise RuntimeError(f"Weights missing from {weights}: {missing}")
+    if unexpected:
+        logger.warning(f"Ignoring unexpected weights in {weights}: {unexpected}")
+    model.eval()
+    return model
+
+
+def load_transformer_model(model_dir: str):
+    """
+    Builds the HuggingFace encoder with weights memory-mapped from safetensors.
+    Falls back to a regular from_pretrained load if no safetensors file is available.
+    """
+    from transformers import AutoConfig, AutoModel
+
+    weights = ensure_safetensors(model_dir)
+    if weights is None:
+        return AutoModel.from_pretrained(model_dir, local_files_only=True)
+
+    config = AutoConfig.from_pretrained(model_dir, local_files_only=True)
+    return assign_mapped_weights(AutoModel.from_config(config), weights)
+
+
+def load_sentence_transformer(model_dir: str, max_seq_length: int = 256):
+    """
+    Assembles a SentenceTransformer (Transformer + mean Pooling) from local files
+    without any network access, on the GPU if available.
+
+    The encoder's weights are then swapped for tensors memory-mapped from
+    model.safetensors, so every process loading the model shares one copy.
+    Uses only the public constructors of sentence-transformers (pinned in
+    requirements.txt).
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Transformer, Pooling
+
+    local = {"local_files_only": True}
+    transformer = Transformer(model_dir, max_seq_length=max_seq_length, model_args=local, tokenizer_args=local)
+    weights = ensure_safetensors(model_dir)
+    if weights is not None:
+        assign_mapped_weights(transformer.auto_model, weights)
+
+    # Create pooling layer (MEAN pooling is default for all-MiniLM-L6-v2)
+    pooling = Pooling(transformer.get_word_embedding_dimension(), pooling_mode_mean_tokens=True)
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    return SentenceTransformer(modules=[transformer, pooling], device=device)
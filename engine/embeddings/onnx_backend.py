@@ -0,0 +1,126 @@
+import logging
+import os
+from typing import List, Union
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class OnnxEmbeddingBackend:
+    """
+    CPU inference backend for the local sentence-transformer using ONNX Runtime.
+
+    The transformer is exported to ONNX once (optionally quantized to int8 with
+    dynamic quantization) and cached next to the model files. Mean pooling is
+    done in NumPy, so vectors match the PyTorch Transformer + Pooling path.
+    Exposes the subset of the SentenceTransformer API used by EmbeddingModel.
+    """
+
+    def __init__(self, model_dir: str, quantize: bool = False, max_seq_length: int = 256, onnx_dir: str = None):
+        """
+        Args:
+            model_dir (str): Directory holding the HuggingFace model files.
+            quantize (bool): Use the dynamically int8-quantized graph.
+            max_seq_length (int): Truncation length (matches the torch path).
+            onnx_dir (str): Where exported graphs are cached (defaults to <model_dir>/onnx).
+        """
+        from transformers import AutoTokenizer
+        import onnxruntime as ort
+
+        self.model_dir = model_dir
+        self.quantize = quantize
+        self.max_seq_length = max_seq_length
+        self.onnx_dir = onnx_dir or os.getenv("EMBEDDING_ONNX_DIR") or os.path.join(model_dir, "onnx")
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
+
+        model_path = self._ensure_exported()
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        num_threads = os.getenv("EMBEDDING_ONNX_THREADS")
+        if num_threads:
+            options.intra_op_num_threads = int(num_threads)
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self._dimension = self.session.get_outputs()[0].shape[-1]
+        logger.info(f"ONNX embedding backend ready: {model_path}")
+
+    def _ensure_exported(self) -> str:
+        """Exports (and quantizes) the model on first use; returns the graph to load."""
+        fp32_path = os.path.join(self.onnx_dir, "model.onnx")
+        int8_path = os.path.join(self.onnx_dir, "model_int8.onnx")
+
+        if not os.path.exists(fp32_path):
+            self._export(fp32_path)
+
+        if not self.quantize:
+            return fp32_path
+
+        if not os.path.exists(int8_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            logger.info(f"Quantizing ONNX model to int8: {int8_path}")
+            quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        return int8_path
+
+    def _export(self, path: str):
+        """Traces the HuggingFace transformer into an ONNX graph with dynamic batch/sequence axes."""
+        import torch
+        from transformers import AutoModel
+
+        logger.info(f"Exporting embedding model to ONNX: {path}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        model = AutoModel.from_pretrained(self.model_dir, local_files_only=True)
+        model.eval()
+
+        sample = self.tokenizer(["export sample"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+            )
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """
+        Encode text(s) into mean-pooled float32 embeddings.
+
+        Returns a 1-D vector for a single string, a 2-D matrix for a list.
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            encoded = self.tokenizer(
+                batch,
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            feed = {name: encoded[name].astype(np.int64) for name in self._input_names}
+            token_embeddings = self.session.run(None, feed)[0]
+
+            # Mean pooling over non-padding tokens
+            mask = encoded["attention_mask"].astype(np.float32)[:, :, None]
+            summed = (token_embeddings * mask).sum(axis=1)
+            counts = np.clip(mask.sum(axis=1), 1e-9, None)
+            outputs.append((summed / counts).astype(np.float32))
+
+        embeddings = np.concatenate(outputs) if outputs else np.zeros((0, self._dimension), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return int(self._dimension)
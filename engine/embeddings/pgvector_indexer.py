@@ -0,0 +1,338 @@
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+import numpy as np
+from sqlalchemy import text
+
+from engine.database import get_engine
+from engine.embeddings.projection import load_configured_projection
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Product columns returned with every hit, so callers need no second lookup
+PRODUCT_COLUMNS = "sku_id, product_name, category, manufacturer, description, specifications, datasheet_url, images, pricing"
+
+# Field names of the VectorIndexer interface -> products columns
+FIELD_COLUMNS = {
+    "product_id": "sku_id",
+    "sku": "sku_id",
+    "name": "product_name",
+    "category": "category",
+    "manufacturer": "manufacturer",
+    "embedding": "embedding",
+}
+
+
+MIN_PGVECTOR_VERSION = (0, 5)  # HNSW indexes
+ITERATIVE_SCAN_VERSION = (0, 8)
+
+
+def _parse_version(version: Optional[str]) -> tuple:
+    """'0.8.0' -> (0, 8); None (extension missing) -> ()."""
+    return tuple(int(n) for n in re.findall(r"\d+", version or "")[:2])
+
+
+def _vector_literal(vector: np.ndarray) -> str:
+    """pgvector text format: '[0.1,0.2,...]'."""
+    return "[" + ",".join(f"{x:.7g}" for x in vector.tolist()) + "]"
+
+
+class PgVectorIndexer:
+    """
+    Vector backend storing embeddings in the products table (pgvector).
+
+    Embeddings live in products.embedding (see the pgvector_embeddings
+    migration) and are searched through its HNSW index. One query returns the
+    nearest neighbours together with the full product row. Products are keyed
+    by sku_id, so product_id in hits and arguments is the SKU.
+
+    Needs pgvector >= 0.5 (HNSW). From 0.8 filtered searches use
+    hnsw.iterative_scan; older versions fall back to a deeper ef_search and may
+    return fewer than top_k hits for very selective filters.
+    """
+
+    # Vectors are removed together with their product rows; bulk jobs need not prune them
+    embeds_in_catalog = True
+
+    def __init__(self, collection_name: str = "products"):
+        """
+        Args:
+            collection_name (str): Kept for interface compatibility; vectors always live in `products`.
+        """
+        self.collection_name = collection_name
+        self.engine = get_engine()
+        self.ef_search = int(os.getenv("PGVECTOR_EF_SEARCH", "64"))
+        # HNSW filters after the scan, so filtered searches need a deeper candidate list
+        self.filtered_ef_search = int(os.getenv("PGVECTOR_FILTERED_EF_SEARCH", "400"))
+        # Optional dimension reduction applied to every vector stored or searched
+        self.projection = load_configured_projection()
+        self.dim = None
+        self._categories = None
+        self._version = None
+
+    def create_collection(self, dim: int = 384):
+        """
+        Checks that the embedding column exists and matches the model dimension.
+
+        Args:
+            dim (int): Dimension of the embedding vectors (default 384 for all-MiniLM-L6-v2).
+        """
+        if self.projection is not None:
+            if dim != self.projection.in_dim:
+                raise ValueError(f"Projection expects {self.projection.in_dim}-d embeddings, model produces {dim}.")
+            dim = self.projection.out_dim
+
+        version = self.extension_version()
+        if version < MIN_PGVECTOR_VERSION:
+            found = ".".join(map(str, version)) if version else "not installed"
+            raise RuntimeError(f"pgvector >= 0.5 is required for HNSW search (found: {found}).")
+        if version < ITERATIVE_SCAN_VERSION:
+            logger.warning("pgvector < 0.8: filtered searches cannot scan iteratively and may return fewer than top_k hits.")
+
+        with self.engine.connect() as conn:
+            # For vector columns the type modifier is the dimension
+            column_dim = conn.execute(text("""
+                SELECT atttypmod FROM pg_attribute
+                WHERE attrelid = 'products'::regclass AND attname = 'embedding' AND NOT attisdropped
+            """)).scalar()
+        if column_dim is None:
+            raise RuntimeError("products.embedding does not exist. Run `alembic upgrade pgvector@head`.")
+        if column_dim != dim:
+            raise ValueError(f"products.embedding is vector({column_dim}) but embeddings have {dim} dims. "
+                             f"Re-run the migration with PGVECTOR_DIM={dim}.")
+        self.dim = dim
+        logger.info(f"Using pgvector column products.embedding (dim={dim}).")
+
+    @property
+    def keyed_by_product_id(self) -> bool:
+        return True
+
+    def has_field(self, name: str) -> bool:
+        return name in FIELD_COLUMNS
+
+    def flush(self):
+        """Writes are committed per call; nothing is buffered."""
+
+    def insert_products(self, products: List[Dict[str, Any]], embeddings: Union[np.ndarray, List[List[float]]], flush: bool = True):
+        """Same as upsert_products: each product row holds exactly one embedding."""
+        self.upsert_products(products, embeddings, flush=flush)
+
+    def upsert_products(self, products: List[Dict[str, Any]], embeddings: Union[np.ndarray, List[List[float]]], flush: bool = True):
+        """
+        Set the embedding of existing product rows (matched on sku).
+
+        updated_at is left alone: it fingerprints the catalog content (get_catalog_version),
+        and re-embedding must not invalidate the caches keyed on it.
+
+        Args:
+            products (List[Dict]): Product dictionaries (must contain sku).
+            embeddings (np.ndarray | List[List[float]]): Corresponding (n, dim) float32 matrix or list of vectors.
+            flush (bool): Unused; every call is committed.
+        """
+        if len(products) != len(embeddings):
+            raise ValueError("Number of products must match number of embeddings.")
+        if not products:
+            return
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if self.projection is not None:
+            vectors = self.projection.apply(vectors)
+
+        # Within one call the last row for a sku wins
+        latest = {p["sku"]: i for i, p in enumerate(products)}
+        skus = list(latest)
+        literals = [_vector_literal(vectors[i]) for i in latest.values()]
+
+        with self.engine.begin() as conn:
+            res = conn.execute(text("""
+                UPDATE products AS p
+                SET embedding = CAST(v.embedding AS vector)
+                FROM unnest(CAST(:skus AS text[]), CAST(:embeddings AS text[])) AS v(sku_id, embedding)
+                WHERE p.sku_id = v.sku_id
+            """), {"skus": skus, "embeddings": literals})
+
+        if res.rowcount < len(skus):
+            logger.warning(f"{len(skus) - res.rowcount} of {len(skus)} SKUs have no product row; their embeddings were dropped.")
+        logger.info(f"Upserted {res.rowcount} vectors (pgvector).")
+
+    def delete_products(self, product_ids: List[str], flush: bool = True) -> int:
+        """
+        Clear the embeddings of the given SKUs (the product rows are kept).
+
+        Returns:
+            int: Number of embeddings removed.
+        """
+        if not product_ids:
+            return 0
+        with self.engine.begin() as conn:
+            res = conn.execute(text("""
+                UPDATE products SET embedding = NULL
+                WHERE sku_id = ANY(:skus) AND embedding IS NOT NULL
+            """), {"skus": list(product_ids)})
+        return res.rowcount
+
+    def iter_rows(self, output_fields: List[str], batch_size: int = 1000):
+        """Yields every embedded product in batches (keyset pagination on sku_id)."""
+        columns = ", ".join(f"{FIELD_COLUMNS[f]} AS {f}" for f in output_fields)
+        last = ""
+        with self.engine.connect() as conn:
+            while True:
+                rows = conn.execute(text(f"""
+                    SELECT sku_id AS _key, {columns} FROM products
+                    WHERE embedding IS NOT NULL AND sku_id > :last
+                    ORDER BY sku_id LIMIT :limit
+                """), {"last": last, "limit": batch_size}).mappings().all()
+                if not rows:
+                    break
+                last = rows[-1]["_key"]
+                batch = []
+                for row in rows:
+                    item = {f: row[f] for f in output_fields}
+                    if "embedding" in item:
+                        item["embedding"] = json.loads(item["embedding"])
+                    batch.append(item)
+                yield batch
+
+    def list_product_ids(self) -> Set[str]:
+        """Returns the SKUs that have an embedding."""
+        with self.engine.connect() as conn:
+            return set(conn.execute(text("SELECT sku_id FROM products WHERE embedding IS NOT NULL")).scalars())
+
+    def list_categories(self, refresh: bool = False) -> List[str]:
+        """Distinct categories of embedded products (cached)."""
+        if self._categories is None or refresh:
+            with self.engine.connect() as conn:
+                self._categories = list(conn.execute(text("""
+                    SELECT DISTINCT category FROM products
+                    WHERE embedding IS NOT NULL AND category IS NOT NULL ORDER BY category
+                """)).scalars())
+        return self._categories
+
+    def extension_version(self) -> tuple:
+        """Installed pgvector version as (major, minor), () if the extension is missing (cached)."""
+        if self._version is None:
+            with self.engine.connect() as conn:
+                version = conn.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar()
+            self._version = _parse_version(version)
+        return self._version
+
+    def supports_iterative_scan(self) -> bool:
+        """Whether the installed pgvector (0.8+) can keep scanning HNSW until filtered queries fill top_k."""
+        return self.extension_version() >= ITERATIVE_SCAN_VERSION
+
+    def build_filter(self, manufacturer: Union[str, List[str]] = None, category: Union[str, List[str]] = None,
+                     sku: Iterable[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        SQL condition restricting a search to manufacturers, categories and/or SKUs.
+
+        Manufacturers are matched as whole words, case-insensitively ("SICK" matches "SICK AG").
+
+        Returns:
+            Dict: {"sql": condition, "params": bind parameters}, or None when there is nothing to filter on.
+        """
+        clauses, params = [], {}
+        if manufacturer:
+            values = [manufacturer] if isinstance(manufacturer, str) else list(manufacturer)
+            clauses.append("manufacturer ~* ANY(:manufacturer_patterns)")
+            params["manufacturer_patterns"] = [rf"\m{re.escape(m)}\M" for m in values]
+        if category:
+            clauses.append("category = ANY(:categories)")
+            params["categories"] = [category] if isinstance(category, str) else list(category)
+        if sku is not None:
+            clauses.append("sku_id = ANY(:skus)")
+            params["skus"] = list(sku)
+        if not clauses:
+            return None
+        return {"sql": " AND ".join(clauses), "params": params}
+
+    def search(self, query_embedding: Union[np.ndarray, List[float]], top_k: int = 5, expr: Dict[str, Any] = None,
+               with_vectors: bool = False) -> List[Dict]:
+        """
+        Search for similar products using a query embedding.
+
+        Args:
+            expr (Dict): Optional filter from build_filter.
+            with_vectors (bool): Add each hit's stored embedding as 'vector'.
+        """
+        return self.search_many([query_embedding], top_k=top_k, expr=expr, with_vectors=with_vectors)[0]
+
+    def search_many(self, query_embeddings: Union[np.ndarray, List[List[float]]], top_k: int = 5, max_nq: int = 256,
+                    search_params: Dict[str, Any] = None, project: bool = True, expr: Dict[str, Any] = None,
+                    with_vectors: bool = False) -> List[List[Dict]]:
+        """
+        Nearest products for many queries in one round trip per max_nq queries.
+
+        Args:
+            query_embeddings (np.ndarray | List[List[float]]): (n, dim) query vectors.
+            top_k (int): Results per query.
+            max_nq (int): Queries per SQL statement.
+            search_params (Dict): {"ef": ...} overrides PGVECTOR_EF_SEARCH (PGVECTOR_FILTERED_EF_SEARCH with expr).
+            project (bool): Apply the configured projection.
+            expr (Dict): Optional filter from build_filter.
+            with_vectors (bool): Add each hit's stored embedding as 'vector'.
+
+        Returns:
+            List[List[Dict]]: Hits per query (with the full product row), in input order.
+        """
+        if len(query_embeddings) == 0:
+            return []
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if self.projection is not None and project:
+            queries = self.projection.apply(queries)
+
+        default_ef = self.filtered_ef_search if expr else self.ef_search
+        # hnsw.ef_search is capped at 1000 by pgvector
+        ef = min(1000, max(top_k, int((search_params or {}).get("ef", default_ef))))
+        condition = f"AND {expr['sql']}" if expr else ""
+        vector_column = ", CAST(embedding AS text) AS embedding_literal" if with_vectors else ""
+        # Each query is an ordered index scan on the HNSW index, joined laterally
+        statement = text(f"""
+            SELECT q.ord, p.*
+            FROM unnest(CAST(:queries AS text[])) WITH ORDINALITY AS q(vec, ord)
+            CROSS JOIN LATERAL (
+                SELECT {PRODUCT_COLUMNS}{vector_column}, embedding <=> CAST(q.vec AS vector) AS distance
+                FROM products
+                WHERE embedding IS NOT NULL {condition}
+                ORDER BY embedding <=> CAST(q.vec AS vector)
+                LIMIT :top_k
+            ) AS p
+            ORDER BY q.ord, p.distance
+        """)
+
+        all_hits = []
+        with self.engine.begin() as conn:
+            conn.execute(text(f"SET LOCAL hnsw.ef_search = {ef}"))
+            if expr and self.supports_iterative_scan():
+                # Rows removed by the filter no longer shrink the result below top_k
+                conn.execute(text("SET LOCAL hnsw.iterative_scan = strict_order"))
+            for start in range(0, len(queries), max_nq):
+                chunk = queries[start:start + max_nq]
+                params = {"queries": [_vector_literal(q) for q in chunk], "top_k": top_k}
+                if expr:
+                    params.update(expr["params"])
+                hits = [[] for _ in chunk]
+                for row in conn.execute(statement, params).mappings():
+                    hits[row["ord"] - 1].append({
+                        "milvus_id": row["sku_id"],  # Same keys as VectorIndexer hits
+                        "score": 1.0 - float(row["distance"]),
+                        "product_id": row["sku_id"],
+                        "sku": row["sku_id"],
+                        "name": row["product_name"],
+                        "category": row["category"],
+                        "manufacturer": row["manufacturer"],
+                        "description": row["description"],
+                        "specifications": row["specifications"],
+                        "datasheet_url": row["datasheet_url"],
+                        "images": row["images"],
+                        "pricing": row["pricing"],
+                    })
+                    if with_vectors:
+                        hits[row["ord"] - 1][-1]["vector"] = np.array(row["embedding_literal"].strip("[]").split(","), dtype=np.float32)
+                all_hits.extend(hits)
+        return all_hits
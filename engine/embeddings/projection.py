@@ -0,0 +1,117 @@
+import logging
+import os
+from typing import Dict, List, Union
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+class PCAProjection:
+    """
+    Linear dimension reduction for the product index, fitted on catalog vectors.
+
+    Vectors are L2-normalized, projected onto the top principal axes of the
+    (uncentered) catalog and normalized again. Without centering the full-rank
+    projection is a pure rotation, so cosine rankings are preserved as closely
+    as the kept dimensions allow. Stored as a small .npz artifact.
+    """
+
+    def __init__(self, components: np.ndarray):
+        """
+        Args:
+            components (np.ndarray): (out_dim, in_dim) principal axes.
+        """
+        self.components = np.ascontiguousarray(components, dtype=np.float32)
+
+    @property
+    def in_dim(self) -> int:
+        return self.components.shape[1]
+
+    @property
+    def out_dim(self) -> int:
+        return self.components.shape[0]
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, dim: int) -> "PCAProjection":
+        """Fits the projection to a (n, in_dim) sample of catalog embeddings."""
+        data = _normalize(np.asarray(vectors, dtype=np.float32))
+        if dim > data.shape[1]:
+            raise ValueError(f"Target dimension {dim} exceeds embedding dimension {data.shape[1]}.")
+        # Rows of vt are the principal axes, ordered by explained energy
+        _, singular_values, vt = np.linalg.svd(data, full_matrices=False)
+        explained = (singular_values[:dim] ** 2).sum() / (singular_values ** 2).sum()
+        logger.info(f"PCA {data.shape[1]} -> {dim} keeps {explained:.1%} of the energy ({len(data)} vectors).")
+        return cls(vt[:dim])
+
+    def apply(self, vectors: Union[np.ndarray, List[float], List[List[float]]]) -> np.ndarray:
+        """Projects one vector or a matrix of vectors to unit-length float32 of out_dim."""
+        data = _normalize(np.asarray(vectors, dtype=np.float32))
+        return np.ascontiguousarray(_normalize(data @ self.components.T), dtype=np.float32)
+
+    def truncate(self, dim: int) -> "PCAProjection":
+        """Returns the projection onto the first `dim` components."""
+        return PCAProjection(self.components[:dim])
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, components=self.components)
+        logger.info(f"Saved projection {self.in_dim} -> {self.out_dim} to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "PCAProjection":
+        with np.load(path) as data:
+            return cls(data["components"])
+
+
+def load_configured_projection():
+    """Returns the projection named by EMBEDDING_PROJECTION_PATH, or None."""
+    path = os.getenv("EMBEDDING_PROJECTION_PATH")
+    if not path:
+        return None
+    projection = PCAProjection.load(path)
+    logger.info(f"Using vector projection {projection.in_dim} -> {projection.out_dim} from {path}")
+    return projection
+
+
+def recall_report(vectors: np.ndarray, queries: np.ndarray, dims: List[int], k: int = 10, exclude_self: bool = False) -> Dict[int, float]:
+    """
+    Recall@k of exact search on projected vectors against full-dimension exact search.
+
+    Args:
+        vectors (np.ndarray): (n, in_dim) catalog embeddings.
+        queries (np.ndarray): (q, in_dim) query embeddings.
+        dims (List[int]): Candidate target dimensions.
+        k (int): Result depth compared.
+        exclude_self (bool): Queries are rows of `vectors`; ignore the identical row.
+
+    Returns:
+        Dict[int, float]: Mean recall@k per dimension.
+    """
+    full = _normalize(np.asarray(vectors, dtype=np.float32))
+    q_full = _normalize(np.asarray(queries, dtype=np.float32))
+    depth = k + 1 if exclude_self else k
+
+    def top_k(scores):
+        idx = np.argpartition(-scores, depth - 1, axis=1)[:, :depth]
+        order = np.take_along_axis(scores, idx, axis=1).argsort(axis=1)[:, ::-1]
+        idx = np.take_along_axis(idx, order, axis=1)
+        return idx[:, 1:] if exclude_self else idx
+
+    truth = top_k(q_full @ full.T)
+    projection = PCAProjection.fit(full, max(dims))
+
+    report = {}
+    for dim in sorted(dims):
+        reduced = projection.truncate(dim)
+        found = top_k(reduced.apply(q_full) @ reduced.apply(full).T)
+        hits = [len(set(t) & set(f)) for t, f in zip(truth, found)]
+        report[dim] = float(np.mean(hits)) / k
+    return report
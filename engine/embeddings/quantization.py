@@ -0,0 +1,197 @@
+import logging
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_KINDS = ("none", "int8", "binary")
+
+# Rows scored per block, bounds the temporary (queries x rows) buffers
+_BLOCK_ROWS = 65536
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+def configured_quantization() -> str:
+    """VECTOR_QUANTIZATION: none | int8 | binary."""
+    kind = os.getenv("VECTOR_QUANTIZATION", "none").lower()
+    if kind not in QUANTIZATION_KINDS:
+        raise ValueError(f"Unknown VECTOR_QUANTIZATION '{kind}', expected one of {QUANTIZATION_KINDS}.")
+    return kind
+
+
+def rerank_candidates() -> int:
+    """Candidates taken from the compact codes and re-scored in float32 (VECTOR_RERANK_CANDIDATES)."""
+    return int(os.getenv("VECTOR_RERANK_CANDIDATES", "200"))
+
+
+class Int8Quantizer:
+    """
+    Symmetric per-dimension int8 codes (1 byte per dimension).
+
+    Scales are fitted to the largest magnitude of each dimension, so unit-length
+    embeddings use the full int8 range. Scores approximate the float dot product.
+    """
+
+    kind = "int8"
+
+    def __init__(self, scale: np.ndarray):
+        self.scale = np.asarray(scale, dtype=np.float32)
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray) -> "Int8Quantizer":
+        return cls(np.maximum(np.abs(vectors).max(axis=0), 1e-8) / 127.0)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(vectors / self.scale), -127, 127).astype(np.int8)
+
+    def score(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Approximate dot products, (n_queries, n_codes)."""
+        scaled = queries * self.scale
+        return np.concatenate([
+            scaled @ codes[start:start + _BLOCK_ROWS].astype(np.float32).T
+            for start in range(0, len(codes), _BLOCK_ROWS)
+        ], axis=1)
+
+    def bytes_per_vector(self, dim: int) -> int:
+        return dim
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {"scale": self.scale}
+
+
+class BinaryQuantizer:
+    """
+    Sign-bit codes (1 bit per dimension), compared by Hamming distance.
+
+    For unit vectors the Hamming distance between sign codes tracks the angle,
+    so 1 - 2 * hamming / dim serves as an approximate cosine.
+    """
+
+    kind = "binary"
+
+    def __init__(self, dim: int):
+        self.dim = int(dim)
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray) -> "BinaryQuantizer":
+        return cls(vectors.shape[1])
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.packbits(vectors > 0, axis=1)
+
+    def score(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        query_bits = self.encode(queries)
+        # XOR buffer is (queries x block x bytes); keep it around 16 MB
+        block = max(256, 2**24 // max(1, query_bits.size))
+        distances = np.concatenate([
+            _POPCOUNT[np.bitwise_xor(query_bits[:, None, :], codes[None, start:start + block, :])].sum(axis=2, dtype=np.int32)
+            for start in range(0, len(codes), block)
+        ], axis=1)
+        return 1.0 - 2.0 * distances.astype(np.float32) / self.dim
+
+    def bytes_per_vector(self, dim: int) -> int:
+        return (dim + 7) // 8
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {"dim": np.array(self.dim)}
+
+
+def make_quantizer(kind: str, vectors: np.ndarray):
+    """Fits a quantizer of the given kind to (n, dim) unit vectors."""
+    if kind == "int8":
+        return Int8Quantizer.fit(vectors)
+    if kind == "binary":
+        return BinaryQuantizer.fit(vectors)
+    raise ValueError(f"Unknown quantization '{kind}'.")
+
+
+def load_quantizer(kind: str, arrays: Dict[str, np.ndarray]):
+    if kind == "int8":
+        return Int8Quantizer(arrays["scale"])
+    if kind == "binary":
+        return BinaryQuantizer(int(arrays["dim"]))
+    raise ValueError(f"Unknown quantization '{kind}'.")
+
+
+def approximate_top_k(quantizer, codes: np.ndarray, queries: np.ndarray, candidates: int) -> np.ndarray:
+    """Row indices of the best `candidates` codes per query (unordered)."""
+    candidates = min(candidates, len(codes))
+    scores = quantizer.score(codes, queries)
+    return np.argpartition(-scores, candidates - 1, axis=1)[:, :candidates]
+
+
+def rerank(vectors: np.ndarray, queries: np.ndarray, candidate_rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact cosine re-ranking of candidate rows against the float32 vectors.
+    Only the candidate rows are read, so `vectors` can be a memory map.
+
+    Returns:
+        Tuple: (rows, scores), each (n_queries, k), best first.
+    """
+    k = min(k, candidate_rows.shape[1])
+    rows_out, scores_out = [], []
+    for query, rows in zip(queries, candidate_rows):
+        order = np.sort(rows)  # Sequential reads from the mapping
+        scores = np.asarray(vectors[order], dtype=np.float32) @ query
+        best = np.argsort(-scores)[:k]
+        rows_out.append(order[best])
+        scores_out.append(scores[best])
+    return np.stack(rows_out), np.stack(scores_out)
+
+
+def quantization_report(vectors: np.ndarray, queries: np.ndarray, k: int = 10, candidates: List[int] = (50, 100, 200, 400),
+                        exclude_self: bool = False) -> List[Dict]:
+    """
+    Recall@k and memory of quantized search (with and without re-ranking) against exact float32 search.
+
+    Args:
+        vectors (np.ndarray): (n, dim) catalog embeddings.
+        queries (np.ndarray): (q, dim) query embeddings.
+        k (int): Result depth compared.
+        candidates (List[int]): Re-ranking depths to evaluate.
+        exclude_self (bool): Queries are rows of `vectors`; ignore the identical row.
+
+    Returns:
+        List[Dict]: One row per (method, candidates) with recall and memory figures.
+    """
+    base = _normalize(np.asarray(vectors, dtype=np.float32))
+    q = _normalize(np.asarray(queries, dtype=np.float32))
+    n, dim = base.shape
+    depth = k + 1 if exclude_self else k
+
+    def ordered_top(scores, count):
+        idx = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+        order = np.argsort(-np.take_along_axis(scores, idx, axis=1), axis=1)
+        return np.take_along_axis(idx, order, axis=1)
+
+    def recall(found):
+        if exclude_self:
+            found = found[:, 1:] if found.shape[1] > k else found
+        return float(np.mean([len(set(t) & set(f[:k])) for t, f in zip(truth, found)])) / k
+
+    truth = ordered_top(q @ base.T, depth)
+    truth = truth[:, 1:] if exclude_self else truth
+
+    report = [{"method": "float32", "candidates": None, "recall": 1.0,
+               "bytes_per_vector": 4 * dim, "index_mb": round(n * 4 * dim / 2**20, 2)}]
+    for kind in ("int8", "binary"):
+        quantizer = make_quantizer(kind, base)
+        codes = quantizer.encode(base)
+        size = quantizer.bytes_per_vector(dim)
+        memory = {"bytes_per_vector": size, "index_mb": round(n * size / 2**20, 2)}
+        report.append({"method": kind, "candidates": None,
+                       "recall": recall(ordered_top(quantizer.score(codes, q), depth)), **memory})
+        for c in candidates:
+            if c < depth or c > n:
+                continue
+            rows, _ = rerank(base, q, approximate_top_k(quantizer, codes, q, c), depth)
+            report.append({"method": f"{kind}+rerank", "candidates": c, "recall": recall(rows), **memory})
+    return report
@@ -0,0 +1,99 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+from prometheus_client import Counter
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CACHE_HITS = Counter("query_embedding_cache_hits_total", "Query embeddings served from cache")
+CACHE_MISSES = Counter("query_embedding_cache_misses_total", "Query embeddings that required a forward pass")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """Case-folds and collapses whitespace so trivial variants share a cache entry."""
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU cache of query vectors with a time-to-live.
+
+    Keys are normalized query texts (after translation). The cache is bound to
+    the identity of the embedding model and is cleared when that changes.
+    """
+
+    def __init__(self, max_size: int = None, ttl_seconds: float = None):
+        """
+        Args:
+            max_size (int): Maximum number of cached queries.
+            ttl_seconds (float): Age after which an entry is recomputed.
+        """
+        self.max_size = max_size if max_size is not None else int(os.getenv("EMBEDDING_QUERY_CACHE_SIZE", "1024"))
+        self.ttl = ttl_seconds if ttl_seconds is not None else float(os.getenv("EMBEDDING_QUERY_CACHE_TTL", "3600"))
+        self.model_id = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bind_model(self, model_id: str):
+        """Drops every entry if the vectors were produced by a different model."""
+        if model_id != self.model_id:
+            if self._entries:
+                logger.info(f"Embedding model changed ({self.model_id} -> {model_id}), clearing query cache.")
+            self._entries.clear()
+            self.model_id = model_id
+
+    def get(self, query: str, model_id: str) -> Optional[np.ndarray]:
+        """Returns the cached vector for a query, or None on a miss."""
+        key = normalize_query(query)
+        with self._lock:
+            self._bind_model(model_id)
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                CACHE_HITS.inc()
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            CACHE_MISSES.inc()
+            return None
+
+    def put(self, query: str, model_id: str, vector: np.ndarray):
+        """Stores a query vector, evicting the least recently used entries."""
+        if self.max_size <= 0:
+            return
+        key = normalize_query(query)
+        with self._lock:
+            self._bind_model(model_id)
+            self._entries[key] = (vector, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Returns size and hit-rate counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,72 @@
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Brands the assistant sells (see SYSTEM_PROMPT); extend via KNOWN_MANUFACTURERS
+DEFAULT_MANUFACTURERS = "SICK,ABB,Siemens"
+
+
+def known_manufacturers() -> List[str]:
+    return [m.strip() for m in os.getenv("KNOWN_MANUFACTURERS", DEFAULT_MANUFACTURERS).split(",") if m.strip()]
+
+
+def _tokens(text: str) -> List[str]:
+    # Crude singularization so "sensor" matches the "Sensors" category
+    return [t[:-1] if len(t) > 3 and t.endswith("s") else t for t in re.findall(r"[a-z0-9]+", text.lower())]
+
+
+def normalize_manufacturer(value: Optional[str]) -> str:
+    """
+    Canonical manufacturer name stored in the index ("SICK AG" -> "SICK").
+    Unknown manufacturers are kept as given; missing ones become "".
+    """
+    if not value:
+        return ""
+    tokens = set(_tokens(value))
+    for brand in known_manufacturers():
+        if set(_tokens(brand)) <= tokens:
+            return brand
+    return value.strip()
+
+
+def extract_manufacturers(query: str) -> List[str]:
+    """Known brands mentioned in the query."""
+    tokens = set(_tokens(query))
+    return [brand for brand in known_manufacturers() if set(_tokens(brand)) <= tokens]
+
+
+def extract_categories(query: str, categories: Iterable[str]) -> List[str]:
+    """
+    Catalog categories named in the query.
+
+    A category matches when all of its words appear in the query. Only the most
+    specific matches are kept: "fiber optic sensor" yields "Fiber Optic Sensors"
+    and not also "Sensors".
+    """
+    tokens = set(_tokens(query))
+    matches = {}
+    for category in categories:
+        category_tokens = frozenset(_tokens(category))
+        if category_tokens and category_tokens <= tokens:
+            matches[category] = category_tokens
+    return [
+        category for category, category_tokens in matches.items()
+        if not any(category_tokens < other for other in matches.values())
+    ]
+
+
+def extract_query_hints(query: str, categories: Iterable[str] = ()) -> Dict[str, List[str]]:
+    """
+    Brand and category hints used to narrow the vector search.
+
+    Args:
+        query (str): English search text.
+        categories (Iterable[str]): Categories present in the index.
+
+    Returns:
+        Dict: {"manufacturer": [...], "category": [...]} (empty lists when nothing was recognized).
+    """
+    return {
+        "manufacturer": extract_manufacturers(query),
+        "category": extract_categories(query, categories),
+    }
@@ -0,0 +1,160 @@
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional
+
+from engine.embeddings.lexical_index import tokenize, flatten_specifications
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RERANKER_KINDS = ("none", "lexical", "cross-encoder")
+
+
+def hit_text(hit: Dict) -> str:
+    """The product text a re-ranker compares with the query."""
+    parts = [hit.get("name"), hit.get("sku"), hit.get("manufacturer"), hit.get("category"), hit.get("description")]
+    specs = flatten_specifications(hit.get("specifications"))
+    return " ".join(str(p) for p in parts if p) + (f" {specs}" if specs else "")
+
+
+class LexicalOverlapScorer:
+    """
+    Share of the query's tokens found in the product text, in [0, 1].
+
+    Costs microseconds per hit and catches part numbers, units and spec values
+    that embeddings blur ("24 V", "4 mm", "IP67").
+    """
+
+    def score(self, query: str, hits: List[Dict], deadline: float = None) -> Optional[List[float]]:
+        query_tokens = set(tokenize(query))
+        if not query_tokens:
+            return [0.0] * len(hits)
+        scores = []
+        for hit in hits:
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+            scores.append(len(query_tokens & set(tokenize(hit_text(hit)))) / len(query_tokens))
+        return scores
+
+
+class CrossEncoderScorer:
+    """
+    Small local cross-encoder (e.g. ms-marco-MiniLM-L-6-v2) scoring query/product pairs.
+
+    The model is loaded from engine/model_data/<model_name> like the embedding
+    model. Pairs are scored in batches and the deadline is checked between
+    batches; logits are mapped to [0, 1] with a sigmoid.
+    """
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", batch_size: int = 16):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.local_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "model_data", model_name))
+        self.model = None
+        self._load_lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        if self.model is not None:
+            return
+        with self._load_lock:
+            if self.model is None:
+                from sentence_transformers import CrossEncoder
+
+                started = time.perf_counter()
+                source = self.local_path if os.path.isdir(self.local_path) else self.model_name
+                self.model = CrossEncoder(source, max_length=256)
+                logger.info(f"Cross-encoder loaded from {source} in {time.perf_counter() - started:.2f}s.")
+
+    def warmup(self):
+        self._ensure_loaded()
+        self.model.predict([("warm-up query", "SICK distance sensor")])
+
+    def score(self, query: str, hits: List[Dict], deadline: float = None) -> Optional[List[float]]:
+        self._ensure_loaded()
+        scores = []
+        for start in range(0, len(hits), self.batch_size):
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+            pairs = [(query, hit_text(hit)) for hit in hits[start:start + self.batch_size]]
+            scores.extend(1.0 / (1.0 + math.exp(-float(logit))) for logit in self.model.predict(pairs))
+        return scores
+
+
+class Reranker:
+    """
+    Re-scores an over-fetched candidate list within a fixed time budget.
+
+    Scoring runs on a worker thread; if it has not finished when the budget
+    runs out, the candidates are returned in their original (vector) order, so
+    a slow model never adds more than the budget to a request. Timed-out jobs
+    still waiting for a worker are cancelled, so a backlog never builds up.
+    """
+
+    def __init__(self, scorer, candidates: int = None, budget_ms: float = None, weight: float = None):
+        """
+        Args:
+            scorer: LexicalOverlapScorer or CrossEncoderScorer.
+            candidates (int): Hits fetched for re-ranking (RERANK_CANDIDATES).
+            budget_ms (float): Time allowed for scoring (RERANK_BUDGET_MS).
+            weight (float): Share of the re-ranker score in the final order, the rest
+                            is the retrieval score (RERANK_WEIGHT).
+        """
+        self.scorer = scorer
+        self.candidates = candidates if candidates is not None else int(os.getenv("RERANK_CANDIDATES", "50"))
+        self.budget = (budget_ms if budget_ms is not None else float(os.getenv("RERANK_BUDGET_MS", "150"))) / 1000.0
+        self.weight = weight if weight is not None else float(os.getenv("RERANK_WEIGHT", "0.7"))
+        self.timeouts = 0
+        self._executor = ThreadPoolExecutor(max_workers=int(os.getenv("RERANK_WORKERS", "2")),
+                                            thread_name_prefix="reranker")
+
+    def rerank(self, query: str, hits: List[Dict], k: int) -> List[Dict]:
+        """
+        Best k hits by blended score; hits[:k] unchanged if the budget is exceeded
+        or the scorer fails. Re-ranked hits carry 'rerank_score'.
+        """
+        if len(hits) <= 1:
+            return hits[:k]
+        started = time.monotonic()
+        deadline = started + self.budget
+        future = self._executor.submit(self.scorer.score, query, hits, deadline)
+        try:
+            scores = future.result(timeout=self.budget)
+        except FutureTimeout:
+            future.cancel()  # Only succeeds if no worker has picked it up yet
+            scores = None
+        except Exception as e:
+            logger.warning(f"Re-ranking failed, keeping retrieval order: {e}")
+            return hits[:k]
+        if scores is None:
+            self.timeouts += 1
+            logger.warning(f"Re-ranking {len(hits)} hits exceeded {self.budget * 1000:.0f}ms, keeping retrieval order.")
+            return hits[:k]
+
+        ranked = sorted(
+            ({**hit, "rerank_score": s} for hit, s in zip(hits, scores)),
+            key=lambda hit: self.weight * hit["rerank_score"] + (1 - self.weight) * hit.get("score", 0.0),
+            reverse=True,
+        )
+        logger.info(f"Re-ranked {len(hits)} hits in {(time.monotonic() - started) * 1000:.1f}ms.")
+        return ranked[:k]
+
+    def warmup(self):
+        if hasattr(self.scorer, "warmup"):
+            self.scorer.warmup()
+
+
+def create_reranker() -> Optional[Reranker]:
+    """Reranker selected by RERANKER (none | lexical | cross-encoder), or None."""
+    kind = os.getenv("RERANKER", "none").lower()
+    if kind not in RERANKER_KINDS:
+        raise ValueError(f"Unknown RERANKER '{kind}', expected one of {RERANKER_KINDS}.")
+    if kind == "lexical":
+        return Reranker(LexicalOverlapScorer())
+    if kind == "cross-encoder":
+        return Reranker(CrossEncoderScorer(os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")))
+    return None
@@ -1,32 +1,88 @@
 import logging
-from typing import List, Dict
+import os
+from typing import List, Dict, Optional, Set, Union
+import numpy as np
 from engine.embeddings.embedding_model import EmbeddingModel
-from engine.embeddings.vector_indexer import VectorIndexer
+from engine.embeddings.backends import create_vector_indexer
+from engine.embeddings.batching import BatchingEmbedder
+from engine.embeddings.query_cache import QueryEmbeddingCache
+from engine.embeddings.embedding_store import EmbeddingStore
+from engine.embeddings.query_hints import extract_query_hints
+from engine.embeddings.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from engine.embeddings.reranker import create_reranker
+from engine.embeddings.diversity import diversify
+from engine.embeddings.spec_filters import AttributeStore, parse_spec_constraints, describe_constraints
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _as_list(value: Union[str, List[str], None]) -> List[str]:
+    if not value:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
 class SearchEngine:
     """
     High-level interface for semantic product search.
-    Combines EmbeddingModel and VectorIndexer.
+    Combines EmbeddingModel and a vector backend (VectorIndexer or LocalVectorIndexer).
     """
     
     def __init__(self):
         self.embedder = EmbeddingModel()
-        self.indexer = VectorIndexer()
+        self.indexer = create_vector_indexer()
+        # Query embeddings from concurrent requests share forward passes
+        self.query_embedder = None
+        if os.getenv("EMBEDDING_BATCHING", "true").lower() in ("1", "true", "yes"):
+            self.query_embedder = BatchingEmbedder(self.embedder)
+        # Document embedding for indexing (may be replaced by an EmbeddingWorkerPool)
+        self.bulk_embedder = self.embedder
+        # Optional BufferedVectorWriter used instead of inserting (and flushing) per batch
+        self.writer = None
+        # Repeated phrasings skip the forward pass entirely
+        self.query_cache = QueryEmbeddingCache()
         # Ensure collection exists and is ready
         dim = self.embedder.get_dimension()
         self.indexer.create_collection(dim=dim)
+        # Optional on-disk cache so re-indexing only embeds new or changed products
+        self.embedding_store = None
+        store_path = os.getenv("EMBEDDING_STORE_PATH")
+        if store_path:
+            self.embedding_store = EmbeddingStore(store_path, self.embedder.model_id, dim)
+        # BM25 over name/SKU/description/specs, fused with vector hits (part numbers, spec fragments)
+        self.lexical_index = None
+        if os.getenv("LEXICAL_SEARCH", "true").lower() in ("1", "true", "yes"):
+            self.lexical_index = LexicalIndex()
+        self.fusion_depth = int(os.getenv("HYBRID_FUSION_DEPTH", "50"))
+        # Optional second stage re-scoring over-fetched candidates within a time budget
+        self.reranker = create_reranker()
+        # Typed spec attributes (product_attributes) resolve range/equality constraints to SKUs
+        self.attribute_store = None
+        if os.getenv("SPEC_FILTERS", "true").lower() in ("1", "true", "yes"):
+            self.attribute_store = AttributeStore()
+        # Larger matches are applied to the retrieved hits instead of inside the vector search
+        # (Milvus inlines the SKUs into the filter expression and caps them lower)
+        self.max_prefilter_skus = int(os.getenv("SPEC_FILTER_MAX_SKUS", "5000"))
+        backend_cap = getattr(self.indexer, "max_filter_skus", None)
+        if backend_cap is not None:
+            self.max_prefilter_skus = min(self.max_prefilter_skus, backend_cap)
+        # MMR over the candidate vectors plus SKU-family dedup, so top_k holds distinct options
+        self.diversity = os.getenv("DIVERSITY", "true").lower() in ("1", "true", "yes")
+        self.diversity_candidates = int(os.getenv("MMR_CANDIDATES", "20"))
 
-    def search_products(self, query: str, limit: int = 5) -> List[Dict]:
+    def search_products(self, query: str, limit: int = 5, manufacturer: Union[str, List[str]] = None,
+                        category: Union[str, List[str]] = None, use_hints: bool = True,
+                        constraints: List[Dict] = None) -> List[Dict]:
         """
         Search for products semantically matching the query.
         
         Args:
             query (str): User's search text.
             limit (int): Number of results to return.
+            manufacturer (str | List[str]): Restrict to these brands (searches only their partitions).
+            category (str | List[str]): Restrict to these categories.
+            use_hints (bool): Take brand/category filters and spec constraints from the query when not given explicitly.
+            constraints (List[Dict]): Spec constraints ({"attribute", "op", "value"}, see spec_filters), applied strictly.
             
         Returns:
             List[Dict]: List of matching products with scores.
@@ -34,16 +90,226 @@ class SearchEngine:
         logger.info(f"Searching for: '{query}'")
         
         # 1. Generate embedding for the query
-        query_vec = self.embedder.embed_text(query)
-        if not query_vec:
+        query_vec = self.embed_query(query)
+        if len(query_vec) == 0:
+            return []
+
+        plan = self._plan_search(query, limit, manufacturer, category, use_hints, constraints)
+        if plan is None:
             return []
+        return self._run_search(query, query_vec, plan)
+
+    def _plan_search(self, query: str, limit: int, manufacturer: Union[str, List[str]],
+                     category: Union[str, List[str]], use_hints: bool, constraints: Optional[List[Dict]]) -> Optional[Dict]:
+        """
+        Filters and candidate depths for a query (everything but the vector search).
+        None when the spec constraints rule out every product.
+        """
+        # Explicit filters are strict; filters guessed from the query may be relaxed
+        manufacturer, category = _as_list(manufacturer), _as_list(category)
+        hinted_manufacturer, hinted_category = [], []
+        if use_hints and not (manufacturer and category):
+            hints = extract_query_hints(query, self.indexer.list_categories())
+            hinted_manufacturer = [] if manufacturer else hints["manufacturer"]
+            hinted_category = [] if category else hints["category"]
+
+        # Spec constraints ("sensing range >= 20 m", "IP67") become a SKU pre-filter
+        allowed = self._constraint_skus(query, constraints, use_hints)
+        if allowed is not None and not allowed:
+            logger.info("No products satisfy the spec constraints.")
+            return None
+        prefilter = allowed if allowed is not None and len(allowed) <= self.max_prefilter_skus else None
+
+        # Hybrid search fuses deeper candidate lists from both retrievers; re-ranking and diversity over-fetch
+        keep = limit
+        if self.reranker:
+            keep = max(keep, self.reranker.candidates)
+        if self.diversity:
+            keep = max(keep, self.diversity_candidates)
+        depth = max(keep, self.fusion_depth) if self.lexical_index else keep
+
+        # Narrowest filter first; widen if the hints leave too few matches
+        attempts = [(manufacturer + hinted_manufacturer, category + hinted_category)]
+        if hinted_category:
+            attempts.append((manufacturer + hinted_manufacturer, category))
+        if hinted_manufacturer:
+            attempts.append((manufacturer, category))
+        exprs = [self.indexer.build_filter(manufacturer=brands, category=categories, sku=prefilter)
+                 for brands, categories in attempts]
+        return {"limit": limit, "keep": keep, "depth": depth, "attempts": attempts, "exprs": exprs,
+                "allowed": allowed, "post_filter": allowed is not None and prefilter is None}
+
+    def _run_search(self, query: str, query_vec: np.ndarray, plan: Dict, first_hits: List[Dict] = None) -> List[Dict]:
+        """
+        Vector search, lexical fusion, re-ranking and diversity for a planned query.
+        first_hits are the vector hits for the first filter when already fetched (batch search).
+        """
+        limit, allowed = plan["limit"], plan["allowed"]
 
-        # 2. Search in Milvus
-        results = self.indexer.search(query_vec, top_k=limit)
+        # 2. Search in Milvus, narrowest filter first
+        for n, ((brands, categories), expr) in enumerate(zip(plan["attempts"], plan["exprs"])):
+            if n == 0 and first_hits is not None:
+                results = first_hits
+            else:
+                results = self.indexer.search(query_vec, top_k=plan["depth"], expr=expr, with_vectors=self.diversity)
+            if plan["post_filter"]:
+                results = [hit for hit in results if hit.get("sku") in allowed]
+            if len(results) >= limit:
+                break
+            if expr:
+                logger.info(f"Filter '{expr}' matched {len(results)} products.")
+
+        # 3. Fuse with lexical matches under the same filters
+        if self.lexical_index:
+            results = self._fuse_lexical(query, results, plan["keep"], brands, categories, allowed)
+
+        # 4. Re-rank the candidates; falls back to retrieval order when over budget
+        if self.reranker:
+            results = self.reranker.rerank(query, results, len(results) if self.diversity else limit)
+
+        # 5. Distinct options: MMR and one product per SKU family (while other families remain)
+        if self.diversity:
+            results = diversify(results, limit)
         
         logger.info(f"Found {len(results)} matches.")
+        return results[:limit]
+
+    def _constraint_skus(self, query: str, constraints: Optional[List[Dict]], use_hints: bool) -> Optional[Set[str]]:
+        """
+        SKUs satisfying the spec constraints, or None for no constraint.
+
+        Explicit constraints are strict. Constraints parsed from the query are
+        dropped when no product satisfies them or the attribute store is unavailable.
+        """
+        explicit = bool(constraints)
+        if not explicit and use_hints:
+            constraints = parse_spec_constraints(query)
+        if not constraints or not self.attribute_store:
+            return None
+        try:
+            skus = self.attribute_store.match(constraints)
+        except Exception as e:
+            if explicit:
+                raise
+            logger.warning(f"Spec filters unavailable, ignoring [{describe_constraints(constraints)}]: {e}")
+            return None
+        if not skus and not explicit:
+            logger.info(f"No product matches [{describe_constraints(constraints)}], searching without them.")
+            return None
+        return skus
+
+    def _fuse_lexical(self, query: str, vector_hits: List[Dict], limit: int, brands: List[str], categories: List[str],
+                      allowed: Optional[Set[str]] = None) -> List[Dict]:
+        """
+        Reciprocal rank fusion of vector and BM25 hits (matched on SKU).
+        
+        Vector hits keep their cosine score. 'score' feeds confidence, re-ranking and
+        diversity as a similarity, so lexical-only hits are scaled below the weakest
+        vector hit (0 without vector hits): lexical_score / best * min(cosine).
+        Their BM25 evidence stays in lexical_score and rrf_score.
+        """
+        try:
+            self.lexical_index.maybe_sync()
+            lexical_hits = self.lexical_index.search(query, top_k=max(limit, self.fusion_depth),
+                                                     manufacturer=brands, category=categories, sku=allowed)
+        except Exception as e:
+            logger.warning(f"Lexical search unavailable, using vector results only: {e}")
+            return vector_hits
+        if not lexical_hits:
+            return vector_hits
+
+        best = lexical_hits[0]["lexical_score"]
+        floor = max(0.0, min((hit.get("score", 0.0) for hit in vector_hits), default=0.0))
+        for hit in lexical_hits:
+            hit["score"] = floor * hit["lexical_score"] / best
+        fused = reciprocal_rank_fusion([vector_hits, lexical_hits], key="sku", limit=limit)
+        logger.info(f"Fused {len(vector_hits)} vector and {len(lexical_hits)} lexical hits.")
+        return fused
+
+    def search_products_batch(self, queries: List[str], limit: int = 5, manufacturer: Union[str, List[str]] = None,
+                              category: Union[str, List[str]] = None, use_hints: bool = True,
+                              constraints: List[Dict] = None) -> List[List[Dict]]:
+        """
+        Search many queries with one batched embedding call.
+        
+        Each query goes through the same pipeline as search_products (hints, spec
+        filters, lexical fusion, re-ranking, diversity) and gets the same results.
+        First-attempt vector searches sharing a filter go to the index in one request;
+        widened retries run per query.
+        
+        Args:
+            queries (List[str]): Search texts (e.g. lines of a customer's parts list).
+            limit (int): Number of results per query.
+            manufacturer, category, use_hints, constraints: As in search_products, for every query.
+            
+        Returns:
+            List[List[Dict]]: Matches per query, in input order (empty for blank queries).
+        """
+        logger.info(f"Batch searching {len(queries)} queries")
+        query_vecs = self.embed_queries(queries)
+
+        plans = [None] * len(queries)
+        groups = {}
+        for i, (query, vec) in enumerate(zip(queries, query_vecs)):
+            if vec is None or len(vec) == 0:
+                continue
+            plans[i] = self._plan_search(query, limit, manufacturer, category, use_hints, constraints)
+            if plans[i] is not None:
+                groups.setdefault(repr(plans[i]["exprs"][0]), []).append(i)
+
+        first_hits = {}
+        for members in groups.values():
+            expr = plans[members[0]]["exprs"][0]
+            matrix = np.stack([query_vecs[i] for i in members])
+            found = self.indexer.search_many(matrix, top_k=plans[members[0]]["depth"], expr=expr,
+                                             with_vectors=self.diversity)
+            first_hits.update(zip(members, found))
+
+        results = [[] for _ in queries]
+        for i in first_hits:
+            results[i] = self._run_search(queries[i], query_vecs[i], plans[i], first_hits[i])
         return results
 
+    def embed_queries(self, queries: List[str]) -> List[np.ndarray]:
+        """
+        Embed many queries; cache misses share a single forward pass.
+        Blank queries map to None.
+        """
+        model_id = self.embedder.model_id
+        vectors = [None] * len(queries)
+        missing = []
+        for i, query in enumerate(queries):
+            if not query or not query.strip():
+                continue
+            vectors[i] = self.query_cache.get(query, model_id)
+            if vectors[i] is None:
+                missing.append(i)
+
+        if missing:
+            fresh = self.embedder.embed_array([queries[i] for i in missing])
+            for i, vec in zip(missing, fresh):
+                vectors[i] = vec
+                self.query_cache.put(queries[i], model_id, vec)
+        return vectors
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Embed a (translated) query, using the query cache and the batcher.
+        """
+        model_id = self.embedder.model_id
+        query_vec = self.query_cache.get(query, model_id)
+        if query_vec is not None:
+            return query_vec
+
+        if self.query_embedder:
+            query_vec = self.query_embedder.embed(query)
+        else:
+            query_vec = self.embedder.embed_array(query)
+
+        if len(query_vec) > 0:
+            self.query_cache.put(query, model_id, query_vec)
+        return query_vec
+
     def index_product_batch(self, products: List[Dict]):
         """
         Index a batch of products effectively.
@@ -57,17 +323,33 @@ class SearchEngine:
 
         # 1. Prepare text for embedding
         # We combine important fields to create a rich semantic representation
-        texts_to_embed = []
-        for p in products:
-            # Combine Name + Category + Description (if available)
-            text = f"{p.get('name', '')} {p.get('category', '')} {p.get('description', '')}"
-            texts_to_embed.append(text.strip())
+        texts_to_embed = [self.product_text(p) for p in products]
+
+        # 2. Generate embeddings (float32 matrix, passed to Milvus without boxing)
+        embeddings = self._embed_documents(texts_to_embed)
+
+        # 3. Upsert into Milvus (keyed on product_id, so re-indexing is idempotent)
+        (self.writer or self.indexer).upsert_products(products, embeddings)
+
+    @staticmethod
+    def product_text(product: Dict) -> str:
+        """The text embedded for a product: Name + Category + Description (if available)."""
+        text = f"{product.get('name', '')} {product.get('category', '')} {product.get('description', '')}"
+        return text.strip()
 
-        # 2. Generate embeddings
-        embeddings = self.embedder.embed_text(texts_to_embed)
+    def _embed_documents(self, texts: List[str]) -> np.ndarray:
+        """Embeds product texts, reusing stored vectors for unchanged texts."""
+        if self.embedding_store is None:
+            return self.bulk_embedder.embed_bulk(texts)
 
-        # 3. Insert into Milvus
-        self.indexer.insert_products(products, embeddings)
+        embeddings, missing = self.embedding_store.lookup(texts)
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            fresh = self.bulk_embedder.embed_bulk(missing_texts)
+            embeddings[missing] = fresh
+            self.embedding_store.add(missing_texts, fresh)
+        logger.info(f"Embedded {len(missing)} of {len(texts)} products ({len(texts) - len(missing)} from store).")
+        return embeddings
 
 if __name__ == "__main__":
     # Simple test
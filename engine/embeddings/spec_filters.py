@@ -0,0 +1,127 @@
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Set
+
+from tools.data_ingestion.spec_normalizer import LENGTH_UNITS_MM, parse_number, parse_output_types
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_NUMBER = r"\d+(?:[.,]\d+)?"
+_LENGTH = r"mm|cm|km|m"
+_AT_LEAST = r"≥|>=|>|at least|min(?:imum)?\.?|over|above|more than|greater than"
+_AT_MOST = r"≤|<=|<|at most|max(?:imum)?\.?|up to|below|under|less than"
+_RANGE_WORDS = r"(?:sensing|scanning|detection|working|measuring|operating)\s+(?:range|distance)|range"
+
+# "sensing range ≥ 20 m", "range of at least 500 mm", "range up to 4mm"
+_RANGE_AFTER = re.compile(
+    rf"\b(?:{_RANGE_WORDS})\s*(?:of\s+)?(?:({_AT_LEAST})|({_AT_MOST}))?\s*({_NUMBER})\s*({_LENGTH})\b", re.IGNORECASE)
+# "20 m sensing range", "at least 8mm range"
+_RANGE_BEFORE = re.compile(
+    rf"(?:({_AT_LEAST})|({_AT_MOST}))?\s*\b({_NUMBER})\s*({_LENGTH})\s+(?:{_RANGE_WORDS})\b", re.IGNORECASE)
+_IP_RATING = re.compile(r"\bIP\s?(\d)(\d)(K?)\b", re.IGNORECASE)
+_VOLTAGE = re.compile(rf"(?<![\d.,])({_NUMBER})\s*V(?:\s*(?:DC|AC))?\b")
+
+OPERATORS = (">=", "<=", "=", "contains")
+
+
+def constraint(attribute: str, op: str, value) -> Dict:
+    """A spec constraint: {"attribute", "op", "value"}; op is one of OPERATORS."""
+    if op not in OPERATORS:
+        raise ValueError(f"Unknown constraint operator '{op}', expected one of {OPERATORS}.")
+    return {"attribute": attribute, "op": op, "value": value}
+
+
+def parse_spec_constraints(query: str) -> List[Dict]:
+    """
+    Range and equality constraints stated in a query.
+
+    Sensing ranges become sensing_range_mm >= / <= (a bare "20 m range" means at
+    least 20 m), "24 V" requires the supply voltage range to contain 24 V, and IP
+    ratings and output types (PNP, NPN, IO-Link, ...) are equality constraints.
+    """
+    constraints = []
+    for pattern in (_RANGE_AFTER, _RANGE_BEFORE):
+        match = pattern.search(query)
+        if match:
+            at_least, at_most, number, unit = match.groups()
+            value = parse_number(number) * LENGTH_UNITS_MM[unit.lower()]
+            constraints.append(constraint("sensing_range_mm", "<=" if at_most and not at_least else ">=", value))
+            break
+    for a, b, k in _IP_RATING.findall(query):
+        constraints.append(constraint("ip_rating", "=", f"IP{a}{b}{k.upper()}"))
+    voltage = _VOLTAGE.search(query)
+    if voltage:
+        constraints.append(constraint("supply_voltage", "contains", parse_number(voltage.group(1))))
+    for output in parse_output_types(query):
+        constraints.append(constraint("output_type", "=", output))
+    return constraints
+
+
+def describe_constraints(constraints: List[Dict]) -> str:
+    return ", ".join(f"{c['attribute']} {c['op']} {c['value']}" for c in constraints)
+
+
+class AttributeStore:
+    """
+    Resolves spec constraints to SKUs with indexed lookups on product_attributes.
+
+    Each constraint is one index range scan; the SKU sets are intersected in SQL.
+    Results are cached per constraint set until the catalog version changes.
+    """
+
+    def __init__(self, cache_size: int = 256):
+        self.cache_size = cache_size
+        self.version = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _subquery(c: Dict, i: int, params: Dict) -> List[str]:
+        if c["op"] == "contains":
+            # Ranges stored as <attribute>_min_v / <attribute>_max_v (supply_voltage)
+            params.update({f"lo{i}": f"{c['attribute']}_min_v", f"hi{i}": f"{c['attribute']}_max_v", f"v{i}": float(c["value"])})
+            return [
+                f"SELECT sku_id FROM product_attributes WHERE attribute = :lo{i} AND num_value <= :v{i}",
+                f"SELECT sku_id FROM product_attributes WHERE attribute = :hi{i} AND num_value >= :v{i}",
+            ]
+        params[f"a{i}"] = c["attribute"]
+        if c["op"] == "=":
+            params[f"v{i}"] = str(c["value"])
+            return [f"SELECT sku_id FROM product_attributes WHERE attribute = :a{i} AND text_value = :v{i}"]
+        params[f"v{i}"] = float(c["value"])
+        return [f"SELECT sku_id FROM product_attributes WHERE attribute = :a{i} AND num_value {c['op']} :v{i}"]
+
+    def match(self, constraints: List[Dict]) -> Set[str]:
+        """SKUs satisfying every constraint."""
+        from sqlalchemy import text
+        from engine.database import get_engine, get_catalog_version
+
+        for c in constraints:
+            if c["op"] not in OPERATORS:
+                raise ValueError(f"Unknown constraint operator '{c['op']}'.")
+        key = tuple(sorted((c["attribute"], c["op"], str(c["value"])) for c in constraints))
+        version = get_catalog_version()
+        with self._lock:
+            if version != self.version:
+                self._cache.clear()
+                self.version = version
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        params, subqueries = {}, []
+        for i, c in enumerate(constraints):
+            subqueries.extend(self._subquery(c, i, params))
+        with get_engine().connect() as conn:
+            skus = set(conn.execute(text(" INTERSECT ".join(subqueries)), params).scalars())
+
+        with self._lock:
+            self._cache[key] = skus
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        logger.info(f"Spec filter [{describe_constraints(constraints)}] matched {len(skus)} products.")
+        return skus
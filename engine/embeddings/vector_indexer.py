@@ -1,5 +1,11 @@
+import json
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Union, Set
+import numpy as np
+from engine.embeddings.projection import load_configured_projection
+from engine.embeddings.index_tuning import load_index_config, quantized_index, DEFAULT_INDEX, DEFAULT_SEARCH_PARAMS
+from engine.embeddings.query_hints import normalize_manufacturer
+from engine.embeddings.quantization import configured_quantization, rerank_candidates
 from pymilvus import (
     connections,
     utility,
@@ -18,12 +24,26 @@ class VectorIndexer:
     """
     Manages the Milvus vector database connection and indexing operations.
     """
+
+    # SKU lists are inlined into the boolean expression; larger spec matches are applied to the hits
+    max_filter_skus = 500
     
     def __init__(self, host: str = "milvus-standalone", port: str = "19530", collection_name: str = "products"):
         self.host = os.getenv("MILVUS_HOST", host)
         self.port = os.getenv("MILVUS_PORT", port)
         self.collection_name = collection_name
         self.collection = None
+        # Optional dimension reduction applied to every vector stored or searched
+        self.projection = load_configured_projection()
+        # Index type and search parameters chosen by scripts/tune_index.py (if run)
+        self.index_config = load_index_config()
+        # int8: IVF_SQ8 codes for candidate generation, re-ranked on the stored float32 vectors
+        self.quantization = configured_quantization()
+        if self.quantization == "binary":
+            raise ValueError("Binary quantization needs a second vector field, which Milvus 2.3 collections "
+                             "do not support; use VECTOR_QUANTIZATION=int8 or the local backend.")
+        self.rerank_candidates = rerank_candidates()
+        self._categories = None
         self._connect()
 
     def _connect(self):
@@ -43,21 +63,34 @@ class VectorIndexer:
         Args:
             dim (int): Dimension of the embedding vectors (default 384 for all-MiniLM-L6-v2).
         """
+        if self.projection is not None:
+            if dim != self.projection.in_dim:
+                raise ValueError(f"Projection expects {self.projection.in_dim}-d embeddings, model produces {dim}.")
+            dim = self.projection.out_dim
+
         if utility.has_collection(self.collection_name):
             logger.info(f"Collection '{self.collection_name}' already exists.")
             self.collection = Collection(self.collection_name)
             self.collection.load() # Load into memory for searching
+            if not self.keyed_by_product_id:
+                logger.warning(f"Collection '{self.collection_name}' uses auto_id; upserts fall back to delete + insert. "
+                               "Run scripts/dedupe_collection.py to remove duplicates.")
+            if not self.has_field("manufacturer"):
+                logger.warning(f"Collection '{self.collection_name}' has no manufacturer field; brand filters are ignored. "
+                               "Drop the collection and re-index to enable them.")
             return
 
         logger.info(f"Creating collection '{self.collection_name}' with dim={dim}...")
         
         # Define fields
         fields = [
-            FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True), # Internal Milvus ID
-            FieldSchema(name="product_id", dtype=DataType.VARCHAR, max_length=64), # Our DB Product ID (UUID)
+            FieldSchema(name="product_id", dtype=DataType.VARCHAR, max_length=100, is_primary=True, auto_id=False), # products.sku_id (String(100))
             FieldSchema(name="sku", dtype=DataType.VARCHAR, max_length=128),
             FieldSchema(name="name", dtype=DataType.VARCHAR, max_length=512),
             FieldSchema(name="category", dtype=DataType.VARCHAR, max_length=256),
+            # Partition key: Milvus hashes manufacturers into partitions and a
+            # manufacturer filter only searches the matching partition
+            FieldSchema(name="manufacturer", dtype=DataType.VARCHAR, max_length=100, is_partition_key=True),
             FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=dim)
         ]
         
@@ -65,73 +98,306 @@ class VectorIndexer:
         self.collection = Collection(self.collection_name, schema)
         
         # Create user-friendly index for faster search
+        index = quantized_index(self.index_config["index"] if self.index_config else DEFAULT_INDEX, self.quantization)
         index_params = {
             "metric_type": "COSINE",
-            "index_type": "IVF_FLAT",
-            "params": {"nlist": 128}
+            "index_type": index["index_type"],
+            "params": index["params"]
         }
         self.collection.create_index(field_name="embedding", index_params=index_params)
-        logger.info(f"Collection '{self.collection_name}' created and indexed.")
+        logger.info(f"Collection '{self.collection_name}' created and indexed ({index['index_type']}).")
         self.collection.load()
 
-    def insert_products(self, products: List[Dict[str, Any]], embeddings: List[List[float]]):
+    def rebuild_index(self, index: Dict[str, Any]):
         """
-        Insert products and their embeddings into Milvus.
+        Replace the vector index of the collection (no-op if it already matches).
         
         Args:
-            products (List[Dict]): List of product dictionaries (must contain product_id, sku, name, category).
-            embeddings (List[List[float]]): Corresponding list of embedding vectors.
+            index (Dict): {"index_type": ..., "params": {...}} as produced by index_tuning.choose_index;
+                          replaced by IVF_SQ8 with VECTOR_QUANTIZATION=int8.
         """
+        if not self.collection:
+            raise RuntimeError("Collection not initialized.")
+        index = quantized_index(index, self.quantization)
+
+        current = self.collection.indexes[0].params if self.collection.indexes else {}
+        if current.get("index_type") == index["index_type"] and current.get("params") == index["params"]:
+            return
+
+        logger.info(f"Rebuilding index on '{self.collection_name}': {index['index_type']} {index['params']}")
+        self.collection.release()
+        self.collection.drop_index()
+        self.collection.create_index(
+            field_name="embedding",
+            index_params={"metric_type": "COSINE", "index_type": index["index_type"], "params": index["params"]},
+        )
+        utility.wait_for_index_building_complete(self.collection_name)
+        self.collection.load()
+
+    @property
+    def keyed_by_product_id(self) -> bool:
+        """True when product_id is the primary key (native upsert); False for legacy auto_id collections."""
+        return self.collection is not None and self.collection.schema.primary_field.name == "product_id"
+
+    def has_field(self, name: str) -> bool:
+        return self.collection is not None and any(f.name == name for f in self.collection.schema.fields)
+
+    def build_filter(self, manufacturer: Union[str, List[str]] = None, category: Union[str, List[str]] = None,
+                     sku: Iterable[str] = None) -> str:
+        """
+        Milvus boolean expression restricting a search to manufacturers, categories and/or SKUs.
+        
+        Args:
+            manufacturer (str | List[str]): Brand(s), matched after normalization ("Sick AG" -> "SICK").
+            category (str | List[str]): Exact category name(s).
+            sku (Iterable[str]): Allowed SKUs (e.g. products matching spec constraints), at most max_filter_skus.
+            
+        Returns:
+            str: Expression, or "" when there is nothing to filter on.
+        """
+        clauses = []
+        if manufacturer:
+            if self.has_field("manufacturer"):
+                values = [manufacturer] if isinstance(manufacturer, str) else list(manufacturer)
+                clauses.append(f"manufacturer in {json.dumps([normalize_manufacturer(m) for m in values])}")
+            else:
+                logger.warning("Ignoring manufacturer filter: collection has no manufacturer field.")
+        if category:
+            values = [category] if isinstance(category, str) else list(category)
+            clauses.append(f"category in {json.dumps(values)}")
+        if sku is not None:
+            sku = sorted(sku)
+            if len(sku) > self.max_filter_skus:
+                raise ValueError(f"{len(sku)} SKUs exceed the {self.max_filter_skus} allowed in a Milvus filter "
+                                 f"expression; filter the search results instead.")
+            clauses.append(f"sku in {json.dumps(sku)}")
+        return " and ".join(clauses)
+
+    def list_categories(self, refresh: bool = False) -> List[str]:
+        """Distinct categories in the collection (scanned once, then cached)."""
+        if self._categories is None or refresh:
+            categories = {row["category"] for batch in self.iter_rows(["category"]) for row in batch}
+            self._categories = sorted(c for c in categories if c)
+            logger.info(f"Loaded {len(self._categories)} categories from '{self.collection_name}'.")
+        return self._categories
+
+    def _prepare_columns(self, products: List[Dict[str, Any]], embeddings: Union[np.ndarray, List[List[float]]]) -> list:
+        """Projects the vectors and turns rows into Milvus data columns."""
         if not self.collection:
             self.create_collection(dim=len(embeddings[0]))
 
         if len(products) != len(embeddings):
             raise ValueError("Number of products must match number of embeddings.")
 
+        if self.projection is not None:
+            embeddings = self.projection.apply(embeddings)
+        elif isinstance(embeddings, np.ndarray):
+            embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+
         # Prepare data columns for Milvus (row-based to column-based)
-        data = [
-            [p["product_id"] for p in products],
-            [p["sku"] for p in products],
-            [p["name"] for p in products],
-            [str(p.get("category", "Uncategorized")) for p in products], # Handle None
-            embeddings
-        ]
+        columns = {
+            "product_id": [p["product_id"] for p in products],
+            "sku": [p["sku"] for p in products],
+            "name": [p["name"] for p in products],
+            "category": [str(p.get("category", "Uncategorized")) for p in products], # Handle None
+            "manufacturer": [normalize_manufacturer(p.get("manufacturer")) for p in products],
+            "embedding": embeddings,
+        }
+        if self._categories is not None:
+            self._categories = sorted(set(self._categories) | {c for c in columns["category"] if c})
+        # Column order follows the collection schema (older collections lack manufacturer)
+        return [columns[f.name] for f in self.collection.schema.fields if not f.auto_id]
+
+    def insert_products(self, products: List[Dict[str, Any]], embeddings: Union[np.ndarray, List[List[float]]], flush: bool = True):
+        """
+        Insert products and their embeddings into Milvus.
+        Prefer upsert_products for re-indexing; insert does not replace existing rows.
+        
+        Args:
+            products (List[Dict]): List of product dictionaries (must contain product_id, sku, name, category).
+            embeddings (np.ndarray | List[List[float]]): Corresponding (n, dim) float32 matrix or list of vectors.
+            flush (bool): Seal the segment right away. Bulk writers pass False and flush once at the end.
+        """
+        data = self._prepare_columns(products, embeddings)
 
         try:
             res = self.collection.insert(data)
-            self.collection.flush() # Ensure data is persisted
-            logger.info(f"Inserted {len(products)} vectors. IDs: {res.primary_keys}")
+            if flush:
+                self.collection.flush() # Ensure data is persisted
+            logger.info(f"Inserted {len(products)} vectors ({res.insert_count} rows).")
         except Exception as e:
             logger.error(f"Failed to insert vectors: {e}")
             raise e
 
-    def search(self, query_embedding: List[float], top_k: int = 5) -> List[Dict]:
+    def upsert_products(self, products: List[Dict[str, Any]], embeddings: Union[np.ndarray, List[List[float]]], flush: bool = True):
         """
-        Search for similar products using a query embedding.
+        Insert or replace products keyed on product_id, so re-indexing never duplicates rows.
+        
+        Args:
+            products (List[Dict]): List of product dictionaries (must contain product_id, sku, name, category).
+            embeddings (np.ndarray | List[List[float]]): Corresponding (n, dim) float32 matrix or list of vectors.
+            flush (bool): Seal the segment right away.
+        """
+        # Within one call the last row for a product_id wins
+        latest = {p["product_id"]: i for i, p in enumerate(products)}
+        if len(latest) < len(products):
+            keep = sorted(latest.values())
+            products = [products[i] for i in keep]
+            embeddings = np.asarray(embeddings, dtype=np.float32)[keep]
+
+        data = self._prepare_columns(products, embeddings)
+
+        try:
+            if self.keyed_by_product_id:
+                self.collection.upsert(data)
+            else:
+                self.delete_products(data[0], flush=False)
+                self.collection.insert(data)
+            if flush:
+                self.collection.flush()
+            logger.info(f"Upserted {len(products)} vectors.")
+        except Exception as e:
+            logger.error(f"Failed to upsert vectors: {e}")
+            raise e
+
+    def flush(self):
+        """Seals pending inserts so they are persisted."""
+        if self.collection:
+            self.collection.flush()
+
+    def delete_products(self, product_ids: List[str], flush: bool = True) -> int:
         """
+        Delete every row belonging to the given product_ids.
+        
+        Returns:
+            int: Number of rows deleted.
+        """
+        if not self.collection:
+            raise RuntimeError("Collection not initialized.")
+        if not product_ids:
+            return 0
+
+        deleted = 0
+        for start in range(0, len(product_ids), 1000):
+            ids = list(product_ids[start:start + 1000])
+            if self.keyed_by_product_id:
+                res = self.collection.delete(expr=f"product_id in {json.dumps(ids)}")
+            else:
+                # Legacy auto_id collection: resolve internal primary keys first
+                rows = self.collection.query(expr=f"product_id in {json.dumps(ids)}", output_fields=["id"])
+                if not rows:
+                    continue
+                res = self.collection.delete(expr=f"id in {[r['id'] for r in rows]}")
+            deleted += res.delete_count
+        if flush:
+            self.collection.flush()
+        return deleted
+
+    def iter_rows(self, output_fields: List[str], batch_size: int = 1000):
+        """Yields every row of the collection in batches (used by maintenance jobs)."""
         if not self.collection:
             raise RuntimeError("Collection not initialized.")
+        iterator = self.collection.query_iterator(batch_size=batch_size, expr='product_id != ""', output_fields=output_fields)
+        try:
+            while True:
+                batch = iterator.next()
+                if not batch:
+                    break
+                yield batch
+        finally:
+            iterator.close()
+
+    def list_product_ids(self) -> Set[str]:
+        """Returns the distinct product_ids stored in the collection."""
+        return {row["product_id"] for batch in self.iter_rows(["product_id"]) for row in batch}
 
-        search_params = {"metric_type": "COSINE", "params": {"nprobe": 10}}
+    def search(self, query_embedding: Union[np.ndarray, List[float]], top_k: int = 5, expr: str = None,
+               with_vectors: bool = False) -> List[Dict]:
+        """
+        Search for similar products using a query embedding.
         
-        results = self.collection.search(
-            data=[query_embedding],
-            anns_field="embedding",
-            param=search_params,
-            limit=top_k,
-            output_fields=["product_id", "sku", "name", "category"]
-        )
+        Args:
+            expr (str): Optional filter from build_filter.
+            with_vectors (bool): Add each hit's stored vector as 'vector'.
+        """
+        return self.search_many([query_embedding], top_k=top_k, expr=expr, with_vectors=with_vectors)[0]
+
+    def search_many(self, query_embeddings: Union[np.ndarray, List[List[float]]], top_k: int = 5, max_nq: int = 1024,
+                    search_params: Dict[str, Any] = None, project: bool = True, expr: str = None,
+                    with_vectors: bool = False) -> List[List[Dict]]:
+        """
+        Search for many query embeddings in as few Milvus requests as possible.
+        
+        Args:
+            query_embeddings (np.ndarray | List[List[float]]): (n, dim) query vectors.
+            top_k (int): Results per query.
+            max_nq (int): Queries per request.
+            search_params (Dict): Override of the tuned nprobe/ef parameters.
+            project (bool): Apply the configured projection (False for vectors read back from the collection).
+            expr (str): Optional filter from build_filter, applied to every query.
+            with_vectors (bool): Add each hit's stored vector as 'vector' (e.g. for diversity selection).
+            
+        Returns:
+            List[List[Dict]]: Hits per query, in input order.
+        """
+        if not self.collection:
+            raise RuntimeError("Collection not initialized.")
+        if len(query_embeddings) == 0:
+            return []
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if self.projection is not None and project:
+            queries = self.projection.apply(queries)
+
+        if search_params is None:
+            search_params = self.index_config["search_params"] if self.index_config else DEFAULT_SEARCH_PARAMS
+        search_params = {"metric_type": "COSINE", "params": search_params}
+        output_fields = ["product_id", "sku", "name", "category"]
+        if self.has_field("manufacturer"):
+            output_fields.append("manufacturer")
+        # Quantized index: fetch extra candidates with their float32 vectors and re-rank exactly
+        rerank = self.quantization == "int8"
+        limit = max(top_k, self.rerank_candidates) if rerank else top_k
+        if rerank or with_vectors:
+            output_fields.append("embedding")
+
+        all_hits = []
+        for start in range(0, len(queries), max_nq):
+            results = self.collection.search(
+                data=list(queries[start:start + max_nq]),
+                anns_field="embedding",
+                param=search_params,
+                limit=limit,
+                expr=expr or None,
+                output_fields=output_fields
+            )
+
+            for offset, hits_i in enumerate(results):
+                hits_i = list(hits_i)
+                scores = [hit.distance for hit in hits_i]
+                if rerank and hits_i:
+                    query = queries[start + offset]
+                    query = query / max(np.linalg.norm(query), 1e-12)
+                    candidates = np.asarray([hit.entity.get("embedding") for hit in hits_i], dtype=np.float32)
+                    candidates /= np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+                    exact = candidates @ query
+                    order = np.argsort(-exact)[:top_k]
+                    hits_i = [hits_i[i] for i in order]
+                    scores = [float(exact[i]) for i in order]
 
-        hits = []
-        for hits_i in results:
-            for hit in hits_i:
-                hits.append({
-                    "milvus_id": hit.id,
-                    "score": hit.distance,
-                    "product_id": hit.entity.get("product_id"),
-                    "sku": hit.entity.get("sku"),
-                    "name": hit.entity.get("name"),
-                    "category": hit.entity.get("category")
-                })
+                hits = []
+                for hit, score in zip(hits_i, scores):
+                    hits.append({
+                        "milvus_id": hit.id,
+                        "score": score,
+                        "product_id": hit.entity.get("product_id"),
+                        "sku": hit.entity.get("sku"),
+                        "name": hit.entity.get("name"),
+                        "category": hit.entity.get("category"),
+                        "manufacturer": hit.entity.get("manufacturer") if "manufacturer" in output_fields else None
+                    })
+                    if with_vectors:
+                        hits[-1]["vector"] = np.asarray(hit.entity.get("embedding"), dtype=np.float32)
+                all_hits.append(hits)
         
-        return hits
+        return all_hits
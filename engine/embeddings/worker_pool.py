@@ -0,0 +1,124 @@
+import logging
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+from typing import List
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Per-process model, created by the pool initializer
+_worker_model = None
+
+
+def _init_worker(model_name: str, threads: int, model_factory=None):
+    """Loads one EmbeddingModel per worker with a fixed intra-op thread count."""
+    global _worker_model
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["EMBEDDING_ONNX_THREADS"] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    if model_factory is not None:
+        _worker_model = model_factory(model_name)
+        return
+    from engine.embeddings.embedding_model import EmbeddingModel
+    _worker_model = EmbeddingModel(model_name, lazy=False)
+
+
+def _worker_dimension() -> int:
+    return _worker_model.get_dimension()
+
+
+def _embed_shard(shm_name: str, shape: tuple, start: int, texts: List[str], normalize: bool) -> int:
+    """Embeds one shard and writes it straight into the shared output buffer."""
+    # Spawned workers share the parent's resource tracker, and the parent unlinks the segment
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        output = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        output[start:start + len(texts)] = _worker_model.embed_bulk(texts, normalize=normalize)
+        del output
+    finally:
+        shm.close()
+    return len(texts)
+
+
+class EmbeddingWorkerPool:
+    """
+    Process pool for catalog-scale embedding.
+
+    Each worker holds its own EmbeddingModel and thread budget. Texts are split
+    into shards that workers encode in parallel (length-bucketed), writing
+    results into a shared-memory matrix so vectors are never pickled back.
+    Provides embed_bulk, so it can stand in for EmbeddingModel in bulk jobs.
+    """
+
+    def __init__(self, num_workers: int, threads_per_worker: int = None, model_name: str = "all-MiniLM-L6-v2", shards_per_worker: int = 4,
+                 model_factory=None):
+        """
+        Args:
+            num_workers (int): Number of worker processes.
+            threads_per_worker (int): Torch/ONNX intra-op threads per worker (defaults to cores / workers).
+            model_name (str): Model each worker loads.
+            shards_per_worker (int): Shards per worker per call, for load balancing.
+            model_factory (callable): Picklable model_name -> model with embed_bulk/get_dimension
+                                      (defaults to EmbeddingModel).
+        """
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // num_workers)
+        self.shards_per_worker = shards_per_worker
+        # Spawn: forking a process that already initialized torch threads can deadlock
+        self._pool = mp.get_context("spawn").Pool(
+            processes=num_workers,
+            initializer=_init_worker,
+            initargs=(model_name, self.threads_per_worker, model_factory),
+        )
+        self._dimension = self._pool.apply(_worker_dimension)
+        logger.info(f"Embedding worker pool started: {num_workers} workers x {self.threads_per_worker} threads.")
+
+    def get_dimension(self) -> int:
+        return self._dimension
+
+    def embed_bulk(self, texts: List[str], normalize: bool = False) -> np.ndarray:
+        """
+        Embed many documents across the worker processes.
+
+        Returns:
+            np.ndarray: (n, dim) float32 matrix aligned with `texts`.
+        """
+        shape = (len(texts), self._dimension)
+        if not texts:
+            return np.zeros(shape, dtype=np.float32)
+
+        num_shards = min(len(texts), self.num_workers * self.shards_per_worker)
+        bounds = np.linspace(0, len(texts), num_shards + 1, dtype=int)
+
+        shm = shared_memory.SharedMemory(create=True, size=shape[0] * shape[1] * 4)
+        try:
+            tasks = [
+                (shm.name, shape, int(start), texts[start:end], normalize)
+                for start, end in zip(bounds[:-1], bounds[1:]) if end > start
+            ]
+            self._pool.starmap(_embed_shard, tasks)
+            output = np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+        return output
+
+    def close(self):
+        """Stops the worker processes."""
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
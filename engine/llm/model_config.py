@@ -21,6 +21,8 @@ class LLMConfig:
             cls._instance.model_name = os.getenv("OLLAMA_MODEL", "tinyllama") # Default to tinyllama for speed/size
             cls._instance.base_url = os.getenv("OLLAMA_BASE_URL", "http://ollama:11434")
             cls._instance.temperature = float(os.getenv("LLM_TEMPERATURE", "0.2"))
+            # Echo generated tokens to the server's stdout (debugging); clients stream via /recommend/stream
+            cls._instance.stdout_streaming = os.getenv("LLM_STDOUT_STREAMING", "false").lower() in ("1", "true", "yes")
             cls._instance._llm = None
         return cls._instance
 
@@ -30,11 +32,12 @@ class LLMConfig:
             logger.info(f"Initializing LLM: {self.model_name} at {self.base_url}")
             try:
                 # Use ChatOllama for chat models
+                callbacks = [StreamingStdOutCallbackHandler()] if self.stdout_streaming else []
                 self._llm = ChatOllama(
                     base_url=self.base_url,
                     model=self.model_name,
                     temperature=self.temperature,
-                    callback_manager=CallbackManager([StreamingStdOutCallbackHandler()])
+                    callback_manager=CallbackManager(callbacks)
                 )
             except Exception as e:
                 logger.error(f"Failed to initialize LLM: {e}")
@@ -61,6 +61,27 @@ def get_rag_prompt():
         partial_variables={"system_prompt": SYSTEM_PROMPT}
     )
 
+# Per-product limits keep the context within the model window
+MAX_DESCRIPTION_CHARS = 300
+MAX_SPEC_ITEMS = 8
+
+def _truncate(value, limit):
+    value = " ".join(str(value).split())
+    return value if len(value) <= limit else value[:limit].rsplit(" ", 1)[0] + "..."
+
+def _format_specs(specs):
+    """Renders a specifications JSON object (or list of pairs) as 'key: value; ...'."""
+    if not specs:
+        return ""
+    if isinstance(specs, dict):
+        items = list(specs.items())
+    elif isinstance(specs, list):
+        items = [(s.get('name') or s.get('key'), s.get('value')) if isinstance(s, dict) else (None, s) for s in specs]
+    else:
+        return _truncate(specs, MAX_DESCRIPTION_CHARS)
+    parts = [f"{k}: {v}" if k else str(v) for k, v in items[:MAX_SPEC_ITEMS] if v not in (None, "")]
+    return "; ".join(_truncate(p, 80) for p in parts)
+
 def format_docs(docs):
     """
     Format retrieved documents (Milvus hits) into a string for the prompt.
@@ -75,6 +96,14 @@ def format_docs(docs):
         else:
              # It's our dict from SearchEngine
              content = f"Product: {doc.get('name')} | SKU: {doc.get('sku')} | Category: {doc.get('category')}"
+             if doc.get('manufacturer'):
+                 content += f" | Manufacturer: {doc.get('manufacturer')}"
+             # Hydrated hits (ProductHydrator / pgvector) carry the full product row
+             if doc.get('description'):
+                 content += f"\n   Description: {_truncate(doc['description'], MAX_DESCRIPTION_CHARS)}"
+             specs = _format_specs(doc.get('specifications'))
+             if specs:
+                 content += f"\n   Specifications: {specs}"
              metadata = doc # Or doc.get('metadata', {})
         
         formatted_context += f"{i+1}. {content}\n"
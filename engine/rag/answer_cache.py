@@ -0,0 +1,171 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import numpy as np
+from prometheus_client import Counter
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_HITS = Counter("answer_cache_hits_total", "Recommendations served from the semantic answer cache")
+ANSWER_CACHE_MISSES = Counter("answer_cache_misses_total", "Recommendations that required an LLM generation")
+
+
+def sku_overlap(a: Iterable[str], b: Iterable[str]) -> float:
+    """Jaccard overlap of two SKU sets (1.0 for two empty sets)."""
+    a, b = set(a), set(b)
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class SemanticAnswerCache:
+    """
+    Generated answers keyed on the query embedding, reused for paraphrases.
+
+    A cached answer is returned when a new query is within `threshold` cosine
+    similarity of a cached query, has the same language, and retrieved mostly
+    the same products (SKU overlap). Entries are evicted least recently used
+    beyond `max_size` and after `ttl_seconds`, and all entries are dropped when
+    the catalog version changes. Only the answer is reused: callers attach the
+    products retrieved for the new query as its source documents.
+    """
+
+    def __init__(self, threshold: float = None, min_sku_overlap: float = None, max_size: int = None,
+                 ttl_seconds: float = None, version_fn: Callable[[], str] = None):
+        """
+        Args:
+            threshold (float): Minimum cosine similarity of the queries (ANSWER_CACHE_THRESHOLD).
+            min_sku_overlap (float): Minimum Jaccard overlap of retrieved SKUs (ANSWER_CACHE_MIN_SKU_OVERLAP).
+            max_size (int): Maximum number of cached answers (ANSWER_CACHE_SIZE).
+            ttl_seconds (float): Age after which an answer is generated again (ANSWER_CACHE_TTL).
+            version_fn (Callable): Returns the catalog version; defaults to get_catalog_version.
+        """
+        self.threshold = threshold if threshold is not None else float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+        self.min_sku_overlap = (min_sku_overlap if min_sku_overlap is not None
+                                else float(os.getenv("ANSWER_CACHE_MIN_SKU_OVERLAP", "0.6")))
+        self.max_size = max_size if max_size is not None else int(os.getenv("ANSWER_CACHE_SIZE", "2000"))
+        self.ttl = ttl_seconds if ttl_seconds is not None else float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+        self._version_fn = version_fn
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        # Query vectors live in one preallocated matrix so a lookup is a single matrix-vector product
+        self._vectors = None  # (max_size, dim) unit vectors
+        self._valid = None  # slot in use
+        self._entries = OrderedDict()  # slot -> entry dict, least recently used first
+        self._free = []
+        self._lock = threading.Lock()
+
+    def _catalog_version(self) -> str:
+        if self._version_fn is None:
+            from engine.database import get_catalog_version
+
+            self._version_fn = get_catalog_version
+        return self._version_fn()
+
+    def _check_version(self):
+        """Drops every answer if the catalog changed since it was generated."""
+        version = self._catalog_version()
+        if version != self.version:
+            if self._entries:
+                logger.info(f"Catalog changed ({self.version} -> {version}), clearing answer cache.")
+            self._clear()
+            self.version = version
+
+    def _clear(self):
+        self._entries.clear()
+        self._free = list(range(self.max_size))[::-1]
+        if self._valid is not None:
+            self._valid[:] = False
+
+    def _remove(self, slot: int):
+        del self._entries[slot]
+        self._valid[slot] = False
+        self._free.append(slot)
+
+    @staticmethod
+    def _unit(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def get(self, query_vec: np.ndarray, skus: Iterable[str], lang: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached result (without source_documents) of the most similar matching query, or None.
+
+        Args:
+            query_vec (np.ndarray): Embedding of the (translated) query.
+            skus (Iterable[str]): SKUs retrieved for the new query.
+            lang (str): Detected language; answers are only shared within a language.
+        """
+        if self.max_size <= 0:
+            return None
+        skus = set(skus)
+        with self._lock:
+            self._check_version()
+            match = None
+            if self._entries and self._vectors.shape[1] == len(query_vec):
+                scores = self._vectors @ self._unit(query_vec)
+                scores[~self._valid] = -np.inf
+                now = time.monotonic()
+                candidates = np.flatnonzero(scores >= self.threshold)
+                for slot in candidates[np.argsort(-scores[candidates])].tolist():
+                    entry = self._entries[slot]
+                    if now - entry["stored_at"] >= self.ttl:
+                        self._remove(slot)
+                        continue
+                    if entry["lang"] == lang and sku_overlap(entry["skus"], skus) >= self.min_sku_overlap:
+                        self._entries.move_to_end(slot)
+                        match = entry
+                        break
+            if match is None:
+                self.misses += 1
+                ANSWER_CACHE_MISSES.inc()
+                return None
+            self.hits += 1
+        ANSWER_CACHE_HITS.inc()
+        logger.info(f"Answer cache hit (cached query: '{match['query']}').")
+        return {**match["result"], "cached": True}
+
+    def put(self, query: str, query_vec: np.ndarray, result: Dict[str, Any], lang: str):
+        """Stores a generated result (its source documents as SKUs only), evicting the least recently used answer when full."""
+        if self.max_size <= 0:
+            return
+        vector = self._unit(query_vec)
+        with self._lock:
+            self._check_version()
+            if self._vectors is None or self._vectors.shape[1] != len(vector):
+                self._vectors = np.zeros((self.max_size, len(vector)), dtype=np.float32)
+                self._valid = np.zeros(self.max_size, dtype=bool)
+                self._clear()
+            if not self._free:
+                self._remove(next(iter(self._entries)))
+            slot = self._free.pop()
+            self._vectors[slot] = vector
+            self._valid[slot] = True
+            self._entries[slot] = {
+                "query": query,
+                "lang": lang,
+                "skus": {doc.get("sku") for doc in result.get("source_documents", []) if doc.get("sku")},
+                "result": {k: v for k, v in result.items() if k != "source_documents"},
+                "stored_at": time.monotonic(),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,146 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import text
+
+from engine.database import get_engine, get_catalog_version
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CACHE_HITS = Counter("product_cache_hits_total", "Product rows served from the hydration cache")
+CACHE_MISSES = Counter("product_cache_misses_total", "Product rows fetched from PostgreSQL")
+FETCH_SECONDS = Histogram(
+    "product_hydration_fetch_seconds",
+    "Latency of the bulk product lookup",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+# Columns added to search hits (hits already carry sku, name, category)
+HYDRATED_COLUMNS = ["manufacturer", "description", "specifications", "datasheet_url", "pricing"]
+
+_MISSING = object()
+
+
+class ProductHydrator:
+    """
+    Enriches search hits with their full product rows from PostgreSQL.
+
+    All uncached SKUs of a result list are fetched in one query. Rows are kept
+    in an in-process LRU cache that is dropped whenever the catalog version
+    (row count + latest updated_at) changes, with a TTL as a backstop.
+    """
+
+    def __init__(self, max_size: int = None, ttl_seconds: float = None):
+        """
+        Args:
+            max_size (int): Maximum number of cached products (PRODUCT_CACHE_SIZE).
+            ttl_seconds (float): Age after which a row is fetched again (PRODUCT_CACHE_TTL).
+        """
+        self.max_size = max_size if max_size is not None else int(os.getenv("PRODUCT_CACHE_SIZE", "10000"))
+        self.ttl = ttl_seconds if ttl_seconds is not None else float(os.getenv("PRODUCT_CACHE_TTL", "3600"))
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # sku -> (row or None, stored_at)
+        self._lock = threading.Lock()
+
+    def hydrate(self, hits: List[Dict]) -> List[Dict]:
+        """
+        Returns copies of the hits with the product columns merged in.
+        Hits whose product row is missing are returned unchanged; on database
+        errors all hits are returned unchanged.
+        """
+        # pgvector hits already carry the full row
+        skus = [hit["sku"] for hit in hits if hit.get("sku") and "description" not in hit]
+        if not skus:
+            return hits
+
+        try:
+            self._check_version()
+            rows = self._get_many(skus)
+        except Exception as e:
+            logger.warning(f"Product hydration failed, using bare search hits: {e}")
+            return hits
+
+        hydrated = []
+        for hit in hits:
+            row = rows.get(hit.get("sku"))
+            if row:
+                hit = {**hit, **{k: v for k, v in row.items() if v is not None and hit.get(k) in (None, "")}}
+            hydrated.append(hit)
+        return hydrated
+
+    def invalidate(self, skus: Optional[List[str]] = None):
+        """Drops the given SKUs (or everything) from the cache, e.g. after an import."""
+        with self._lock:
+            if skus is None:
+                self._entries.clear()
+            else:
+                for sku in skus:
+                    self._entries.pop(sku, None)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+    def _check_version(self):
+        """Clears the cache when the catalog changed since the rows were cached."""
+        version = get_catalog_version()
+        with self._lock:
+            if version != self.version:
+                if self._entries:
+                    logger.info(f"Catalog changed ({self.version} -> {version}), clearing product cache.")
+                self._entries.clear()
+                self.version = version
+
+    def _get_many(self, skus: List[str]) -> Dict[str, Optional[Dict]]:
+        """Cached rows for the SKUs; misses are fetched in a single query."""
+        rows, missing = {}, []
+        now = time.monotonic()
+        with self._lock:
+            for sku in dict.fromkeys(skus):
+                entry = self._entries.get(sku, _MISSING)
+                if entry is not _MISSING and now - entry[1] < self.ttl:
+                    self._entries.move_to_end(sku)
+                    rows[sku] = entry[0]
+                else:
+                    missing.append(sku)
+            self.hits += len(rows)
+            self.misses += len(missing)
+        CACHE_HITS.inc(len(rows))
+        CACHE_MISSES.inc(len(missing))
+
+        if missing:
+            fetched = self._fetch(missing)
+            with self._lock:
+                for sku in missing:
+                    # Unknown SKUs are cached as None so they are not looked up on every request
+                    rows[sku] = fetched.get(sku)
+                    self._entries[sku] = (rows[sku], time.monotonic())
+                    self._entries.move_to_end(sku)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return rows
+
+    def _fetch(self, skus: List[str]) -> Dict[str, Dict]:
+        started = time.perf_counter()
+        with get_engine().connect() as conn:
+            result = conn.execute(
+                text(f"SELECT sku_id, {', '.join(HYDRATED_COLUMNS)} FROM products WHERE sku_id = ANY(:skus)"),
+                {"skus": skus},
+            ).mappings().all()
+        FETCH_SECONDS.observe(time.perf_counter() - started)
+        return {row["sku_id"]: {k: row[k] for k in HYDRATED_COLUMNS} for row in result}
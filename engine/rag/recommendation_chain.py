@@ -1,19 +1,27 @@
 import logging
-from typing import Dict, List, Any
+import os
+import re
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 
 from engine.translation.language_detector import LanguageDetector
 from engine.translation.translator import AutoTranslator
+from engine.translation.sentence_buffer import translate_stream
 
 from engine.llm.model_config import get_model
 from engine.llm.prompt_templates import get_rag_prompt, format_docs
 from engine.embeddings.search_engine import SearchEngine
+from engine.rag.product_hydrator import ProductHydrator
+from engine.rag.sku_index import SkuIndex, format_product_card
+from engine.rag.answer_cache import SemanticAnswerCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_ARABIC = re.compile(r"[\u0600-\u06FF]")
+
 class RecommendationChain:
     """
     Core RAG engine that combines retrieval (Vector DB) and generation (LLM)
@@ -23,9 +31,23 @@ class RecommendationChain:
     def __init__(self):
         self.llm = get_model()
         self.search_engine = SearchEngine()
+        # Full product rows (description, specs) for the prompt, cached in-process
+        self.hydrator = None
+        if os.getenv("PRODUCT_HYDRATION", "true").lower() in ("1", "true", "yes"):
+            self.hydrator = ProductHydrator()
         self.prompt = get_rag_prompt()
         self.output_parser = StrOutputParser()
         
+        # Known part numbers are answered directly, without embedding or LLM
+        self.sku_index = None
+        if os.getenv("SKU_FAST_PATH", "true").lower() in ("1", "true", "yes"):
+            self.sku_index = SkuIndex()
+
+        # Paraphrases of answered queries reuse the generated answer
+        self.answer_cache = None
+        if os.getenv("ANSWER_CACHE", "true").lower() in ("1", "true", "yes"):
+            self.answer_cache = SemanticAnswerCache()
+
         # Translation components
         self.detector = LanguageDetector()
         self.translator = AutoTranslator()
@@ -43,22 +65,28 @@ class RecommendationChain:
         Processes a user query (auto-translates if Arabic) and returns a recommendation.
         """
         logger.info(f"Processing RAG query: {user_query}")
+
+        # Fast path: the query is or contains a known part number
+        fast = self.lookup_part_numbers(user_query)
+        if fast:
+            return fast
         
         # 0. Language Detection & Translation
-        lang = self.detector.detect_language(user_query)
-        logger.info(f"Detected language: {lang}")
-        
-        query_to_search = user_query
-        if lang == 'ar':
-            query_to_search = self.translator.translate_to_english(user_query)
-            logger.info(f"Translated query: {query_to_search}")
+        lang, query_to_search = self._prepare_query(user_query)
 
         # 1. Retrieve Context
         try:
-            retrieved_products = self.search_engine.search_products(query_to_search, limit=top_k)
+            retrieved_products = self._retrieve(query_to_search, top_k)
         except Exception as e:
             logger.error(f"Retrieval failed: {e}")
             return {"answer": "I encountered an error searching for products." if lang == 'en' else "حدث خطأ أثناء البحث عن المنتجات.", "source_documents": [], "detected_language": lang}
+
+        # 1b. Reuse the answer of a near-identical query that retrieved the same products
+        query_vec = self._cached_query_vector(query_to_search)
+        if query_vec is not None:
+            cached = self._get_cached_answer(query_vec, retrieved_products, lang)
+            if cached:
+                return cached
         
         # 2. Generate Answer
         try:
@@ -76,11 +104,14 @@ class RecommendationChain:
             if lang == 'ar':
                 final_answer = self.translator.translate_to_arabic(answer_en)
 
-            return {
+            result = {
                 "answer": final_answer,
                 "source_documents": retrieved_products,
                 "detected_language": lang
             }
+            if query_vec is not None:
+                self._store_answer(query_to_search, query_vec, result, lang)
+            return result
             
         except Exception as e:
             logger.error(f"Generation failed: {e}")
@@ -94,6 +125,140 @@ class RecommendationChain:
                 "detected_language": lang
             }
 
+    def stream_recommendation(self, user_query: str, top_k: int = 5) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streaming variant of get_recommendation, yielding (event, data) pairs:
+
+        - ("sources", {"source_documents", "detected_language"[, "confidence"]}) as soon as retrieval finishes
+        - ("token", {"text"}) for each piece of the answer; Arabic answers arrive sentence by sentence,
+          each translated while the LLM keeps generating
+        - ("done", {"answer", "cached"}) with the full answer, or ("error", {"message"})
+        """
+        logger.info(f"Processing streaming RAG query: {user_query}")
+
+        fast = self.lookup_part_numbers(user_query)
+        if fast:
+            yield "sources", {k: v for k, v in fast.items() if k != "answer"}
+            yield "token", {"text": fast["answer"]}
+            yield "done", {"answer": fast["answer"], "cached": False}
+            return
+
+        lang, query_to_search = self._prepare_query(user_query)
+        try:
+            retrieved_products = self._retrieve(query_to_search, top_k)
+        except Exception as e:
+            logger.error(f"Retrieval failed: {e}")
+            yield "error", {"message": "I encountered an error searching for products." if lang == 'en' else "حدث خطأ أثناء البحث عن المنتجات."}
+            return
+
+        query_vec = self._cached_query_vector(query_to_search)
+        cached = self._get_cached_answer(query_vec, retrieved_products, lang) if query_vec is not None else None
+        if cached:
+            yield "sources", {"source_documents": cached["source_documents"], "detected_language": lang}
+            yield "token", {"text": cached["answer"]}
+            yield "done", {"answer": cached["answer"], "cached": True}
+            return
+
+        yield "sources", {"source_documents": retrieved_products, "detected_language": lang}
+
+        pieces = []
+        try:
+            tokens = self.chain.stream({"context": retrieved_products, "question": query_to_search})
+            if lang == 'ar':
+                tokens = self._translate_stream(tokens)
+            for text in tokens:
+                pieces.append(text)
+                yield "token", {"text": text}
+        except Exception as e:
+            logger.error(f"Streaming generation failed: {e}")
+            yield "error", {"message": "وجدت بعض المنتجات ولكن فشلت في تقديم توصية." if lang == 'ar'
+                            else "I found some products but failed to generate a recommendation."}
+            return
+
+        answer = "".join(pieces)
+        if query_vec is not None:
+            self._store_answer(query_to_search, query_vec,
+                               {"answer": answer, "source_documents": retrieved_products, "detected_language": lang}, lang)
+        yield "done", {"answer": answer, "cached": False}
+
+    def _translate_stream(self, tokens: Iterable[str]) -> Iterator[str]:
+        """
+        Translates an English token stream to Arabic sentence by sentence.
+        Translations run on a worker thread, overlapping with generation; output order is kept.
+        """
+        return translate_stream(tokens, self.translator.translate_to_arabic)
+
+    def _prepare_query(self, user_query: str) -> Tuple[str, str]:
+        """Detected language and the English query used for retrieval and generation."""
+        lang = self.detector.detect_language(user_query)
+        logger.info(f"Detected language: {lang}")
+
+        query_to_search = user_query
+        if lang == 'ar':
+            query_to_search = self.translator.translate_to_english(user_query)
+            logger.info(f"Translated query: {query_to_search}")
+        return lang, query_to_search
+
+    def _retrieve(self, query: str, top_k: int) -> List[Dict]:
+        """Search hits, hydrated with their product rows when enabled."""
+        retrieved_products = self.search_engine.search_products(query, limit=top_k)
+        if self.hydrator:
+            retrieved_products = self.hydrator.hydrate(retrieved_products)
+        return retrieved_products
+
+    def _cached_query_vector(self, query: str):
+        """Query embedding for the answer cache (a query-cache hit after retrieval), or None."""
+        if not self.answer_cache:
+            return None
+        try:
+            query_vec = self.search_engine.embed_query(query)
+        except Exception as e:
+            logger.warning(f"Answer cache unavailable: {e}")
+            return None
+        return query_vec if len(query_vec) > 0 else None
+
+    def _get_cached_answer(self, query_vec, retrieved_products: List[Dict], lang: str) -> Optional[Dict[str, Any]]:
+        """A cached answer with this query's products (current rows and order) as its sources, or None."""
+        try:
+            cached = self.answer_cache.get(query_vec, [p.get("sku") for p in retrieved_products if p.get("sku")], lang)
+        except Exception as e:
+            logger.warning(f"Answer cache lookup failed: {e}")
+            return None
+        return {**cached, "source_documents": retrieved_products} if cached else None
+
+    def _store_answer(self, query: str, query_vec, result: Dict[str, Any], lang: str):
+        """Caches a generated answer; a failing cache (e.g. catalog version check) never loses the answer."""
+        try:
+            self.answer_cache.put(query, query_vec, result, lang)
+        except Exception as e:
+            logger.warning(f"Answer cache store failed: {e}")
+
+    def lookup_part_numbers(self, user_query: str) -> Optional[Dict[str, Any]]:
+        """
+        Answers from the SKU index when the query names known part numbers.
+        Returns None (run the full chain) otherwise or if the index is unavailable.
+        """
+        if not self.sku_index:
+            return None
+        try:
+            self.sku_index.maybe_refresh()
+            products = self.sku_index.lookup(user_query)
+        except Exception as e:
+            logger.warning(f"SKU fast path unavailable: {e}")
+            return None
+        if not products:
+            return None
+
+        # A script check is enough to pick the answer language; no detector or translator call
+        lang = 'ar' if _ARABIC.search(user_query) else 'en'
+        logger.info(f"Part-number match: {[p['sku'] for p in products]}")
+        return {
+            "answer": "\n\n".join(format_product_card(p, lang) for p in products),
+            "source_documents": [{**p, "score": 1.0} for p in products],
+            "detected_language": lang,
+            "confidence": 1.0,
+        }
+
 if __name__ == "__main__":
     # Simple test
     try:
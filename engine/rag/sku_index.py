@@ -0,0 +1,142 @@
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_ALNUM = re.compile(r"[A-Za-z0-9]+")
+_DIGIT = re.compile(r"\d")
+
+# Shorter codes ("100", "M12") collide with ordinary query words
+MIN_SKU_LENGTH = 5
+
+
+def normalize_sku(value: str) -> str:
+    """Upper-cased alphanumerics only, so "wl12g-3b2531" and "WL12G 3B2531" share a key."""
+    return "".join(_ALNUM.findall(value)).upper()
+
+
+def _indexable(key: str) -> bool:
+    return len(key) >= MIN_SKU_LENGTH and bool(_DIGIT.search(key))
+
+
+class _TrieNode:
+    __slots__ = ("children", "sku")
+
+    def __init__(self):
+        self.children = {}
+        self.sku = None
+
+
+class SkuIndex:
+    """
+    In-memory part-number index loaded from the products table.
+
+    A hash map answers queries that are exactly a SKU; a character trie over
+    normalized SKUs finds part numbers inside longer queries, including ones
+    split by spaces or hyphens ("need WL12G 3B2531 replacement"). Each SKU maps
+    to a small product card. Reloaded when the catalog version changes.
+    """
+
+    def __init__(self):
+        self._cards = {}  # normalized sku -> product card
+        self._root = _TrieNode()
+        self._version = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def load(self, products: Iterable[Dict]):
+        """Replaces the index with the given product cards (must contain sku)."""
+        cards, root = {}, _TrieNode()
+        for product in products:
+            key = normalize_sku(product["sku"])
+            if not _indexable(key):
+                continue
+            cards[key] = product
+            node = root
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+            node.sku = key
+        # Swap in one step so concurrent lookups see either the old or the new index
+        self._cards, self._root = cards, root
+
+    def lookup(self, query: str) -> List[Dict]:
+        """
+        Product cards of the known part numbers in a query, in order of appearance.
+        Only whole-token matches count: "WL12G" does not match inside "WL12G-3B2531".
+        """
+        cards, root = self._cards, self._root
+        key = normalize_sku(query)
+        if key in cards:
+            return [cards[key]]
+
+        tokens = _ALNUM.findall(query.upper())
+        text = "".join(tokens)
+        starts, ends, position = [], set(), 0
+        for token in tokens:
+            starts.append(position)
+            position += len(token)
+            ends.add(position)
+
+        found = []
+        for start in starts:
+            node, longest = root, None
+            for i in range(start, len(text)):
+                node = node.children.get(text[i])
+                if node is None:
+                    break
+                if node.sku and i + 1 in ends:
+                    longest = node.sku
+            if longest and cards[longest] not in found:
+                found.append(cards[longest])
+        return found
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reloads from PostgreSQL if the catalog changed. Returns True if reloaded."""
+        from sqlalchemy import text
+        from engine.database import get_engine, get_catalog_version
+
+        version = get_catalog_version()
+        if version == self._version and not force:
+            return False
+        started = time.perf_counter()
+        with get_engine().connect() as conn:
+            rows = conn.execute(text("""
+                SELECT sku_id, product_name, category, manufacturer, description, datasheet_url FROM products
+            """)).fetchall()
+        self.load({
+            "sku": r[0], "name": r[1], "category": r[2], "manufacturer": r[3], "description": r[4], "datasheet_url": r[5],
+        } for r in rows)
+        self._version = version
+        logger.info(f"SKU index loaded: {len(self)} part numbers ({time.perf_counter() - started:.2f}s).")
+        return True
+
+    def maybe_refresh(self, interval: float = None):
+        """Runs refresh at most every `interval` seconds (SKU_INDEX_REFRESH_SECONDS)."""
+        if interval is None:
+            interval = float(os.getenv("SKU_INDEX_REFRESH_SECONDS", "30"))
+        with self._lock:
+            now = time.monotonic()
+            if self._version is not None and now - self._last_check < interval:
+                return
+            self._last_check = now
+            self.refresh()
+
+
+def format_product_card(product: Dict, lang: str = "en") -> str:
+    """Plain-text answer for a direct part-number hit (labels localized, values as stored)."""
+    labels = {
+        "en": ("Product Name", "Part Number (SKU)", "Manufacturer", "Category", "Description", "Datasheet"),
+        "ar": ("اسم المنتج", "رقم القطعة", "الشركة المصنعة", "الفئة", "الوصف", "ورقة البيانات"),
+    }[lang if lang == "ar" else "en"]
+    values = (product.get("name"), product.get("sku"), product.get("manufacturer"), product.get("category"),
+              product.get("description"), product.get("datasheet_url"))
+    return "\n".join(f"{label}: {value}" for label, value in zip(labels, values) if value)
@@ -1,2 +1,13 @@
-from .language_detector import LanguageDetector
-from .translator import AutoTranslator
+# Submodules are imported on first use, so light helpers (sentence_buffer)
+# don't pull in the language detector and translation models
+_EXPORTS = {
+    "LanguageDetector": ".language_detector",
+    "AutoTranslator": ".translator",
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        from importlib import import_module
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,66 @@
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List
+
+# End of a sentence: terminal punctuation followed by whitespace, or a line break ("1.5 mm" is not one)
+_BOUNDARY = re.compile(r"(?<=[.!?؟:])\s+|\n+")
+
+
+class SentenceBuffer:
+    """
+    Collects streamed text and releases it in whole sentences, so each piece
+    can be translated with its full context.
+
+    Pieces shorter than `min_chars` are merged with the next sentence to keep
+    the number of translation calls down.
+    """
+
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self._text = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Adds streamed text; returns the sentences completed by it."""
+        self._text += text
+        sentences, start = [], 0
+        for match in _BOUNDARY.finditer(self._text):
+            if match.start() - start < self.min_chars:
+                continue
+            sentences.append(self._text[start:match.end()])
+            start = match.end()
+        self._text = self._text[start:]
+        return sentences
+
+    def flush(self) -> str:
+        """The remaining text (the last, unterminated sentence)."""
+        rest, self._text = self._text, ""
+        return rest
+
+
+def translate_stream(tokens: Iterable[str], translate: Callable[[str], str], min_chars: int = 20) -> Iterator[str]:
+    """
+    Translates a token stream sentence by sentence, in order.
+
+    Translations run on a worker thread, overlapping with the producer of
+    `tokens`; finished sentences are yielded as soon as all earlier ones are.
+    Whitespace after a sentence is kept as is.
+    """
+    buffer = SentenceBuffer(min_chars)
+    pending = deque()
+
+    def translate_sentence(sentence: str) -> str:
+        stripped = sentence.rstrip()
+        return translate(stripped) + sentence[len(stripped):]
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream-translate") as executor:
+        for token in tokens:
+            for sentence in buffer.feed(token):
+                pending.append(executor.submit(translate_sentence, sentence))
+            while pending and pending[0].done():
+                yield pending.popleft().result()
+        rest = buffer.flush()
+        if rest.strip():
+            pending.append(executor.submit(translate_sentence, rest))
+        while pending:
+            yield pending.popleft().result()
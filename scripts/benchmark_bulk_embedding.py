@@ -0,0 +1,57 @@
+import sys
+import os
+import time
+import random
+import argparse
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from engine.embeddings.embedding_model import EmbeddingModel
+
+NAMES = ["Inductive Proximity Sensor", "Safety Light Curtain", "Photoelectric Sensor", "Fiber Optic Cable", "Encoder", "Distance Sensor"]
+CATEGORIES = ["Sensors", "Safety", "Fiber Optic Cables", "Encoders", "Distance Sensors"]
+DESCRIPTION_WORDS = (
+    "IO-Link M12 PNP NPN sensing range housing stainless steel IP67 IP69K connector cable "
+    "supply voltage output function switching frequency temperature transparent objects laser "
+    "red light time-of-flight resolution accuracy repeatability mounting bracket"
+).split()
+
+def synthetic_catalog(size: int, seed: int = 42):
+    """Product texts built like index_product_batch: short names to long descriptions."""
+    rng = random.Random(seed)
+    texts = []
+    for i in range(size):
+        # Most products have short or no descriptions, a few have long ones
+        words = rng.choice([0, 0, 5, 10, 20, 40, 120, 250])
+        description = " ".join(rng.choice(DESCRIPTION_WORDS) for _ in range(words))
+        texts.append(f"{rng.choice(NAMES)} {i} {rng.choice(CATEGORIES)} {description}".strip())
+    return texts
+
+def run(label: str, fn, texts) -> float:
+    start = time.perf_counter()
+    fn(texts)
+    rate = len(texts) / (time.perf_counter() - start)
+    print(f"{label:<24} {rate:>10.1f} products/s")
+    return rate
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Products/s of database-order vs length-bucketed bulk embedding")
+    parser.add_argument("--size", type=int, default=2000, help="Synthetic catalog size")
+    parser.add_argument("--batch-size", type=int, default=32, help="Texts per forward pass in the database-order baseline")
+    args = parser.parse_args()
+
+    model = EmbeddingModel()
+    texts = synthetic_catalog(args.size)
+    model.embed_text(texts[:32])  # Warm-up
+
+    def database_order(items):
+        # One encode call per fixed-size batch: SentenceTransformer length-sorts inside
+        # encode, so passing more than one forward pass per call would not be a DB-order baseline
+        for i in range(0, len(items), args.batch_size):
+            batch = items[i:i + args.batch_size]
+            model.model.encode(batch, batch_size=len(batch))
+
+    before = run("database order", database_order, texts)
+    after = run("length bucketed", model.embed_bulk, texts)
+    print(f"speedup: {after / before:.2f}x")
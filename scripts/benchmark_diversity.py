@@ -0,0 +1,37 @@
+import sys
+import os
+import time
+import argparse
+
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from engine.embeddings.diversity import mmr_select
+
+def benchmark(pool: int, dim: int, k: int, families: int, rounds: int) -> float:
+    """Returns milliseconds per mmr_select call over a random candidate pool."""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(pool, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    relevance = np.sort(rng.random(pool).astype(np.float32))[::-1]
+    labels = [f"F{i % families}" for i in range(pool)]
+
+    mmr_select(relevance, vectors, k, 0.7, labels)  # Warm-up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        mmr_select(relevance, vectors, k, 0.7, labels)
+    return (time.perf_counter() - start) / rounds * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure MMR selection latency on the re-ranked candidate pool")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--families", type=int, default=10, help="Distinct SKU families in the pool")
+    parser.add_argument("--rounds", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'pool':>6} {'ms/call':>10}")
+    for pool in (20, 50, 100, 200):
+        print(f"{pool:>6} {benchmark(pool, args.dim, args.k, args.families, args.rounds):>10.3f}")
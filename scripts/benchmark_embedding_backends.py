@@ -0,0 +1,45 @@
+import sys
+import os
+import time
+import argparse
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from engine.embeddings.embedding_model import EmbeddingModel
+
+SAMPLE_TEXTS = [
+    "SICK distance sensor",
+    "Inductive Proximity Sensor Sensors IO-Link M12 PNP 4mm sensing range",
+    "Safety Light Curtain Safety Type 4 protective device with 30 mm resolution for hand protection",
+    "Photoelectric retro-reflective sensor for detecting transparent objects such as PET bottles and glass",
+]
+
+def benchmark(backend: str, quantize: bool, texts, batch_size: int, rounds: int) -> float:
+    """Returns embeddings per second for one backend configuration."""
+    os.environ["EMBEDDING_BACKEND"] = backend
+    os.environ["EMBEDDING_ONNX_QUANTIZE"] = "true" if quantize else "false"
+    model = EmbeddingModel()
+
+    model.embed_text(texts[:batch_size])  # Warm-up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for i in range(0, len(texts), batch_size):
+            model.embed_text(texts[i:i + batch_size])
+    elapsed = time.perf_counter() - start
+    return rounds * len(texts) / elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare embedding throughput of the torch and ONNX backends")
+    parser.add_argument("--texts", type=int, default=512, help="Number of texts per round")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] + f" variant {i}" for i in range(args.texts)]
+
+    print(f"{'backend':<12} {'texts/s':>10}")
+    for backend, quantize in [("torch", False), ("onnx", False), ("onnx", True)]:
+        label = f"{backend}-int8" if quantize else backend
+        rate = benchmark(backend, quantize, texts, args.batch_size, args.rounds)
+        print(f"{label:<12} {rate:>10.1f}")
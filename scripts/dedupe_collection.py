@@ -0,0 +1,61 @@
+import sys
+import os
+import logging
+import argparse
+from collections import defaultdict
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from pymilvus import utility
+from engine.embeddings.vector_indexer import VectorIndexer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def dedupe_collection(collection_name: str = "products", dry_run: bool = False):
+    """
+    One-off cleanup for collections filled by repeated insert-only indexing runs.
+    Keeps the newest row of every product_id, deletes the rest and compacts the segments.
+    """
+    indexer = VectorIndexer(collection_name=collection_name)
+    if not utility.has_collection(collection_name):
+        logger.error(f"Collection '{collection_name}' does not exist.")
+        return
+    indexer.create_collection()  # Loads the existing collection
+
+    if indexer.keyed_by_product_id:
+        logger.info("Collection is keyed by product_id; duplicates cannot accumulate. Compacting only.")
+        duplicate_ids = []
+    else:
+        # auto_id keys grow with insertion time, so the largest id is the latest row
+        rows_by_product = defaultdict(list)
+        for batch in indexer.iter_rows(["id", "product_id"]):
+            for row in batch:
+                rows_by_product[row["product_id"]].append(row["id"])
+
+        duplicate_ids = [pk for ids in rows_by_product.values() for pk in sorted(ids)[:-1]]
+        total = sum(len(ids) for ids in rows_by_product.values())
+        logger.info(f"{total} rows for {len(rows_by_product)} products; {len(duplicate_ids)} duplicates.")
+
+    if dry_run:
+        return
+
+    for start in range(0, len(duplicate_ids), 1000):
+        chunk = duplicate_ids[start:start + 1000]
+        indexer.collection.delete(expr=f"id in {chunk}")
+    indexer.collection.flush()
+
+    # Physically drop deleted rows and merge the many small segments
+    indexer.collection.compact()
+    indexer.collection.wait_for_compaction_completed()
+    logger.info(f"Deleted {len(duplicate_ids)} duplicates; compaction finished ({indexer.collection.num_entities} rows).")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove duplicate product rows from the Milvus collection and compact it")
+    parser.add_argument("--collection", default="products")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many duplicates exist")
+    args = parser.parse_args()
+
+    dedupe_collection(args.collection, dry_run=args.dry_run)
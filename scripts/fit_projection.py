@@ -0,0 +1,63 @@
+import sys
+import os
+import logging
+import argparse
+import numpy as np
+from sqlalchemy import create_engine, text
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from engine.database import get_database_url
+from engine.embeddings.embedding_model import EmbeddingModel
+from engine.embeddings.search_engine import SearchEngine
+from engine.embeddings.projection import PCAProjection, recall_report
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def load_catalog_texts():
+    """Product texts exactly as SearchEngine.index_product_batch embeds them."""
+    engine = create_engine(get_database_url())
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT product_name, category, description FROM products")).fetchall()
+    return [SearchEngine.product_text({"name": r[0], "category": r[1], "description": r[2] or ""}) for r in rows]
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit a PCA projection for the product index and report recall vs dimension")
+    parser.add_argument("--dim", type=int, default=128, help="Target dimension of the saved projection")
+    parser.add_argument("--output", default=os.path.join("engine", "model_data", "projection.npz"), help="Where to save the projection (set EMBEDDING_PROJECTION_PATH to it)")
+    parser.add_argument("--report-dims", default="32,64,96,128,192,256", help="Dimensions to include in the recall report")
+    parser.add_argument("--queries", help="Optional file with one real user query per line (default: sampled catalog items)")
+    parser.add_argument("--sample", type=int, default=500, help="Number of catalog items used as queries when --queries is not given")
+    parser.add_argument("--k", type=int, default=10, help="Recall depth")
+    args = parser.parse_args()
+
+    texts = load_catalog_texts()
+    logger.info(f"Embedding {len(texts)} catalog products...")
+    model = EmbeddingModel()
+    vectors = model.embed_bulk(texts)
+
+    if args.queries:
+        with open(args.queries, "r") as f:
+            queries = model.embed_bulk([line.strip() for line in f if line.strip()])
+        exclude_self = False
+    else:
+        rng = np.random.default_rng(0)
+        queries = vectors[rng.choice(len(vectors), size=min(args.sample, len(vectors)), replace=False)]
+        exclude_self = True
+
+    dims = sorted({int(d) for d in args.report_dims.split(",")} | {args.dim})
+    report = recall_report(vectors, queries, dims, k=args.k, exclude_self=exclude_self)
+
+    print(f"\nRecall@{args.k} vs full {vectors.shape[1]}-d exact search ({len(queries)} queries)")
+    print(f"{'dim':>6} {'recall':>8} {'bytes/vector':>14}")
+    for dim, recall in report.items():
+        print(f"{dim:>6} {recall:>8.3f} {dim * 4:>14}")
+
+    PCAProjection.fit(vectors, args.dim).save(args.output)
+    print(f"\nSaved {args.dim}-d projection to {args.output}. Re-index after enabling it (EMBEDDING_PROJECTION_PATH).")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import sys
 import os
 import logging
+import argparse
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 import time
@@ -8,24 +9,26 @@ import time
 # Add project root to sys.path
 sys.path.append(os.getcwd())
 
+from engine.database import get_database_url
 from engine.embeddings.search_engine import SearchEngine
+from engine.embeddings.worker_pool import EmbeddingWorkerPool
+from engine.embeddings.buffered_writer import BufferedVectorWriter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Database config (Defaults match docker-compose.yml)
-DB_USER = os.getenv("POSTGRES_USER", "postgres")
-DB_PASSWORD = os.getenv("POSTGRES_PASSWORD", "secure_password")
-DB_HOST = os.getenv("POSTGRES_HOST", "postgres")
-DB_PORT = os.getenv("POSTGRES_PORT", "5432")
-DB_NAME = os.getenv("POSTGRES_DB", "automation_engine")
-
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-
-def index_all_products():
+def index_all_products(compact_store: bool = False, batch_size: int = 100, workers: int = 1, prune: bool = True):
     """
     Fetches all products from PostgreSQL and re-indexes them in Milvus.
+    
+    Args:
+        batch_size (int): Products fetched and embedded per round. Larger batches give
+                          the length-bucketed embedder more texts to group.
+        workers (int): Embedding worker processes (1 = embed in this process).
+        prune (bool): Delete vectors of products that are no longer in the catalog.
+        compact_store (bool): After the run, drop embedding-store entries for products
+                              whose text no longer exists in the catalog.
     """
     logger.info("Starting bulk indexing job...")
     
@@ -37,13 +40,26 @@ def index_all_products():
         logger.error(f"Failed to init Search Engine: {e}")
         return
 
+    pool = None
+    if workers > 1:
+        pool = EmbeddingWorkerPool(workers, model_name=search_engine.embedder.model_name)
+        search_engine.bulk_embedder = pool
+
+    # Insert in large chunks from a background thread; flush once at the end
+    writer = BufferedVectorWriter(search_engine.indexer)
+    search_engine.writer = writer
+
+    store = search_engine.embedding_store
+    if store:
+        store.begin_run()
+
     # 2. Connect to Database (using raw SQL for simplicity/speed)
-    engine = create_engine(DATABASE_URL)
+    engine = create_engine(get_database_url())
     
     # 3. Fetch Products
-    batch_size = 100
-    offset = 0
+    last_sku_id = None
     total_indexed = 0
+    seen_product_ids = set()
     
     with engine.connect() as conn:
         try:
@@ -54,14 +70,18 @@ def index_all_products():
             
             while True:
                 # Fetch batch
-                # Assuming 'id' is the primary key (UUID) and stored as string
+                # sku_id is the primary key and doubles as the vector product_id. Keyset
+                # pagination on it never skips or repeats rows, unlike OFFSET over the
+                # non-unique created_at, and is not shifted by concurrent inserts/deletes.
+                where = "WHERE sku_id > :last_sku_id" if last_sku_id is not None else ""
                 query = text(f"""
-                    SELECT id, sku_id, product_name, category, description, specifications 
+                    SELECT sku_id AS product_id, sku_id, product_name, category, description, specifications, manufacturer 
                     FROM products 
-                    ORDER BY created_at DESC 
-                    LIMIT {batch_size} OFFSET {offset}
+                    {where}
+                    ORDER BY sku_id 
+                    LIMIT {batch_size}
                 """)
-                result = conn.execute(query)
+                result = conn.execute(query, {"last_sku_id": last_sku_id})
                 rows = result.fetchall()
                 
                 if not rows:
@@ -71,31 +91,70 @@ def index_all_products():
                 products_batch = []
                 for row in rows:
                     products_batch.append({
-                        "product_id": str(row[0]), # UUID to string
+                        "product_id": row[0],
                         "sku": row[1],
                         "name": row[2],
                         "category": row[3],
-                        "description": row[4] or "" # Handle NULLs
+                        "description": row[4] or "", # Handle NULLs
+                        "manufacturer": row[6]
                     })
                 
-                logger.info(f"Indexing batch {offset} to {offset + len(products_batch)}...")
+                logger.info(f"Indexing batch {total_indexed} to {total_indexed + len(products_batch)}...")
                 
                 # 4. Index Batch
                 search_engine.index_product_batch(products_batch)
                 
+                seen_product_ids.update(p["product_id"] for p in products_batch)
                 total_indexed += len(products_batch)
-                offset += batch_size
+                last_sku_id = rows[-1][1]
                 
                 # Sleep briefly to give CPU a break if needed
                 # time.sleep(0.1)
 
-            logger.info(f"Bulk indexing complete. Total indexed: {total_indexed}")
+            writer.close()
+
+            # pgvector keeps embeddings in the product rows, so removed products take theirs with them
+            if prune and not getattr(search_engine.indexer, "embeds_in_catalog", False):
+                # Only prune when the run saw exactly the current catalog; a mismatch means
+                # products changed mid-run and a live one might have been missed
+                current_total = conn.execute(text("SELECT COUNT(*) FROM products")).scalar()
+                if len(seen_product_ids) != current_total:
+                    logger.warning(
+                        f"Skipping prune: saw {len(seen_product_ids)} products but the catalog now has {current_total}."
+                    )
+                else:
+                    stale = list(search_engine.indexer.list_product_ids() - seen_product_ids)
+                    if stale:
+                        deleted = search_engine.indexer.delete_products(stale)
+                        logger.info(f"Pruned {deleted} vectors of {len(stale)} products no longer in the catalog.")
+            logger.info(f"Bulk indexing complete. Total indexed: {total_indexed} ({writer.stats()})")
+
+            if store:
+                if compact_store:
+                    store.compact()
+                store.save()
 
         except Exception as e:
             logger.error(f"Database error: {e}")
             raise e
+        finally:
+            search_engine.writer = None
+            # Drain and stop the writer on the error path too; no-op if already closed
+            try:
+                writer.close()
+            except Exception as close_error:
+                logger.error(f"Failed to close vector writer: {close_error}")
+            if pool:
+                pool.close()
 
 if __name__ == "__main__":
     # Wait for DB services to be fully ready if running in docker-compose startup
     # time.sleep(5) 
-    index_all_products()
+    parser = argparse.ArgumentParser(description="Re-index all products from PostgreSQL into the vector database")
+    parser.add_argument("--compact", action="store_true", help="Drop stale entries from the embedding store (EMBEDDING_STORE_PATH) after the run")
+    parser.add_argument("--batch-size", type=int, default=100, help="Products fetched and embedded per round")
+    parser.add_argument("--workers", type=int, default=1, help="Embedding worker processes, each with its own model (combine with a larger --batch-size)")
+    parser.add_argument("--no-prune", action="store_true", help="Keep vectors of products that were removed from the catalog")
+    args = parser.parse_args()
+
+    index_all_products(compact_store=args.compact, batch_size=args.batch_size, workers=args.workers, prune=not args.no_prune)
@@ -0,0 +1,57 @@
+import sys
+import os
+import logging
+import argparse
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from engine.embeddings.embedding_model import EmbeddingModel
+from engine.embeddings.backends import create_vector_indexer
+from engine.embeddings.quantization import quantization_report
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall and memory of int8 / binary vector codes, with and without float32 re-ranking")
+    parser.add_argument("--queries", help="Optional file with one real user query per line (default: sampled catalog items)")
+    parser.add_argument("--sample", type=int, default=500, help="Number of catalog items used as queries when --queries is not given")
+    parser.add_argument("--k", type=int, default=10, help="Recall depth")
+    parser.add_argument("--candidates", default="50,100,200,400", help="Re-ranking depths to evaluate")
+    args = parser.parse_args()
+
+    # Vectors exactly as stored by the configured backend (VECTOR_BACKEND)
+    model = EmbeddingModel()
+    indexer = create_vector_indexer()
+    indexer.create_collection(dim=model.get_dimension())
+    vectors = np.asarray([row["embedding"] for batch in indexer.iter_rows(["embedding"]) for row in batch], dtype=np.float32)
+    if not len(vectors):
+        logger.error("The index is empty; run scripts/index_all_products.py first.")
+        return
+    logger.info(f"Loaded {len(vectors)} stored vectors (dim={vectors.shape[1]}).")
+
+    if args.queries:
+        with open(args.queries, "r") as f:
+            queries = model.embed_bulk([line.strip() for line in f if line.strip()])
+        if indexer.projection is not None:
+            queries = indexer.projection.apply(queries)
+        exclude_self = False
+    else:
+        rng = np.random.default_rng(0)
+        queries = vectors[rng.choice(len(vectors), size=min(args.sample, len(vectors)), replace=False)]
+        exclude_self = True
+
+    candidates = [int(c) for c in args.candidates.split(",")]
+    report = quantization_report(vectors, queries, k=args.k, candidates=candidates, exclude_self=exclude_self)
+
+    print(f"\nRecall@{args.k} vs exact float32 search ({len(queries)} queries, {len(vectors)} vectors)")
+    print(f"{'method':>14} {'candidates':>11} {'recall':>8} {'bytes/vector':>14} {'codes MB':>10}")
+    for row in report:
+        print(f"{row['method']:>14} {row['candidates'] or '-':>11} {row['recall']:>8.3f} {row['bytes_per_vector']:>14} {row['index_mb']:>10}")
+    print("\nEnable with VECTOR_QUANTIZATION=int8|binary and VECTOR_RERANK_CANDIDATES, then re-index.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import sys
+import os
+import logging
+import argparse
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from engine.embeddings.vector_indexer import VectorIndexer
+from engine.embeddings.index_tuning import tune_collection, config_path
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Choose and tune the vector index of the product collection for a target recall")
+    parser.add_argument("--collection", default="products")
+    parser.add_argument("--target-recall", type=float, default=0.95, help="Minimum recall@k against exact search")
+    parser.add_argument("--queries", type=int, default=200, help="Stored vectors sampled as tuning queries")
+    parser.add_argument("--k", type=int, default=10, help="Recall depth")
+    args = parser.parse_args()
+
+    indexer = VectorIndexer(collection_name=args.collection)
+    indexer.create_collection()  # Loads the existing collection
+    config = tune_collection(indexer, target_recall=args.target_recall, num_queries=args.queries, top_k=args.k)
+
+    print(f"\nIndex: {config['index']['index_type']} {config['index']['params']}")
+    print(f"Search params: {config['search_params'] or 'exact'}")
+    print(f"Recall@{config['top_k']}: {config['measured_recall']} ({config['latency_ms_per_query']} ms/query)")
+    print(f"Saved to {config_path()}; VectorIndexer picks it up on next start.")
@@ -12,7 +12,7 @@ echo "=============================================="
 # 1. Database Migrations
 echo ""
 echo "🛠️  Step 1: Running Database Migrations..."
-docker exec automation-engine alembic upgrade head
+docker exec automation-engine alembic upgrade main@head
 echo "✅ Database schema up to date."
 
 # 2. Scraping Data (SICK)
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from engine.rag.answer_cache import SemanticAnswerCache
+
+def _result(answer, skus):
+    return {"answer": answer, "source_documents": [{"sku": s} for s in skus], "detected_language": "en"}
+
+def _cache(version, **kwargs):
+    return SemanticAnswerCache(threshold=0.9, min_sku_overlap=0.6, ttl_seconds=3600, version_fn=lambda: version[0], **kwargs)
+
+def test_paraphrase_hit_requires_similarity_language_and_sku_overlap():
+    version = ["v1"]
+    cache = _cache(version, max_size=10)
+    base = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+    paraphrase = np.array([0.98, 0.1, 0.0], dtype=np.float32)
+    cache.put("laser distance sensor high precision", base, _result("A", ["S1", "S2", "S3"]), "en")
+
+    assert cache.get(paraphrase, ["S1", "S2", "S3"], "en")["answer"] == "A"
+    assert cache.get(paraphrase, ["S1", "S2", "S3"], "ar") is None
+    assert cache.get(paraphrase, ["S1", "S7", "S8"], "en") is None
+    assert cache.get(np.array([0.0, 1.0, 0.0]), ["S1", "S2", "S3"], "en") is None
+
+    # New catalog version drops cached answers
+    version[0] = "v2"
+    assert cache.get(base, ["S1", "S2", "S3"], "en") is None
+    assert cache.stats()["size"] == 0
+
+def test_size_eviction_keeps_recently_used():
+    cache = _cache(["v1"], max_size=2)
+    vectors = np.eye(3, dtype=np.float32)
+    for i in range(2):
+        cache.put(f"q{i}", vectors[i], _result(f"A{i}", [f"S{i}"]), "en")
+    assert cache.get(vectors[0], ["S0"], "en")["answer"] == "A0"
+    cache.put("q2", vectors[2], _result("A2", ["S2"]), "en")
+
+    assert cache.get(vectors[1], ["S1"], "en") is None
+    assert cache.get(vectors[0], ["S0"], "en")["answer"] == "A0"
+    assert cache.get(vectors[2], ["S2"], "en")["answer"] == "A2"
+
+def test_cached_answer_is_served_with_current_sources():
+    pytest.importorskip("langchain_core")
+    from engine.rag.recommendation_chain import RecommendationChain
+
+    class FakeSearchEngine:
+        def __init__(self):
+            self.hits = [{"sku": "S1", "price": 10}, {"sku": "S2", "price": 20}]
+
+        def search_products(self, query, limit=5):
+            return [dict(hit) for hit in self.hits]
+
+        def embed_query(self, query):
+            return np.array([1.0, 0.0, 0.0], dtype=np.float32)
+
+    chain = RecommendationChain.__new__(RecommendationChain)
+    chain.search_engine = FakeSearchEngine()
+    chain.hydrator = chain.sku_index = None
+    chain.answer_cache = _cache(["v1"], max_size=10)
+    chain.detector = SimpleNamespace(detect_language=lambda query: "en")
+    chain.chain = SimpleNamespace(invoke=lambda data: "Take S1.", stream=lambda data: iter(["Take S1."]))
+
+    assert chain.get_recommendation("sensor")["answer"] == "Take S1."
+    # Same products, re-ordered and with changed rows: the answer is reused, the sources are current
+    chain.search_engine.hits = [{"sku": "S2", "price": 25}, {"sku": "S1", "price": 10}]
+    result = chain.get_recommendation("sensor")
+    assert result["cached"] and result["answer"] == "Take S1."
+    assert result["source_documents"] == [{"sku": "S2", "price": 25}, {"sku": "S1", "price": 10}]
+
+    events = dict(chain.stream_recommendation("sensor"))
+    assert events["done"] == {"answer": "Take S1.", "cached": True}
+    assert events["sources"]["source_documents"] == [{"sku": "S2", "price": 25}, {"sku": "S1", "price": 10}]
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from engine.embeddings.batching import BatchingEmbedder
+
+class FakeModel:
+    """Encodes each text as [len(text), index] and records the texts of every call."""
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def embed_array(self, texts):
+        self.calls.append(list(texts))
+        self.started.set()
+        self.release.wait(5)
+        if self.fail:
+            raise ValueError("encode failed")
+        return np.array([[len(t), i] for i, t in enumerate(texts)], dtype=np.float32)
+
+def _embed_concurrently(batcher, texts):
+    results = {}
+
+    def call(text):
+        try:
+            results[text] = batcher.embed(text)
+        except Exception as e:
+            results[text] = e
+
+    threads = [threading.Thread(target=call, args=(text,)) for text in texts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return results
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert condition()
+
+def test_concurrent_queries_share_one_encode():
+    model = FakeModel()
+    # The batch is closed by size, never by the (long) window
+    batcher = BatchingEmbedder(model, max_batch_size=4, window_ms=5000)
+    texts = ["a", "bb", "ccc", "dddd"]
+    results = _embed_concurrently(batcher, texts)
+    batcher.close()
+
+    assert len(model.calls) == 1 and sorted(model.calls[0]) == texts
+    for text in texts:
+        # Each caller gets the row encoded for its own text
+        assert results[text][0] == len(text)
+        assert model.calls[0][int(results[text][1])] == text
+
+def test_failed_encode_reaches_every_caller():
+    batcher = BatchingEmbedder(FakeModel(fail=True), max_batch_size=3, window_ms=5000)
+    results = _embed_concurrently(batcher, ["a", "b", "c"])
+    batcher.close()
+    assert all(isinstance(r, ValueError) for r in results.values()) and len(results) == 3
+
+def test_queries_behind_close_fail_instead_of_hanging():
+    model = FakeModel()
+    model.release.clear()
+    batcher = BatchingEmbedder(model, max_batch_size=1, window_ms=0)
+    results = {}
+    first = threading.Thread(target=lambda: results.update(first=batcher.embed("first")))
+    first.start()
+    model.started.wait(5)
+
+    closer = threading.Thread(target=batcher.close)
+    closer.start()
+    _wait_for(lambda: batcher._queue.qsize() == 1)  # _STOP
+
+    def late():
+        try:
+            batcher.embed("late")
+        except RuntimeError as e:
+            results["late"] = e
+    late_thread = threading.Thread(target=late)
+    late_thread.start()
+    _wait_for(lambda: batcher._queue.qsize() == 2)
+
+    model.release.set()
+    for t in (first, closer, late_thread):
+        t.join(5)
+    assert results["first"][0] == 5
+    assert isinstance(results["late"], RuntimeError)
+
+    # A new worker is started for the next query
+    assert batcher.embed("again")[0] == 5
+    batcher.close()
@@ -0,0 +1,85 @@
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from engine.embeddings.buffered_writer import BufferedVectorWriter
+
+class RecordingIndexer:
+    """Records the size of every upsert chunk; can fail once or block until released."""
+    def __init__(self, fail_once=False):
+        self.chunks = []
+        self.flushes = 0
+        self.fail_once = fail_once
+        self.release = threading.Event()
+        self.release.set()
+
+    def upsert_products(self, products, embeddings, flush=True):
+        self.release.wait(5)
+        assert not flush and len(products) == len(embeddings)
+        if self.fail_once:
+            self.fail_once = False
+            raise ValueError("insert failed")
+        self.chunks.append(len(products))
+
+    def flush(self):
+        self.flushes += 1
+
+def _rows(n):
+    return [{"product_id": str(i)} for i in range(n)], np.zeros((n, 4), dtype=np.float32)
+
+def test_rows_are_written_in_chunks_and_flushed_once():
+    indexer = RecordingIndexer()
+    writer = BufferedVectorWriter(indexer, chunk_rows=10, max_queued_rows=1000, flush_interval=60)
+    for _ in range(7):
+        writer.upsert_products(*_rows(4))
+    writer.close()
+
+    # Full chunks while producing, the remainder on close; a sealing flush only at the end
+    assert sum(indexer.chunks) == 28 and indexer.chunks[-1] <= 10
+    assert all(size >= 10 for size in indexer.chunks[:-1])
+    assert indexer.flushes == 1
+    assert writer.stats()["rows_written"] == 28
+    with pytest.raises(RuntimeError):
+        writer.upsert_products(*_rows(1))
+
+def test_producers_block_while_the_buffer_is_full():
+    indexer = RecordingIndexer()
+    indexer.release.clear()
+    writer = BufferedVectorWriter(indexer, chunk_rows=5, max_queued_rows=10, flush_interval=60)
+    writer.upsert_products(*_rows(5))  # Taken by the worker, which blocks in the indexer
+    writer.upsert_products(*_rows(10))  # Fills the buffer
+
+    blocked = threading.Event()
+    done = threading.Event()
+
+    def produce():
+        blocked.set()
+        writer.upsert_products(*_rows(5))
+        done.set()
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    blocked.wait(5)
+    assert not done.wait(0.1)
+
+    indexer.release.set()
+    assert done.wait(5)
+    producer.join()
+    writer.close()
+    assert sum(indexer.chunks) == 20
+    assert writer.stats()["backpressure_seconds"] > 0
+
+def test_background_error_surfaces_on_the_next_call():
+    indexer = RecordingIndexer(fail_once=True)
+    writer = BufferedVectorWriter(indexer, chunk_rows=5, max_queued_rows=100, flush_interval=60)
+    writer.upsert_products(*_rows(5))
+    with pytest.raises(RuntimeError, match="insert failed"):
+        writer.flush()
+
+    # Reported once; later writes go through
+    writer.upsert_products(*_rows(5))
+    writer.close()
+    assert indexer.chunks == [5]
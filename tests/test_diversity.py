@@ -0,0 +1,38 @@
+import numpy as np
+
+from engine.embeddings.diversity import diversify, mmr_select, sku_family
+
+def _hit(sku, score, vector):
+    return {"sku": sku, "name": sku, "score": score, "vector": np.asarray(vector, dtype=np.float32)}
+
+def test_sku_family():
+    assert sku_family("IME12-04BPSZC0K") == sku_family("ime12-08bpszc0k") == "IME12"
+    assert sku_family("1041434") == "1041434"
+    assert sku_family("WL12G") == "WL12G"
+
+def test_diversify_skips_variants_and_near_duplicates():
+    hits = [
+        _hit("IME12-04BPSZC0K", 0.95, [1.0, 0.0, 0.0]),
+        _hit("IME12-08BPSZC0K", 0.94, [1.0, 0.05, 0.0]),  # Same family
+        _hit("1041434", 0.93, [0.99, 0.1, 0.0]),  # Different family, near-identical vector
+        _hit("WL12G-3B2531", 0.80, [0.0, 1.0, 0.0]),
+        _hit("DT35-B15251", 0.75, [0.0, 0.0, 1.0]),
+    ]
+    picked = diversify(hits, k=3, lambda_=0.5)
+    assert [h["sku"] for h in picked] == ["IME12-04BPSZC0K", "WL12G-3B2531", "DT35-B15251"]
+    assert all("vector" not in h for h in picked)
+
+    # Pure relevance with family dedup only drops the second IME12 variant
+    assert [h["sku"] for h in diversify(hits, k=3, lambda_=1.0)] == ["IME12-04BPSZC0K", "1041434", "WL12G-3B2531"]
+    # Families repeat once every family is used
+    assert len(diversify(hits[:2], k=2, lambda_=1.0)) == 2
+
+def test_mmr_select_picks_distinct_families():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 384)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    relevance = np.sort(rng.random(50).astype(np.float32))[::-1]
+    families = [f"F{i % 10}" for i in range(50)]
+    picks = mmr_select(relevance, vectors, 5, 0.7, families)
+    assert len(set(picks)) == 5
+    assert len({families[i] for i in picks}) == 5
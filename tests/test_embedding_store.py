@@ -0,0 +1,61 @@
+import numpy as np
+
+from engine.embeddings.embedding_store import EmbeddingStore
+
+def _vectors(n, dim=8, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+def test_key_is_model_and_exact_text(tmp_path):
+    store = EmbeddingStore(str(tmp_path), model_id="model-a", dim=8)
+    assert store._key("sensor") == store._key("sensor")
+    assert store._key("sensor") != store._key("Sensor")
+    assert store._key("sensor") != EmbeddingStore(str(tmp_path / "b"), model_id="model-b", dim=8)._key("sensor")
+
+def test_hit_returns_stored_vector_and_survives_reopen(tmp_path):
+    vectors = _vectors(2)
+    store = EmbeddingStore(str(tmp_path), model_id="model-a", dim=8)
+    store.add(["a", "b"], vectors)
+
+    found, missing = store.lookup(["b", "c", "a"])
+    assert missing == [1]
+    assert np.array_equal(found[0], vectors[1]) and np.array_equal(found[2], vectors[0])
+
+    store.save()
+    reopened = EmbeddingStore(str(tmp_path), model_id="model-a", dim=8)
+    found, missing = reopened.lookup(["a"])
+    assert missing == [] and np.array_equal(found[0], vectors[0])
+
+    # Vectors of another model are never served
+    other = EmbeddingStore(str(tmp_path), model_id="model-b", dim=8)
+    assert other.lookup(["a", "b"])[1] == [0, 1]
+
+def test_store_grows_past_initial_capacity(tmp_path):
+    store = EmbeddingStore(str(tmp_path), model_id="m", dim=4)
+    vectors = _vectors(EmbeddingStore.INITIAL_CAPACITY + 10, dim=4)
+    texts = [f"t{i}" for i in range(len(vectors))]
+    store.add(texts, vectors)
+    found, missing = store.lookup(texts[-3:])
+    assert missing == [] and np.array_equal(found, vectors[-3:])
+
+def test_runs_mark_keys_and_compact_drops_stale_rows(tmp_path):
+    vectors = _vectors(4)
+    store = EmbeddingStore(str(tmp_path), model_id="m", dim=8)
+    store.begin_run()
+    store.add(["a", "b", "c", "d"], vectors)
+    assert {entry[1] for entry in store.keys.values()} == {1}
+
+    # The next run only sees c and a (one from the store, one re-added after a change)
+    store.begin_run()
+    store.lookup(["c"])
+    store.add(["a"], vectors[[3]])
+    assert store.keys[store._key("c")][1] == 2 and store.keys[store._key("b")][1] == 1
+
+    assert store.compact() == 2
+    assert store.count == 2
+    found, missing = store.lookup(["a", "b", "c", "d"])
+    assert missing == [1, 3]
+    assert np.array_equal(found[0], vectors[3]) and np.array_equal(found[2], vectors[2])
+
+    reopened = EmbeddingStore(str(tmp_path), model_id="m", dim=8)
+    found, missing = reopened.lookup(["c", "a"])
+    assert missing == [] and np.array_equal(found, vectors[[2, 3]])
@@ -0,0 +1,79 @@
+import numpy as np
+
+from engine.embeddings import index_tuning
+from engine.embeddings.index_tuning import (choose_index, exact_top_k, load_index_config, quantized_index,
+                                            sample_stored_vectors, tune_collection)
+from engine.embeddings.local_indexer import LocalVectorIndexer
+
+def _indexer(tmp_path, vectors):
+    indexer = LocalVectorIndexer(path=str(tmp_path), hnsw_min_rows=10**9)
+    indexer.create_collection(dim=vectors.shape[1])
+    indexer.upsert_products([{"product_id": str(i), "sku": f"SKU-{i}", "name": "", "category": "Sensors"}
+                             for i in range(len(vectors))], vectors)
+    return indexer
+
+def test_streamed_ground_truth_matches_brute_force(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 16)).astype(np.float32)
+    indexer = _indexer(tmp_path, vectors)
+
+    queries, ids, count = sample_stored_vectors(indexer, 20, batch_size=64)
+    assert count == 500 and queries.shape == (20, 16) and len(ids) == 20
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    assert np.allclose(queries, normed[[int(i) for i in ids]], atol=1e-5)  # Stored rows
+
+    scores = queries @ normed.T
+    expected = np.argsort(-scores, axis=1)[:, :10]
+    truth = exact_top_k(indexer, queries, 10, batch_size=64)
+    assert truth == [{str(i) for i in row} for row in expected]
+
+    # A query's own row is not its neighbour
+    scores[np.arange(20), [int(i) for i in ids]] = -np.inf
+    expected = np.argsort(-scores, axis=1)[:, :10]
+    truth = exact_top_k(indexer, queries, 10, batch_size=64, exclude=ids)
+    assert truth == [{str(i) for i in row} for row in expected]
+    assert all(own not in t for own, t in zip(ids, truth))
+
+def test_choose_index_thresholds():
+    assert choose_index(9_999, 384)["index_type"] == "FLAT"
+    assert choose_index(10_000, 384) == {"index_type": "IVF_FLAT", "params": {"nlist": 400}}
+    assert choose_index(499_999, 384)["index_type"] == "IVF_FLAT"
+    assert choose_index(500_000, 384, target_recall=0.9)["index_type"] == "HNSW"
+    assert choose_index(1_999_999, 384, target_recall=0.9)["index_type"] == "HNSW"
+    # Large collections trade recall for memory only when the target allows it
+    assert choose_index(2_000_000, 384)["index_type"] == "HNSW"
+    assert choose_index(2_000_000, 384, target_recall=0.9) == {"index_type": "IVF_PQ",
+                                                                "params": {"nlist": 5656, "m": 48, "nbits": 8}}
+    # PQ sub-vectors divide the dimension (28 // 8 = 3 does not)
+    assert choose_index(2_000_000, 28, target_recall=0.9)["params"]["m"] == 7
+    assert quantized_index(choose_index(500_000, 384), "int8") == {"index_type": "IVF_SQ8", "params": {"nlist": 128}}
+
+class SweepIndexer(LocalVectorIndexer):
+    """Exact local search that only finds the first half of each hit list below nprobe=8."""
+    def rebuild_index(self, index):
+        self.built = index
+
+    def search_many(self, query_embeddings, top_k=5, search_params=None, project=True, **kwargs):
+        found = super().search_many(query_embeddings, top_k=top_k, project=project, **kwargs)
+        if (search_params or {}).get("nprobe", 8) < 8:
+            found = [hits[:len(hits) // 2 + 1] for hits in found]
+        return found
+
+def test_tune_collection_sweeps_to_target_recall(tmp_path, monkeypatch):
+    monkeypatch.setenv("VECTOR_INDEX_CONFIG", str(tmp_path / "index_config.json"))
+    monkeypatch.setattr(index_tuning, "choose_index", lambda n, dim, target_recall: {"index_type": "IVF_FLAT", "params": {"nlist": 64}})
+    vectors = np.random.default_rng(1).normal(size=(300, 8)).astype(np.float32)
+    indexer = SweepIndexer(path=str(tmp_path / "index"), hnsw_min_rows=10**9)
+    indexer.create_collection(dim=8)
+    indexer.upsert_products([{"product_id": str(i), "sku": f"SKU-{i}", "name": "", "category": "Sensors"}
+                             for i in range(len(vectors))], vectors)
+
+    config = tune_collection(indexer, target_recall=0.95, num_queries=30, top_k=10)
+    assert indexer.built == {"index_type": "IVF_FLAT", "params": {"nlist": 64}}
+    assert config["search_params"] == {"nprobe": 8} and config["measured_recall"] == 1.0
+    assert (config["num_vectors"], config["dim"], config["top_k"]) == (300, 8, 10)
+    assert load_index_config() == config
+
+    # Unreachable target: the most accurate setting is kept
+    config = tune_collection(indexer, target_recall=1.01, num_queries=30, top_k=10)
+    assert config["search_params"] == {"nprobe": 64}
@@ -0,0 +1,72 @@
+from engine.embeddings.lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize
+
+PRODUCTS = [
+    {"sku": "IME12-04BPSZC0K", "name": "Inductive proximity sensor", "manufacturer": "SICK AG", "category": "Inductive Sensors",
+     "specifications": {"Sensing range": "4 mm", "Output": "PNP", "Connection": "M12 connector", "Interface": "IO-Link"}},
+    {"sku": "IME18-08NPSZC0S", "name": "Inductive proximity sensor", "manufacturer": "SICK", "category": "Inductive Sensors",
+     "specifications": {"Sensing range": "8 mm", "Output": "NPN", "Connection": "M12 connector"}},
+    {"sku": "WL12G-3B2531", "name": "Photoelectric retro-reflective sensor", "manufacturer": "SICK", "category": "Photoelectric Sensors",
+     "description": "Compact sensor with IO-Link"},
+]
+
+def _index():
+    index = LexicalIndex()
+    for product in PRODUCTS:
+        index.upsert(product)
+    return index
+
+def test_tokenize_part_numbers_and_units():
+    tokens = tokenize("WL12G-3B2531, 4mm")
+    assert {"wl12g-3b2531", "wl12g", "3b2531", "4mm", "4", "mm"} <= set(tokens)
+
+def test_spec_fragment_and_part_number_queries():
+    index = _index()
+    assert index.search("IO-Link M12 PNP 4mm")[0]["sku"] == "IME12-04BPSZC0K"
+    assert index.search("wl12g-3b2531")[0]["sku"] == "WL12G-3B2531"
+    assert [h["sku"] for h in index.search("M12 connector", category="Inductive Sensors", manufacturer="sick")] != []
+    assert index.search("retro-reflective", category="Inductive Sensors") == []
+
+def test_upsert_replaces_and_remove_deletes():
+    index = _index()
+    index.upsert({**PRODUCTS[1], "specifications": {"Output": "PNP"}})
+    assert index.search("NPN") == []
+    index.remove("WL12G-3B2531")
+    assert len(index) == 2 and index.search("WL12G-3B2531") == []
+
+def test_reciprocal_rank_fusion_prefers_items_in_both_lists():
+    vector = [{"sku": "A", "score": 0.9}, {"sku": "B", "score": 0.8}]
+    lexical = [{"sku": "B", "lexical_score": 7.0}, {"sku": "C", "lexical_score": 3.0}]
+    fused = reciprocal_rank_fusion([vector, lexical], limit=3)
+    assert [h["sku"] for h in fused] == ["B", "A", "C"]
+    assert fused[0]["score"] == 0.8 and fused[0]["lexical_score"] == 7.0
+
+def test_maybe_sync_runs_once_concurrently_and_backs_off_after_failure():
+    import threading, time
+
+    index = LexicalIndex()
+    calls = []
+
+    def failing_sync(force=False):
+        calls.append(1)
+        time.sleep(0.05)
+        raise ConnectionError("database unreachable")
+
+    index.sync_from_database = failing_sync
+    errors = []
+
+    def request():
+        try:
+            index.maybe_sync(interval=60)
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # Cold start: one load, the other requests carry on without waiting
+    assert len(calls) == 1 and len(errors) == 1
+    # The failure is not retried on the next request
+    index.maybe_sync(interval=60)
+    assert len(calls) == 1
@@ -0,0 +1,128 @@
+import threading
+
+import numpy as np
+
+from engine.embeddings.local_indexer import LocalVectorIndexer
+
+def _product(i, category="Sensors", manufacturer="SICK"):
+    return {"product_id": str(i), "sku": f"SKU-{i}", "name": f"Product {i}", "category": category, "manufacturer": manufacturer}
+
+def _indexer(tmp_path, vectors, products):
+    indexer = LocalVectorIndexer(path=str(tmp_path), hnsw_min_rows=10**9)
+    indexer.create_collection(dim=vectors.shape[1])
+    indexer.upsert_products(products, vectors)
+    return indexer
+
+def test_exact_search_matches_brute_force(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(200, 16)).astype(np.float32)
+    indexer = _indexer(tmp_path, vectors, [_product(i) for i in range(200)])
+
+    queries = rng.normal(size=(5, 16)).astype(np.float32)
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(queries @ normed.T), axis=1)[:, :10]
+    for hits, truth in zip(indexer.search_many(queries, top_k=10), expected):
+        assert [h["product_id"] for h in hits] == [str(i) for i in truth]
+        assert hits[0]["score"] >= hits[-1]["score"]
+
+def test_upsert_delete_and_filter(tmp_path):
+    vectors = np.eye(4, dtype=np.float32)
+    products = [_product(0), _product(1, manufacturer="ABB AG"), _product(2, category="Drives"), _product(3)]
+    indexer = _indexer(tmp_path, vectors, products)
+
+    # Re-indexing replaces rows instead of duplicating them
+    indexer.upsert_products([_product(0)], vectors[[1]])
+    assert indexer.num_entities == 4
+    assert indexer.search(vectors[1], top_k=1)[0]["product_id"] in ("0", "1")
+
+    hits = indexer.search(vectors[1], top_k=4, expr=indexer.build_filter(manufacturer="ABB"))
+    assert [h["product_id"] for h in hits] == ["1"]
+    hits = indexer.search(vectors[2], top_k=4, expr=indexer.build_filter(category="Drives"))
+    assert [h["product_id"] for h in hits] == ["2"]
+
+    assert indexer.delete_products(["1", "missing"]) == 1
+    assert indexer.list_product_ids() == {"0", "2", "3"}
+    assert indexer.search(vectors[3], top_k=1)[0]["product_id"] == "3"
+
+def test_search_during_deletes_returns_consistent_rows(tmp_path):
+    rng = np.random.default_rng(2)
+    vectors = rng.normal(size=(300, 16)).astype(np.float32)
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    indexer = _indexer(tmp_path, vectors, [_product(i) for i in range(300)])
+    queries = rng.normal(size=(8, 16)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    errors, done = [], threading.Event()
+
+    def search():
+        while not done.is_set():
+            try:
+                for query, hits in zip(queries, indexer.search_many(queries, top_k=20, with_vectors=True)):
+                    for hit in hits:
+                        truth = normed[int(hit["product_id"])]
+                        assert hit["sku"] == f"SKU-{hit['product_id']}"
+                        assert np.allclose(hit["vector"], truth, atol=1e-5)
+                        assert abs(hit["score"] - float(query @ truth)) < 1e-4
+            except Exception as e:
+                errors.append(e)
+                return
+
+    reader = threading.Thread(target=search)
+    reader.start()
+    # Deletes move the last row into the hole; re-inserts append it again
+    for _ in range(10):
+        for i in range(300):
+            indexer.delete_products([str(i)], flush=False)
+            indexer.upsert_products([_product(i)], vectors[[i]], flush=False)
+    done.set()
+    reader.join()
+    assert not errors, errors[0]
+    assert indexer.num_entities == 300
+
+def test_unflushed_writes_are_published_by_flush(tmp_path):
+    vectors = np.eye(4, dtype=np.float32)
+    indexer = _indexer(tmp_path, vectors[:2], [_product(0), _product(1)])
+
+    indexer.upsert_products([_product(2)], vectors[[2]], flush=False)
+    working = indexer._vectors
+    # Later batches of the same session write in place instead of copying the matrix
+    indexer.upsert_products([_product(0), _product(3)], vectors[[3, 3]], flush=False)
+    assert indexer._vectors is working
+    assert indexer.num_entities == 4
+    assert indexer.search(vectors[2], top_k=1)[0]["product_id"] != "2"
+
+    indexer.flush()
+    assert indexer.search(vectors[2], top_k=1)[0]["product_id"] == "2"
+    assert {h["product_id"] for h in indexer.search(vectors[3], top_k=2)} == {"0", "3"}
+
+def test_snapshot_restore(tmp_path):
+    vectors = np.eye(3, dtype=np.float32)
+    _indexer(tmp_path, vectors, [_product(i) for i in range(3)])
+
+    restored = LocalVectorIndexer(path=str(tmp_path), hnsw_min_rows=10**9)
+    restored.create_collection(dim=3)
+    assert restored.num_entities == 3
+    assert restored.search(vectors[2], top_k=1)[0]["sku"] == "SKU-2"
+    assert restored.list_categories() == ["Sensors"]
+
+def test_quantized_search_reranks_to_exact_order(tmp_path):
+    # Clustered like real embeddings; queries are near stored products
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(40, 32)).astype(np.float32)
+    vectors = (centers[rng.integers(0, 40, size=2000)] + 0.3 * rng.normal(size=(2000, 32))).astype(np.float32)
+    queries = (vectors[rng.choice(2000, 10, replace=False)] + 0.1 * rng.normal(size=(10, 32))).astype(np.float32)
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(queries @ normed.T), axis=1)[:, :5]
+
+    for kind in ("int8", "binary"):
+        writer = LocalVectorIndexer(path=str(tmp_path / kind), hnsw_min_rows=10**9, quantization=kind)
+        writer.create_collection(dim=32)
+        writer.upsert_products([_product(i) for i in range(2000)], vectors)
+
+        # A reader restores the codes and pages float32 rows in only for re-ranking
+        reader = LocalVectorIndexer(path=str(tmp_path / kind), hnsw_min_rows=10**9)
+        reader.create_collection(dim=32)
+        assert reader._codes is not None and reader._codes.nbytes < normed.nbytes / 3
+        reader.rerank_candidates = 100  # 5% of the rows
+        for hits, truth in zip(reader.search_many(queries, top_k=5), expected):
+            assert [h["product_id"] for h in hits] == [str(i) for i in truth]
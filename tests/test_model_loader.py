@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+from engine.embeddings.model_loader import load_sentence_transformer, read_dimension
+
+WORDS = ["sick", "inductive", "proximity", "sensor", "safety", "light", "curtain", "io", "-", "link", "m12"]
+
+@pytest.fixture(scope="module")
+def tiny_model_dir(tmp_path_factory):
+    """A randomly initialised 2-layer BERT with its tokenizer, saved like a downloaded model (pytorch_model.bin)."""
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    path = tmp_path_factory.mktemp("tiny-bert")
+    (path / "vocab.txt").write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS) + "\n")
+    BertTokenizerFast(vocab_file=str(path / "vocab.txt")).save_pretrained(str(path))
+    config = BertConfig(vocab_size=len(WORDS) + 5, hidden_size=16, num_hidden_layers=2, num_attention_heads=2,
+                        intermediate_size=32, max_position_embeddings=64)
+    BertModel(config).save_pretrained(str(path), safe_serialization=False)
+    return str(path)
+
+def test_mapped_model_encodes_like_a_regular_load(tiny_model_dir):
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Pooling, Transformer
+
+    texts = ["SICK inductive proximity sensor", "safety light curtain", "IO-Link M12"]
+    model = load_sentence_transformer(tiny_model_dir, max_seq_length=32)
+    vectors = model.encode(texts)
+
+    # Weights were converted once and the encoder now uses the mapped tensors
+    assert (read_dimension(tiny_model_dir), vectors.shape) == (16, (3, 16))
+    assert "model.safetensors" in os.listdir(tiny_model_dir)
+    assert model.max_seq_length == 32
+
+    transformer = Transformer(tiny_model_dir, max_seq_length=32)
+    reference = SentenceTransformer(modules=[transformer, Pooling(16, pooling_mode_mean_tokens=True)], device="cpu")
+    np.testing.assert_allclose(vectors, reference.encode(texts), rtol=1e-5, atol=1e-6)
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("sentence_transformers")
+
+from engine.embeddings.embedding_model import EmbeddingModel
+
+SAMPLES = [
+    "SICK inductive proximity sensor with IO-Link",
+    "Safety light curtain, 30 mm resolution",
+    "laser distance sensor high precision",
+    "IO-Link M12 PNP 4mm",
+]
+
+def _cosine(a, b):
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+@pytest.fixture(scope="module")
+def torch_vectors():
+    return EmbeddingModel().embed_text(SAMPLES)
+
+@pytest.mark.parametrize("quantize", ["false", "true"])
+def test_onnx_matches_torch(monkeypatch, torch_vectors, quantize):
+    """ONNX (fp32 and int8) vectors must be interchangeable with the torch path."""
+    monkeypatch.setenv("EMBEDDING_BACKEND", "onnx")
+    monkeypatch.setenv("EMBEDDING_ONNX_QUANTIZE", quantize)
+    model = EmbeddingModel()
+
+    onnx_vectors = model.embed_text(SAMPLES)
+    assert model.get_dimension() == len(torch_vectors[0])
+    assert _cosine(torch_vectors, onnx_vectors).min() > 0.99
+    assert len(model.embed_text(SAMPLES[0])) == len(torch_vectors[0])
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from engine.embeddings import pgvector_indexer
+from engine.embeddings.pgvector_indexer import PgVectorIndexer
+
+class FakeResult:
+    def __init__(self, rows=(), value=None, rowcount=0):
+        self.rows, self.value, self.rowcount = list(rows), value, rowcount
+
+    def scalar(self):
+        return self.value
+
+    def scalars(self):
+        return iter(self.rows)
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+class FakeEngine:
+    """Records every statement (SQL text, params) and answers with respond(sql, params)."""
+    def __init__(self, respond):
+        self.respond = respond
+        self.statements = []
+
+    def connect(self):
+        return self
+
+    begin = connect
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append((sql, params))
+        return self.respond(sql, params) or FakeResult()
+
+def _indexer(monkeypatch, respond, version="0.8.0"):
+    def answer(sql, params):
+        if "pg_extension" in sql:
+            return FakeResult(value=version)
+        return respond(sql, params)
+    engine = FakeEngine(answer)
+    monkeypatch.delenv("EMBEDDING_PROJECTION_PATH", raising=False)
+    monkeypatch.setattr(pgvector_indexer, "get_engine", lambda: engine)
+    return PgVectorIndexer(), engine
+
+def _row(ord_, sku, distance):
+    return {"ord": ord_, "sku_id": sku, "product_name": f"Product {sku}", "category": "Sensors", "manufacturer": "SICK AG",
+            "description": "", "specifications": {}, "datasheet_url": None, "images": None, "pricing": None,
+            "distance": distance}
+
+def test_create_collection_checks_extension_and_dimension(monkeypatch):
+    indexer, _ = _indexer(monkeypatch, lambda sql, params: FakeResult(value=384))
+    indexer.create_collection(dim=384)
+    assert indexer.dim == 384
+    with pytest.raises(ValueError):
+        indexer.create_collection(dim=768)
+
+    indexer, _ = _indexer(monkeypatch, lambda sql, params: FakeResult(value=384), version="0.4.4")
+    with pytest.raises(RuntimeError, match="0.5"):
+        indexer.create_collection(dim=384)
+    indexer, _ = _indexer(monkeypatch, lambda sql, params: FakeResult(value=384), version=None)
+    with pytest.raises(RuntimeError, match="not installed"):
+        indexer.create_collection(dim=384)
+
+def test_upsert_sets_embeddings_in_one_statement(monkeypatch):
+    indexer, engine = _indexer(monkeypatch, lambda sql, params: FakeResult(rowcount=2))
+    products = [{"sku": "A"}, {"sku": "B"}, {"sku": "A"}]
+    indexer.upsert_products(products, np.array([[1, 0], [0, 1], [0.5, 0.5]], dtype=np.float32))
+
+    (sql, params), = engine.statements
+    assert sql.startswith("UPDATE products AS p SET embedding = CAST(v.embedding AS vector) FROM unnest(")
+    # updated_at fingerprints the catalog and must not change on re-embedding
+    assert "updated_at" not in sql
+    # The last row for a SKU wins
+    assert params == {"skus": ["A", "B"], "embeddings": ["[0.5,0.5]", "[0,1]"]}
+
+def test_delete_clears_embeddings(monkeypatch):
+    indexer, engine = _indexer(monkeypatch, lambda sql, params: FakeResult(rowcount=1))
+    assert indexer.delete_products([]) == 0
+    assert engine.statements == []
+    assert indexer.delete_products(["A", "missing"]) == 1
+    (sql, params), = engine.statements
+    assert "SET embedding = NULL WHERE sku_id = ANY(:skus)" in sql and params == {"skus": ["A", "missing"]}
+
+def test_filtered_search_scans_deeper_and_maps_rows(monkeypatch):
+    rows = [_row(1, "A", 0.1), _row(1, "B", 0.3), _row(2, "C", 0.2)]
+    indexer, engine = _indexer(monkeypatch, lambda sql, params: FakeResult(rows) if "LATERAL" in sql else None)
+    expr = indexer.build_filter(manufacturer="SICK", category="Sensors")
+    hits = indexer.search_many(np.eye(2, dtype=np.float32), top_k=2, expr=expr)
+
+    assert [[h["sku"] for h in query_hits] for query_hits in hits] == [["A", "B"], ["C"]]
+    assert hits[0][0]["score"] == pytest.approx(0.9) and hits[0][0]["product_id"] == "A"
+    settings = [sql for sql, _ in engine.statements if sql.startswith("SET LOCAL")]
+    assert settings == ["SET LOCAL hnsw.ef_search = 400", "SET LOCAL hnsw.iterative_scan = strict_order"]
+
+    sql, params = engine.statements[-1]
+    assert "AND manufacturer ~* ANY(:manufacturer_patterns) AND category = ANY(:categories)" in sql
+    assert params["manufacturer_patterns"] == [r"\mSICK\M"] and params["categories"] == ["Sensors"]
+    assert params["queries"] == ["[1,0]", "[0,1]"] and params["top_k"] == 2
+
+def test_search_without_iterative_scan(monkeypatch):
+    indexer, engine = _indexer(monkeypatch, lambda sql, params: None, version="0.7.4")
+    indexer.search([1.0, 0.0], top_k=5, expr=indexer.build_filter(sku=["A"]))
+    indexer.search([1.0, 0.0], top_k=5)
+    settings = [sql for sql, _ in engine.statements if sql.startswith("SET LOCAL")]
+    assert settings == ["SET LOCAL hnsw.ef_search = 400", "SET LOCAL hnsw.ef_search = 64"]
@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from engine.rag import product_hydrator
+from engine.rag.product_hydrator import ProductHydrator
+
+class CountingHydrator(ProductHydrator):
+    """Serves rows from a dict instead of PostgreSQL and records each bulk fetch."""
+    def __init__(self, rows, **kwargs):
+        super().__init__(**kwargs)
+        self.rows = rows
+        self.fetches = []
+
+    def _fetch(self, skus):
+        self.fetches.append(list(skus))
+        return {sku: self.rows[sku] for sku in skus if sku in self.rows}
+
+def test_bulk_fetch_cache_and_version_invalidation(monkeypatch):
+    version = {"value": "1"}
+    monkeypatch.setattr(product_hydrator, "get_catalog_version", lambda: version["value"])
+    rows = {"A": {"description": "Laser sensor", "specifications": {"Range": "10 m"}}}
+    hydrator = CountingHydrator(rows, max_size=10, ttl_seconds=60)
+    hits = [{"sku": "A", "name": "a", "score": 0.9}, {"sku": "B", "name": "b", "score": 0.8}]
+
+    result = hydrator.hydrate(hits)
+    assert result[0]["description"] == "Laser sensor" and result[0]["score"] == 0.9
+    assert "description" not in result[1]
+    assert hydrator.fetches == [["A", "B"]]
+
+    # Both SKUs (including the unknown one) now come from the cache
+    hydrator.hydrate(hits)
+    assert len(hydrator.fetches) == 1
+
+    version["value"] = "2"
+    hydrator.hydrate(hits)
+    assert len(hydrator.fetches) == 2
+
+def test_database_errors_return_bare_hits(monkeypatch):
+    def fail():
+        raise RuntimeError("database down")
+    monkeypatch.setattr(product_hydrator, "get_catalog_version", fail)
+    hits = [{"sku": "A", "name": "a"}]
+    assert ProductHydrator().hydrate(hits) == hits
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from engine.embeddings.projection import PCAProjection, recall_report
+
+def _low_rank(n=500, dim=64, rank=8, seed=0):
+    rng = np.random.default_rng(seed)
+    basis = rng.normal(size=(rank, dim))
+    return (rng.normal(size=(n, rank)) @ basis).astype(np.float32)
+
+def test_projected_vectors_have_out_dim_and_unit_length(tmp_path):
+    vectors = _low_rank()
+    projection = PCAProjection.fit(vectors, 8)
+    assert (projection.in_dim, projection.out_dim) == (64, 8)
+
+    projected = projection.apply(vectors)
+    assert projected.shape == (500, 8) and projected.dtype == np.float32
+    assert np.allclose(np.linalg.norm(projected, axis=1), 1.0, atol=1e-5)
+    assert projection.apply(vectors[0]).shape == (8,)
+
+    # Cosine similarities survive when the kept dimensions span the data
+    full = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    assert np.allclose(projected[:50] @ projected[:50].T, full[:50] @ full[:50].T, atol=1e-4)
+
+    path = str(tmp_path / "projection.npz")
+    projection.save(path)
+    assert np.array_equal(PCAProjection.load(path).components, projection.components)
+    with pytest.raises(ValueError):
+        PCAProjection.fit(vectors, 65)
+
+def test_recall_report_on_low_rank_data():
+    vectors = _low_rank()
+    report = recall_report(vectors, vectors[:50], dims=[2, 8, 16], k=10, exclude_self=True)
+    assert report[8] > 0.99 and report[16] > 0.99
+    # Fewer dimensions than the data's rank lose neighbours
+    assert report[2] < report[8]
@@ -0,0 +1,26 @@
+from engine.embeddings.query_cache import QueryEmbeddingCache, normalize_query
+
+def test_normalized_variants_share_entry():
+    """Case and whitespace variants of a query hit the same entry."""
+    cache = QueryEmbeddingCache(max_size=10, ttl_seconds=60)
+    cache.put("SICK distance sensor", "model-a", [0.1, 0.2])
+    assert normalize_query("  sick   DISTANCE\tsensor ") == "sick distance sensor"
+    assert cache.get("  sick   DISTANCE\tsensor ", "model-a") == [0.1, 0.2]
+    assert cache.stats()["hits"] == 1
+
+def test_lru_eviction_and_model_change():
+    """Oldest entries are evicted, and a new model clears the cache."""
+    cache = QueryEmbeddingCache(max_size=2, ttl_seconds=60)
+    cache.put("a", "model-a", [1.0])
+    cache.put("b", "model-a", [2.0])
+    cache.get("a", "model-a")
+    cache.put("c", "model-a", [3.0])
+    assert cache.get("b", "model-a") is None
+    assert cache.get("a", "model-a") == [1.0]
+    assert cache.get("a", "model-b") is None
+    assert cache.stats()["size"] == 0
+
+def test_expired_entries_are_misses():
+    cache = QueryEmbeddingCache(max_size=2, ttl_seconds=0)
+    cache.put("a", "model-a", [1.0])
+    assert cache.get("a", "model-a") is None
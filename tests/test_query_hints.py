@@ -0,0 +1,18 @@
+from engine.embeddings.query_hints import extract_query_hints, normalize_manufacturer
+
+CATEGORIES = ["Sensors", "Fiber Optic Sensors", "Safety Light Curtains", "Drives"]
+
+def test_brand_and_most_specific_category():
+    hints = extract_query_hints("I need a SICK fiber optic sensor", CATEGORIES)
+    assert hints["manufacturer"] == ["SICK"]
+    assert hints["category"] == ["Fiber Optic Sensors"]
+
+def test_no_hints_for_generic_query():
+    hints = extract_query_hints("something to detect bottles on a conveyor", CATEGORIES)
+    assert hints == {"manufacturer": [], "category": []}
+
+def test_manufacturer_normalization():
+    assert normalize_manufacturer("Siemens AG") == "Siemens"
+    assert normalize_manufacturer("sick") == "SICK"
+    assert normalize_manufacturer("Omron") == "Omron"
+    assert normalize_manufacturer(None) == ""
@@ -0,0 +1,53 @@
+import threading
+
+from engine.embeddings.reranker import Reranker, LexicalOverlapScorer
+
+HITS = [
+    {"sku": "IME18-08NPSZC0S", "name": "Inductive proximity sensor", "score": 0.82,
+     "specifications": {"Sensing range": "8 mm", "Output": "NPN"}},
+    {"sku": "IME12-04BPSZC0K", "name": "Inductive proximity sensor", "score": 0.80,
+     "specifications": {"Sensing range": "4 mm", "Output": "PNP"}},
+    {"sku": "WL12G-3B2531", "name": "Photoelectric sensor", "score": 0.60},
+]
+
+class BlockingScorer:
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def score(self, query, hits, deadline=None):
+        self.calls += 1
+        self.release.wait(5)
+        return [1.0] * len(hits)
+
+def test_lexical_rerank_promotes_matching_specs():
+    reranker = Reranker(LexicalOverlapScorer(), candidates=10, budget_ms=1000, weight=0.7)
+    hits = reranker.rerank("inductive sensor 4 mm PNP", HITS, k=2)
+    assert [h["sku"] for h in hits] == ["IME12-04BPSZC0K", "IME18-08NPSZC0S"]
+    assert hits[0]["rerank_score"] == 1.0
+
+def test_over_budget_keeps_vector_order():
+    scorer = BlockingScorer()
+    reranker = Reranker(scorer, candidates=10, budget_ms=20)
+    hits = reranker.rerank("inductive sensor 4 mm PNP", HITS, k=2)
+    scorer.release.set()
+    assert hits == HITS[:2] and reranker.timeouts == 1
+    assert scorer.calls == 1
+
+
+def test_timed_out_jobs_do_not_queue_up():
+    scorer = BlockingScorer()
+    reranker = Reranker(scorer, candidates=10, budget_ms=50)  # 2 workers (RERANK_WORKERS)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(reranker.rerank("sensor", HITS, k=2))) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [HITS[:2]] * 6 and reranker.timeouts == 6
+
+    # The queued jobs were cancelled: only the two running ones ever called the scorer
+    scorer.release.set()
+    reranker.budget = 1.0
+    assert reranker.rerank("sensor", HITS, k=2)[0]["rerank_score"] == 1.0
+    assert scorer.calls == 3
@@ -0,0 +1,91 @@
+import zlib
+
+import numpy as np
+
+from engine.embeddings import search_engine
+from engine.embeddings.local_indexer import LocalVectorIndexer
+from engine.embeddings.search_engine import SearchEngine
+
+DIM = 32
+
+class FakeEmbedder:
+    """Hashed bag of words: texts sharing words get similar vectors."""
+    model_id = "fake-bow"
+
+    def get_dimension(self):
+        return DIM
+
+    def embed_array(self, texts):
+        single = isinstance(texts, str)
+        vectors = np.zeros((1 if single else len(texts), DIM), dtype=np.float32)
+        for row, text in zip(vectors, [texts] if single else texts):
+            for word in text.lower().split():
+                row[zlib.crc32(word.encode()) % DIM] += 1.0
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors[0] if single else vectors
+
+    embed_bulk = embed_array
+
+class FakeAttributeStore:
+    """IP67 matches every third product."""
+    def match(self, constraints):
+        return {f"SKU-{i}" for i in range(0, 40, 3)}
+
+PRODUCTS = [
+    {"product_id": f"SKU-{i}", "sku": f"SKU-{i}", "manufacturer": brand, "category": category,
+     "name": f"{brand} {category[:-1].lower()} model {i % 7}", "description": f"{['compact', 'rugged', 'fast'][i % 3]} series"}
+    for i, (brand, category) in enumerate(
+        (brand, category) for brand in ("SICK", "ABB", "Siemens", "Festo") for category in ("Sensors", "Drives")
+        for _ in range(5))
+]
+
+def _engine(monkeypatch, tmp_path):
+    monkeypatch.setenv("EMBEDDING_BATCHING", "false")
+    monkeypatch.setenv("RERANKER", "lexical")
+    monkeypatch.delenv("EMBEDDING_STORE_PATH", raising=False)
+    monkeypatch.setattr(search_engine, "EmbeddingModel", FakeEmbedder)
+    monkeypatch.setattr(search_engine, "create_vector_indexer",
+                        lambda: LocalVectorIndexer(path=str(tmp_path), hnsw_min_rows=10**9))
+    engine = SearchEngine()
+    engine.attribute_store = FakeAttributeStore()
+    engine.lexical_index.maybe_sync = lambda: None
+    for product in PRODUCTS:
+        engine.lexical_index.upsert(product)
+    engine.index_product_batch(PRODUCTS)
+    return engine
+
+def test_batch_search_matches_single_searches(monkeypatch, tmp_path):
+    engine = _engine(monkeypatch, tmp_path)
+    queries = ["rugged", "SICK sensor compact", "ABB drives", "fast series", "rugged sensors IP67", "", "model 3", "fast sensor"]
+    calls = []
+    search_many = engine.indexer.search_many
+    monkeypatch.setattr(engine.indexer, "search_many", lambda q, **kw: calls.append(len(q)) or search_many(q, **kw))
+
+    for max_prefilter_skus in (5000, 3):  # SKU pre-filter inside the search, then applied to the hits
+        engine.max_prefilter_skus = max_prefilter_skus
+        calls.clear()
+        batch = engine.search_products_batch(queries, limit=4)
+        batch_calls = list(calls)
+        single = [engine.search_products(query, limit=4) if query else [] for query in queries]
+
+        assert [[hit["sku"] for hit in hits] for hits in batch] == [[hit["sku"] for hit in hits] for hits in single]
+        assert batch[5] == [] and all(batch[i] for i in range(len(queries)) if i != 5)
+        # One index request per distinct first filter (the three unhinted queries share one)
+        assert sum(batch_calls) == 7 and 3 in batch_calls and len(batch_calls) < 7
+
+    # Hints, constraints and diversity took effect in the batch path
+    assert all(hit["manufacturer"] == "SICK" for hit in batch[1])
+    assert all(hit["sku"] in FakeAttributeStore().match([]) and hit["category"] == "Sensors" for hit in batch[4])
+    assert len({hit["sku"] for hit in batch[0]}) == len(batch[0])
+
+def test_spec_matches_above_backend_cap_filter_the_hits(monkeypatch, tmp_path):
+    monkeypatch.setattr(LocalVectorIndexer, "max_filter_skus", 5, raising=False)
+    engine = _engine(monkeypatch, tmp_path)
+    assert engine.max_prefilter_skus == 5
+    exprs = []
+    search_many = engine.indexer.search_many
+    monkeypatch.setattr(engine.indexer, "search_many", lambda q, **kw: exprs.append(kw.get("expr")) or search_many(q, **kw))
+
+    hits = engine.search_products("rugged sensors IP67", limit=4)
+    assert exprs == [{"category": ["Sensors"]}]
+    assert hits and all(hit["sku"] in FakeAttributeStore().match([]) for hit in hits)
@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+from engine.translation.sentence_buffer import SentenceBuffer, translate_stream
+
+TOKENS = ["The WL12G", " has a 1.5", " m range. It", " supports IO", "-Link.\n", "Ok. Order", " it today"]
+
+class FakeTranslator:
+    """Upper-cases text; earlier sentences take longer, so completion order differs from input order."""
+    def __init__(self):
+        self.calls = []
+
+    def translate_to_arabic(self, text):
+        self.calls.append(text)
+        time.sleep(0.03 if len(self.calls) == 1 else 0.0)
+        return text.upper()
+
+def test_releases_whole_sentences():
+    buffer = SentenceBuffer(min_chars=10)
+    out = []
+    for token in TOKENS:
+        out.extend(buffer.feed(token))
+    assert out == ["The WL12G has a 1.5 m range. ", "It supports IO-Link.\n"]
+    # Short pieces are merged into the following sentence
+    assert buffer.flush() == "Ok. Order it today"
+
+def test_translate_stream_keeps_order_and_flushes_the_rest():
+    translator = FakeTranslator()
+    out = list(translate_stream(TOKENS, translator.translate_to_arabic, min_chars=10))
+    assert out == ["THE WL12G HAS A 1.5 M RANGE. ", "IT SUPPORTS IO-LINK.\n", "OK. ORDER IT TODAY"]
+    # Trailing whitespace is not sent for translation
+    assert translator.calls == ["The WL12G has a 1.5 m range.", "It supports IO-Link.", "Ok. Order it today"]
+
+def test_chain_translates_stream_with_its_translator():
+    pytest.importorskip("langchain_core")
+    from engine.rag.recommendation_chain import RecommendationChain
+
+    chain = RecommendationChain.__new__(RecommendationChain)
+    chain.translator = FakeTranslator()
+    out = list(chain._translate_stream(iter(["Use the WL12G sensor here. It", " is rated IP67"])))
+    assert out == ["USE THE WL12G SENSOR HERE. ", "IT IS RATED IP67"]
+    assert "".join(out) == "USE THE WL12G SENSOR HERE. IT IS RATED IP67"
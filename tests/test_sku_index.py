@@ -0,0 +1,29 @@
+from engine.rag.sku_index import SkuIndex, format_product_card
+
+PRODUCTS = [
+    {"sku": "p261688", "name": "Fiber optic cable"},
+    {"sku": "WL12G-3B2531", "name": "Photoelectric sensor", "manufacturer": "SICK"},
+    {"sku": "1018278", "name": "Safety light curtain"},
+    {"sku": "M12", "name": "Too short to index"},
+]
+
+def _index():
+    index = SkuIndex()
+    index.load(PRODUCTS)
+    return index
+
+def test_exact_and_contained_part_numbers():
+    index = _index()
+    assert [p["name"] for p in index.lookup("P261688")] == ["Fiber optic cable"]
+    assert [p["sku"] for p in index.lookup("need a replacement for wl12g 3b2531 and 1018278")] == ["WL12G-3B2531", "1018278"]
+    assert len(index) == 3
+
+def test_no_partial_or_short_matches():
+    index = _index()
+    assert index.lookup("WL12G sensor with M12 connector") == []
+    assert index.lookup("10182789") == []
+    assert index.lookup("P261688X") == []
+
+def test_product_card():
+    card = format_product_card(PRODUCTS[1])
+    assert "Part Number (SKU): WL12G-3B2531" in card and "Manufacturer: SICK" in card
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+from engine.embeddings.spec_filters import parse_spec_constraints
+from tools.data_ingestion.spec_normalizer import normalize_specifications, attribute_rows, rebuild_attribute_index
+
+def test_normalize_sick_tech_data():
+    attributes = normalize_specifications({
+        "Sensing range": "0.05 m ... 20 m",
+        "Supply voltage": "10 V DC ... 30 V DC",
+        "Enclosure rating": "IP66, IP67, IP69K",
+        "Switching output": "PNP, IO-Link",
+        "Connection type": "Male connector M12, 4-pin",
+    })
+    assert attributes == {
+        "sensing_range_min_mm": 50.0, "sensing_range_mm": 20000.0,
+        "supply_voltage_min_v": 10.0, "supply_voltage_max_v": 30.0,
+        "ip_rating": ["IP66", "IP67", "IP69K"], "output_type": ["IO-Link", "PNP"],
+    }
+    assert len(attribute_rows("WL12G-3B2531", attributes)) == 9
+
+def test_normalize_units_and_tolerances():
+    attributes = normalize_specifications({"Working range": "50 mm ... 1,500 mm", "Supply voltage": "24 V DC ± 20 %"})
+    assert attributes["sensing_range_mm"] == 1500.0
+    assert (attributes["supply_voltage_min_v"], attributes["supply_voltage_max_v"]) == (19.2, 28.8)
+
+def test_parse_query_constraints():
+    assert parse_spec_constraints("Sensing range ≥ 20 m, IP67") == [
+        {"attribute": "sensing_range_mm", "op": ">=", "value": 20000.0},
+        {"attribute": "ip_rating", "op": "=", "value": "IP67"},
+    ]
+    constraints = parse_spec_constraints("inductive sensor range up to 4mm, NPN, 24V DC")
+    assert {"attribute": "sensing_range_mm", "op": "<=", "value": 4.0} in constraints
+    assert {"attribute": "supply_voltage", "op": "contains", "value": 24.0} in constraints
+    assert {"attribute": "output_type", "op": "=", "value": "NPN"} in constraints
+    assert parse_spec_constraints("M12 connector cable") == []
+
+class FakeConnection:
+    """Serves `products` pages for `sku_id > :last_sku_id ... LIMIT :limit` and records attribute writes."""
+    def __init__(self, products):
+        self.products = products
+        self.queries = []
+        self.attributes = {}
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        if sql.startswith("SELECT"):
+            self.queries.append(sql)
+            last = params["last_sku_id"]
+            rows = sorted((sku, specs) for sku, specs in self.products.items() if last is None or sku > last)
+            return SimpleNamespace(fetchall=lambda: rows[:params["limit"]])
+        if sql.startswith("INSERT"):
+            for row in params:
+                self.attributes.setdefault(row["sku_id"], []).append(row["attribute"])
+        return None
+
+    def commit(self):
+        pass
+
+def test_rebuild_attribute_index_pages_by_key():
+    products = {f"SKU-{i:02d}": {"Enclosure rating": "IP67"} for i in range(7)}
+    conn = FakeConnection(products)
+    assert rebuild_attribute_index(conn, batch_size=3) == 7
+    assert sorted(conn.attributes) == sorted(products)
+    assert len(conn.queries) == 4 and not any("OFFSET" in sql for sql in conn.queries)
+    assert "WHERE sku_id > :last_sku_id" in conn.queries[1]
@@ -0,0 +1,133 @@
+import importlib.util
+import json
+import os
+import re
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pymilvus")
+
+from pymilvus import CollectionSchema, DataType, FieldSchema
+
+from engine.embeddings.vector_indexer import VectorIndexer
+
+def _schema(keyed: bool) -> CollectionSchema:
+    if keyed:
+        key = [FieldSchema(name="product_id", dtype=DataType.VARCHAR, max_length=100, is_primary=True, auto_id=False)]
+    else:
+        # Legacy layout: auto_id primary key, product_id a plain field
+        key = [FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
+               FieldSchema(name="product_id", dtype=DataType.VARCHAR, max_length=64)]
+    return CollectionSchema(key + [
+        FieldSchema(name="sku", dtype=DataType.VARCHAR, max_length=128),
+        FieldSchema(name="name", dtype=DataType.VARCHAR, max_length=512),
+        FieldSchema(name="category", dtype=DataType.VARCHAR, max_length=256),
+        FieldSchema(name="manufacturer", dtype=DataType.VARCHAR, max_length=100),
+        FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=2),
+    ])
+
+class FakeCollection:
+    """In-memory stand-in for a Milvus collection (columnar insert/upsert, `field in [...]` deletes)."""
+    def __init__(self, schema):
+        self.schema = schema
+        self.rows = []
+        self.next_id = 1
+
+    def _rows(self, data):
+        names = [f.name for f in self.schema.fields if not f.auto_id]
+        return [dict(zip(names, values)) for values in zip(*data)]
+
+    def insert(self, data):
+        for row in self._rows(data):
+            if self.schema.auto_id:
+                row["id"], self.next_id = self.next_id, self.next_id + 1
+            self.rows.append(row)
+        return SimpleNamespace(insert_count=len(data[0]))
+
+    def upsert(self, data):
+        new = self._rows(data)
+        replaced = {row["product_id"] for row in new}
+        self.rows = [row for row in self.rows if row["product_id"] not in replaced] + new
+
+    def _matches(self, expr):
+        field, values = re.fullmatch(r"(\w+) in (\[.*\])", expr).groups()
+        values = set(json.loads(values))
+        return [row for row in self.rows if row[field] in values]
+
+    def query(self, expr, output_fields):
+        return [{f: row[f] for f in output_fields} for row in self._matches(expr)]
+
+    def delete(self, expr):
+        matched = self._matches(expr)
+        self.rows = [row for row in self.rows if row not in matched]
+        return SimpleNamespace(delete_count=len(matched))
+
+    def query_iterator(self, batch_size, expr, output_fields):
+        batches = iter([[{f: row[f] for f in output_fields} for row in self.rows[i:i + batch_size]]
+                        for i in range(0, len(self.rows), batch_size)])
+        return SimpleNamespace(next=lambda: next(batches, []), close=lambda: None)
+
+    def flush(self):
+        pass
+
+    def compact(self):
+        pass
+
+    def wait_for_compaction_completed(self):
+        pass
+
+    @property
+    def num_entities(self):
+        return len(self.rows)
+
+def _indexer(monkeypatch, keyed=True):
+    monkeypatch.delenv("EMBEDDING_PROJECTION_PATH", raising=False)
+    monkeypatch.setattr(VectorIndexer, "_connect", lambda self: None)
+    indexer = VectorIndexer()
+    indexer.collection = FakeCollection(_schema(keyed))
+    return indexer
+
+def _product(i, name="Sensor"):
+    return {"product_id": f"SKU-{i}", "sku": f"SKU-{i}", "name": name, "category": "Sensors", "manufacturer": "SICK"}
+
+@pytest.mark.parametrize("keyed", [True, False])
+def test_reindexing_replaces_rows(monkeypatch, keyed):
+    indexer = _indexer(monkeypatch, keyed=keyed)
+    assert indexer.keyed_by_product_id is keyed
+    indexer.upsert_products([_product(1), _product(2)], np.eye(2, dtype=np.float32))
+
+    # Re-index SKU-1 (twice in one batch: the last row wins) and add SKU-3
+    indexer.upsert_products([_product(1, "Old"), _product(1, "New"), _product(3)], np.ones((3, 2), dtype=np.float32))
+    rows = indexer.collection.rows
+    assert sorted(row["product_id"] for row in rows) == ["SKU-1", "SKU-2", "SKU-3"]
+    assert next(row["name"] for row in rows if row["product_id"] == "SKU-1") == "New"
+
+    assert indexer.delete_products(["SKU-2", "missing"]) == 1
+    assert indexer.list_product_ids() == {"SKU-1", "SKU-3"}
+
+def test_dedupe_keeps_newest_row_of_legacy_collection(monkeypatch):
+    indexer = _indexer(monkeypatch, keyed=False)
+    # Insert-only runs duplicated SKU-1
+    indexer.insert_products([_product(1, "Old"), _product(2)], np.eye(2, dtype=np.float32))
+    indexer.insert_products([_product(1, "New")], np.ones((1, 2), dtype=np.float32))
+
+    path = os.path.join(os.path.dirname(__file__), "..", "scripts", "dedupe_collection.py")
+    spec = importlib.util.spec_from_file_location("dedupe_collection", path)
+    dedupe = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(dedupe)
+    monkeypatch.setattr(dedupe, "VectorIndexer", lambda collection_name: indexer)
+    monkeypatch.setattr(dedupe.utility, "has_collection", lambda name: True)
+    monkeypatch.setattr(indexer, "create_collection", lambda: None)
+
+    dedupe.dedupe_collection()
+    assert sorted((row["product_id"], row["name"]) for row in indexer.collection.rows) == [("SKU-1", "New"), ("SKU-2", "Sensor")]
+
+def test_large_sku_filters_are_refused(monkeypatch):
+    indexer = _indexer(monkeypatch)
+    skus = [f"WL12G-3B{i:06d}" for i in range(indexer.max_filter_skus)]
+    expr = indexer.build_filter(category="Sensors", sku=skus)
+    assert expr.startswith('category in ["Sensors"] and sku in ["WL12G-3B000000", ') and len(expr) < 20000
+    with pytest.raises(ValueError, match="filter the search results"):
+        indexer.build_filter(sku=skus + ["WL12G-3B999999"])
@@ -0,0 +1,58 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from engine.embeddings import worker_pool
+from engine.embeddings.worker_pool import EmbeddingWorkerPool
+
+class FakeModel:
+    """Encodes a text "t<i>" as [i, i, i]; "boom" raises."""
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def get_dimension(self):
+        return 3
+
+    def embed_bulk(self, texts, normalize=False):
+        if "boom" in texts:
+            raise ValueError("encode failed")
+        return np.array([[float(t[1:])] * 3 for t in texts], dtype=np.float32)
+
+@pytest.fixture(scope="module")
+def pool():
+    with EmbeddingWorkerPool(2, threads_per_worker=1, shards_per_worker=3, model_factory=FakeModel) as pool:
+        yield pool
+
+@pytest.fixture
+def segments(monkeypatch):
+    """Names of the shared-memory segments created by the parent."""
+    names = []
+
+    class Recording(shared_memory.SharedMemory):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            names.append(self.name)
+
+    monkeypatch.setattr(worker_pool.shared_memory, "SharedMemory", Recording)
+    return names
+
+def _unlinked(name):
+    try:
+        shared_memory.SharedMemory(name=name).close()
+    except FileNotFoundError:
+        return True
+    return False
+
+def test_output_is_in_input_order(pool, segments):
+    texts = [f"t{i}" for i in range(23)]
+    output = pool.embed_bulk(texts)
+    assert pool.get_dimension() == 3
+    assert output.shape == (23, 3) and np.array_equal(output[:, 0], np.arange(23))
+    assert pool.embed_bulk([]).shape == (0, 3)
+    assert len(segments) == 1 and _unlinked(segments[0])
+
+def test_shared_memory_is_unlinked_on_error(pool, segments):
+    with pytest.raises(ValueError):
+        pool.embed_bulk([f"t{i}" for i in range(10)] + ["boom"])
+    assert len(segments) == 1 and _unlinked(segments[0])
@@ -1,11 +1,15 @@
 import csv
 import os
+import sys
 import logging
 from typing import Optional
 from sqlalchemy import create_engine, text
 import json
 import ast
 
+sys.path.append(os.getcwd())
+from tools.data_ingestion.spec_normalizer import write_product_attributes
+
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("CSV_Importer")
@@ -21,6 +25,14 @@ DB_NAME = "automation_engine"
 
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+def _write_attributes(conn, sku: str, specs):
+    """Refreshes the product's typed spec attributes; a missing table does not fail the import."""
+    try:
+        with conn.begin_nested():
+            write_product_attributes(conn, sku, specs)
+    except Exception as e:
+        logger.warning(f"Could not index specifications of {sku}: {e}")
+
 def import_csv(filename: str):
     if not os.path.exists(filename):
         logger.error(f"File {filename} not found.")
@@ -75,7 +87,8 @@ def import_csv(filename: str):
                 SET product_name = EXCLUDED.product_name, 
                     images = EXCLUDED.images,
                     specifications = EXCLUDED.specifications,
-                    datasheet_url = EXCLUDED.datasheet_url;
+                    datasheet_url = EXCLUDED.datasheet_url,
+                    updated_at = NOW();
             """)
             
             try:
@@ -87,6 +100,7 @@ def import_csv(filename: str):
                     "specifications": json.dumps(specs_json),
                     "datasheet_url": datasheet
                 })
+                _write_attributes(conn, sku, specs_json)
                 conn.commit()
                 success_count += 1
                 logger.debug(f"Imported {sku}")
@@ -0,0 +1,189 @@
+import json
+import logging
+import re
+from typing import Dict, List, Optional, Tuple, Union
+
+# Configure Logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("Spec_Normalizer")
+
+# Conversion factors to the stored unit of each quantity
+LENGTH_UNITS_MM = {"µm": 0.001, "um": 0.001, "mm": 1.0, "cm": 10.0, "m": 1000.0, "km": 1000000.0}
+VOLTAGE_UNITS_V = {"mv": 0.001, "v": 1.0, "kv": 1000.0}
+
+# Spec table keys (lower-cased substrings) mapped to normalized attributes
+SENSING_RANGE_KEYS = ("sensing range", "scanning range", "detection range", "working range", "measuring range", "operating range")
+SUPPLY_VOLTAGE_KEYS = ("supply voltage", "operating voltage", "voltage supply")
+IP_RATING_KEYS = ("enclosure rating", "ip rating", "degree of protection", "protection class")
+OUTPUT_KEYS = ("output", "switching mode")
+
+OUTPUT_TYPES = {
+    "PNP": r"\bpnp\b",
+    "NPN": r"\bnpn\b",
+    "Push-pull": r"\bpush[\s-]?pull\b",
+    "IO-Link": r"\bio[\s-]?link\b",
+    "Analog": r"\banalog(?:ue)?\b|\b4\s*(?:mA)?\s*\.\.\.?\s*20\s*mA\b|\b0\s*\.\.\.?\s*10\s*V\b",
+    "Relay": r"\brelay\b",
+}
+
+# "20,000" is twenty thousand, "1,5" is one and a half
+_NUMBER = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:[.,]\d+)?"
+_IP_RATING = re.compile(r"\bIP\s?(\d)(\d)(K?)\b", re.IGNORECASE)
+_TOLERANCE = re.compile(rf"±\s*({_NUMBER})\s*%")
+_PERCENT = re.compile(rf"(?:{_NUMBER})\s*%")
+
+# Attributes stored as numbers (mm / V); the others are text values, possibly several per product
+NUMERIC_ATTRIBUTES = ("sensing_range_min_mm", "sensing_range_mm", "supply_voltage_min_v", "supply_voltage_max_v")
+TEXT_ATTRIBUTES = ("ip_rating", "output_type")
+
+
+def parse_number(value: str) -> float:
+    if re.fullmatch(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?", value):
+        return float(value.replace(",", ""))
+    return float(value.replace(",", "."))
+
+
+def parse_quantities(value: str, units: Dict[str, float]) -> List[float]:
+    """
+    Numbers in a spec value converted with `units`, in order of appearance.
+
+    A number without a unit takes the unit of the next one ("0.5 ... 20 m" is
+    500 mm to 20,000 mm); numbers without any unit are ignored.
+    """
+    unit_pattern = "|".join(sorted((re.escape(u) for u in units), key=len, reverse=True))
+    # Not inside identifiers such as "M12" or "IP67"
+    found = re.findall(rf"(?<![a-z\d.,])({_NUMBER})\s*({unit_pattern})?(?![a-z])", value, re.IGNORECASE)
+    quantities, pending = [], []
+    for number, unit in found:
+        pending.append(parse_number(number))
+        if unit:
+            quantities.extend(n * units[unit.lower()] for n in pending)
+            pending = []
+    return quantities
+
+
+def parse_range(value: str, units: Dict[str, float]) -> Optional[Tuple[float, float]]:
+    """(min, max) of a value like "10 V DC ... 30 V DC", "24 V DC ± 20 %" or "4 mm"."""
+    tolerance = _TOLERANCE.search(value)
+    quantities = parse_quantities(_PERCENT.sub(" ", value), units)
+    if not quantities:
+        return None
+    if tolerance and len(quantities) == 1:
+        share = parse_number(tolerance.group(1)) / 100.0
+        return round(quantities[0] * (1 - share), 3), round(quantities[0] * (1 + share), 3)
+    return min(quantities), max(quantities)
+
+
+def parse_ip_ratings(value: str) -> List[str]:
+    return sorted({f"IP{a}{b}{k.upper()}" for a, b, k in _IP_RATING.findall(value)})
+
+
+def parse_output_types(value: str) -> List[str]:
+    return [name for name, pattern in OUTPUT_TYPES.items() if re.search(pattern, value, re.IGNORECASE)]
+
+
+def _as_pairs(specs: Union[Dict, List, str, None]) -> List[Tuple[str, str]]:
+    """(key, value) text pairs from specification JSON (object, list of pairs or JSON text)."""
+    if not specs:
+        return []
+    if isinstance(specs, str):
+        try:
+            specs = json.loads(specs)
+        except ValueError:
+            return []
+    if isinstance(specs, dict):
+        return [(str(k), v if isinstance(v, str) else json.dumps(v)) for k, v in specs.items()]
+    if isinstance(specs, list):
+        return [(str(s[0]), str(s[1])) for s in specs if isinstance(s, (list, tuple)) and len(s) == 2]
+    return []
+
+
+def normalize_specifications(specs: Union[Dict, List, str, None]) -> Dict[str, Union[float, List[str]]]:
+    """
+    Typed attributes from a product's free-text specification table.
+
+    Returns:
+        Dict: Any of sensing_range_min_mm / sensing_range_mm (max), supply_voltage_min_v /
+              supply_voltage_max_v (numbers), ip_rating and output_type (lists of values).
+    """
+    attributes = {}
+    ip_ratings, outputs = set(), set()
+    for key, value in _as_pairs(specs):
+        name = key.lower()
+        if "sensing_range_mm" not in attributes and any(k in name for k in SENSING_RANGE_KEYS):
+            parsed = parse_range(value, LENGTH_UNITS_MM)
+            if parsed:
+                attributes["sensing_range_min_mm"], attributes["sensing_range_mm"] = parsed
+        elif "supply_voltage_max_v" not in attributes and any(k in name for k in SUPPLY_VOLTAGE_KEYS):
+            parsed = parse_range(value, VOLTAGE_UNITS_V)
+            if parsed:
+                attributes["supply_voltage_min_v"], attributes["supply_voltage_max_v"] = parsed
+        elif any(k in name for k in IP_RATING_KEYS):
+            ip_ratings.update(parse_ip_ratings(value))
+        elif any(k in name for k in OUTPUT_KEYS):
+            outputs.update(parse_output_types(value))
+    if ip_ratings:
+        attributes["ip_rating"] = sorted(ip_ratings)
+    if outputs:
+        attributes["output_type"] = sorted(outputs)
+    return attributes
+
+
+def attribute_rows(sku: str, attributes: Dict[str, Union[float, List[str]]]) -> List[Dict]:
+    """Rows for the product_attributes table (one per numeric value or text value)."""
+    rows = []
+    for attribute, value in attributes.items():
+        if attribute in NUMERIC_ATTRIBUTES:
+            rows.append({"sku_id": sku, "attribute": attribute, "num_value": float(value), "text_value": None})
+        else:
+            rows.extend({"sku_id": sku, "attribute": attribute, "num_value": None, "text_value": v} for v in value)
+    return rows
+
+
+def write_product_attributes(conn, sku: str, specs) -> int:
+    """
+    Replaces a product's rows in product_attributes (caller commits).
+
+    Returns:
+        int: Number of attribute rows written.
+    """
+    from sqlalchemy import text
+
+    rows = attribute_rows(sku, normalize_specifications(specs))
+    conn.execute(text("DELETE FROM product_attributes WHERE sku_id = :sku_id"), {"sku_id": sku})
+    if rows:
+        conn.execute(text("""
+            INSERT INTO product_attributes (sku_id, attribute, num_value, text_value)
+            VALUES (:sku_id, :attribute, :num_value, :text_value)
+        """), rows)
+    return len(rows)
+
+
+def rebuild_attribute_index(conn, batch_size: int = 1000) -> int:
+    """Re-derives product_attributes for every product (e.g. after changing the normalizer)."""
+    from sqlalchemy import text
+
+    # Keyset pagination on the primary key: rewriting attributes (or concurrent
+    # inserts/deletes) cannot shift later pages the way OFFSET would
+    written, done, last_sku_id = 0, 0, None
+    while True:
+        where = "WHERE sku_id > :last_sku_id" if last_sku_id is not None else ""
+        batch = conn.execute(text(f"SELECT sku_id, specifications FROM products {where} ORDER BY sku_id LIMIT :limit"),
+                             {"last_sku_id": last_sku_id, "limit": batch_size}).fetchall()
+        if not batch:
+            break
+        for sku, specs in batch:
+            written += write_product_attributes(conn, sku, specs)
+        conn.commit()
+        done += len(batch)
+        last_sku_id = batch[-1][0]
+        logger.info(f"Normalized specifications of {done} products ({written} attributes).")
+    return written
+
+
+if __name__ == "__main__":
+    from engine.database import get_engine
+
+    with get_engine().connect() as conn:
+        total = rebuild_attribute_index(conn)
+    logger.info(f"Attribute index rebuilt: {total} attributes.")
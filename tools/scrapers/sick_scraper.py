@@ -297,6 +297,7 @@ class SickScraper(BaseScraper):
         import os
         from sqlalchemy import create_engine, text
         import json
+        from tools.data_ingestion.spec_normalizer import write_product_attributes
 
         # Reuse env vars logic or defaults
         DB_USER = os.getenv("POSTGRES_USER", "postgres")
@@ -323,7 +324,8 @@ class SickScraper(BaseScraper):
                             description = EXCLUDED.description,
                             specifications = EXCLUDED.specifications,
                             images = EXCLUDED.images,
-                            datasheet_url = EXCLUDED.datasheet_url
+                            datasheet_url = EXCLUDED.datasheet_url,
+                            updated_at = now()
                     """)
                     
                     conn.execute(stmt, {
@@ -335,6 +337,12 @@ class SickScraper(BaseScraper):
                         "datasheet_url": p.get("datasheet_url"),
                         "category": "Fiber Optic Cables" # Simplified for this test context or extract real category
                     })
+                    # Typed attributes (range in mm, voltage, IP rating, output) for spec filtering
+                    try:
+                        with conn.begin_nested():
+                            write_product_attributes(conn, p.get("sku_id"), p.get("specifications", {}))
+                    except Exception as e:
+                        logger.warning(f"Could not index specifications of {p.get('sku_id')}: {e}")
                     conn.commit()
             logger.info(f"Saved {len(products)} products to DB.")
         except Exception as e:
@@ -7,6 +7,19 @@ import os
 # Configuration
 API_BASE_URL = os.getenv("API_BASE_URL", "http://api:8000/api/v1")
 
+def sse_events(response):
+    """(event, data) pairs from a text/event-stream response."""
+    response.encoding = "utf-8"
+    event, data = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+        elif not line and data:
+            yield event, json.loads("\n".join(data))
+            event, data = "message", []
+
 st.set_page_config(page_title="Industrial AI Engine", layout="wide")
 st.title("🏭 Industrial Automation AI Engine")
 
@@ -44,29 +57,38 @@ with tab1:
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        # Get bot response
+        # Get bot response (streamed: sources first, then the answer as it is generated)
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                try:
-                    response = requests.post(
-                        f"{API_BASE_URL}/recommend",
-                        json={"query": prompt},
-                        timeout=120
-                    )
-                    if response.status_code == 200:
-                        data = response.json()
-                        answer = data.get("answer", "No answer provided.")
-                        st.markdown(answer)
-                        st.session_state.messages.append({"role": "assistant", "content": answer})
-                        
-                        # Show sources if available
-                        if "sources" in data:
-                            with st.expander("View Source Documents"):
-                                st.json(data["sources"])
-                    else:
-                        st.error(f"Error: {response.text}")
-                except Exception as e:
-                    st.error(f"Connection Error: {e}")
+            try:
+                response = requests.post(
+                    f"{API_BASE_URL}/recommend/stream",
+                    json={"query": prompt},
+                    stream=True,
+                    timeout=(5, 120)  # Connect, then max gap between events
+                )
+                if response.status_code == 200:
+                    sources = []
+
+                    def answer_tokens():
+                        for event, data in sse_events(response):
+                            if event == "sources":
+                                sources.extend(data.get("sources", []))
+                            elif event == "token":
+                                yield data["text"]
+                            elif event == "error":
+                                yield f"\n\n⚠️ {data.get('message')}"
+
+                    answer = st.write_stream(answer_tokens())
+                    st.session_state.messages.append({"role": "assistant", "content": answer})
+
+                    # Show sources if available
+                    if sources:
+                        with st.expander("View Source Documents"):
+                            st.json(sources)
+                else:
+                    st.error(f"Error: {response.text}")
+            except Exception as e:
+                st.error(f"Connection Error: {e}")
 
 # --- TAB 2: QUOTATION ---
 with tab2: